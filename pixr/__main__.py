@@ -1,32 +1,91 @@
-import click
-from pydantic import ValidationError
+import os
+from contextlib import contextmanager
+from pathlib import Path
 from typing import Optional
 
-from pixr.command.core import Command
+import click
+
+from pixr.cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE, ResultCache
 from pixr.command.exceptions import PixrError
-from pixr.runner_factory import RunnerFactory
+from pixr.formats import (
+    BUDGET_OBJECTIVES,
+    ENCODER_EFFORT,
+    PROBE_MODES,
+    RESAMPLE_FILTERS,
+    SERVE_HOST,
+    SERVE_PORT,
+    SERVE_QUEUE_DEPTH,
+    STATS_FORMATS,
+    WATCH_SETTLE,
+)
+from pixr.utils import parse_size
+
+# Only click and pixr's constant tables are imported up front, so `--help` and usage
+# errors stay fast; pydantic, PIL and the runners load once a command actually runs.
 
 
 @click.group()
-def cli():
+@click.option("--cache", "use_cache", is_flag=True, help=f"Cache encoded results (in {DEFAULT_CACHE_DIR} by default).")
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    envvar="PIXR_CACHE_DIR",
+    help="Cache encoded results in this directory (implies --cache).",
+)
+@click.option(
+    "--cache-max-size",
+    default=DEFAULT_MAX_SIZE,
+    envvar="PIXR_CACHE_MAX_SIZE",
+    show_default=True,
+    help="Evict least recently used results beyond this size.",
+)
+@click.option(
+    "--remote",
+    envvar="PIXR_REMOTE",
+    metavar="ADDRESS",
+    help="Send work to a `pixr serve` daemon at host:port or unix:/path/to.sock.",
+)
+@click.option(
+    "--stats", is_flag=True, help="Report per-file stage timings, encoder probes, bytes and peak memory on stderr."
+)
+@click.option(
+    "--stats-format",
+    default="text",
+    show_default=True,
+    type=click.Choice(STATS_FORMATS, case_sensitive=False),
+    help="How --stats reports; json writes one JSON object per file.",
+)
+@click.pass_context
+def cli(
+    ctx: click.Context,
+    use_cache: bool,
+    cache_dir: Optional[str],
+    cache_max_size: str,
+    remote: Optional[str],
+    stats: bool,
+    stats_format: str,
+):
     """A versatile image processing tool."""
-    pass
+    if use_cache and not cache_dir:
+        cache_dir = str(DEFAULT_CACHE_DIR)
+    ctx.obj = {"cache_dir": cache_dir, "cache_max_size": cache_max_size, "remote": remote}
+    ctx.obj["stats"] = stats_format.lower() if stats else None
 
 
 main = cli
 
 
-def run_command(argument: str, options: dict):
-    verbose = options.get('verbose', False)
+@contextmanager
+def cli_errors(verbose: bool):
+    """Translate pixr and validation errors into clean click errors."""
+    from pydantic import ValidationError
+
+    from pixr.command.core import validation_message
+
     try:
-        command = Command.from_cli(argument, options)
-        runner = RunnerFactory.create_runner(command)
-        runner.run()
+        yield
     except ValidationError as e:
-        msg = e.errors()[0]['msg']
-        if msg.startswith('Value error, '):
-            msg = msg.removeprefix('Value error, ')
-        raise click.ClickException(msg)
+        raise click.ClickException(validation_message(e))
     except (FileNotFoundError, ValueError, NotImplementedError, PixrError) as e:
         raise click.ClickException(str(e))
     except Exception as e:
@@ -35,6 +94,22 @@ def run_command(argument: str, options: dict):
         raise click.ClickException(f'Unexpected error: {e}')
 
 
+def global_options() -> dict:
+    """Options given to the `pixr` group itself, shared by every command."""
+    return click.get_current_context().find_object(dict) or {}
+
+
+def run_command(argument: str, options: dict):
+    options = {**global_options(), **options}
+    with cli_errors(options.get('verbose', False)):
+        from pixr.command.core import Command
+        from pixr.runner_factory import RunnerFactory
+
+        command = Command.from_cli(argument, options)
+        runner = RunnerFactory.create_runner(command)
+        runner.execute()
+
+
 @cli.command(name="anonymize", help="Remove metadata from an image.")
 @click.option("-v", "--verbose", is_flag=True, help="Enable verbose output.")
 @click.argument("file_path", type=click.Path(exists=True))
@@ -51,13 +126,21 @@ def anonymize_command(verbose: bool, file_path: str, output_path: Optional[str])
 
 @cli.command(name="rescale", help="Rescale an image by a percentage.")
 @click.option("-p", "--percentage", type=int, required=True, help="The percentage to rescale the image by.")
+@click.option(
+    "--filter",
+    "resample",
+    type=click.Choice(RESAMPLE_FILTERS, case_sensitive=False),
+    default="lanczos",
+    help="Resampling filter; 'fast' favours speed over sharpness.",
+)
 @click.option("-v", "--verbose", is_flag=True, help="Enable verbose output.")
 @click.argument("file_path", type=click.Path(exists=True))
 @click.argument("output_path", type=click.Path(), required=False)
-def rescale_command(percentage: int, verbose: bool, file_path: str, output_path: Optional[str]):
+def rescale_command(percentage: int, resample: str, verbose: bool, file_path: str, output_path: Optional[str]):
     """Rescale an image to a new size based on a percentage."""
     options = {
         "percentage": percentage,
+        "resample": resample,
         "verbose": verbose,
         "file_path": file_path,
         "output_path": output_path,
@@ -68,14 +151,44 @@ def rescale_command(percentage: int, verbose: bool, file_path: str, output_path:
 @cli.command(name="convert", help="Convert an image to a different format.")
 @click.option("-f", "--target-format", type=str, required=True, help="The target format (e.g., png, jpg, webp).")
 @click.option("-q", "--quality", type=int, default=85, help="The quality of the converted image (1-100).")
+@click.option(
+    "--effort",
+    type=click.Choice(list(ENCODER_EFFORT), case_sensitive=False),
+    default="balanced",
+    help="Encoder effort; 'fast' trades a few percent of size for much higher throughput.",
+)
+@click.option(
+    "--min-ssim",
+    type=float,
+    help="Use the lowest JPEG/WebP quality whose SSIM against the source is at least this (0-1, needs NumPy).",
+)
+@click.option(
+    "--ssim-downsample",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Score SSIM on the luma plane shrunk by this factor; faster, but blind to the finest artifacts.",
+)
 @click.option("-v", "--verbose", is_flag=True, help="Enable verbose output.")
 @click.argument("file_path", type=click.Path(exists=True))
 @click.argument("output_path", type=click.Path(), required=False)
-def convert_command(target_format: str, quality: int, verbose: bool, file_path: str, output_path: Optional[str]):
+def convert_command(
+    target_format: str,
+    quality: int,
+    effort: str,
+    min_ssim: Optional[float],
+    ssim_downsample: int,
+    verbose: bool,
+    file_path: str,
+    output_path: Optional[str],
+):
     """Convert an image from one format to another."""
     options = {
         "target_format": target_format,
         "quality": quality,
+        "effort": effort,
+        "min_ssim": min_ssim,
+        "ssim_downsample": ssim_downsample,
         "verbose": verbose,
         "file_path": file_path,
         "output_path": output_path,
@@ -83,23 +196,522 @@ def convert_command(target_format: str, quality: int, verbose: bool, file_path:
     run_command("convert", options)
 
 
-@cli.command(name="target-size", help="Resize an image to a target size.")
-@click.option("-s", "--max-size", type=str, required=True, help="The maximum file size (e.g., 500KB, 2MB).")
+@cli.command(
+    name="target-size",
+    help="Resize an image to a target size or a minimum SSIM. With --total, PATHS are files, directories "
+    "or glob patterns that share MAX_SIZE between them.",
+)
+@click.option("-s", "--max-size", type=str, help="The maximum file size (e.g., 500KB, 2MB).")
+@click.option(
+    "--min-ssim",
+    type=float,
+    help="Use the lowest JPEG/WebP quality whose SSIM against the source is at least this (0-1, needs NumPy).",
+)
+@click.option(
+    "--ssim-downsample",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Score SSIM on the luma plane shrunk by this factor; faster, but blind to the finest artifacts.",
+)
 @click.option("--wild", is_flag=True, help="Prioritize meeting the size target above all else.")
+@click.option(
+    "--probe",
+    type=click.Choice(PROBE_MODES, case_sensitive=False),
+    default="full",
+    help="Probe at full resolution, or on a small proxy confirmed at full resolution (faster on large images).",
+)
+@click.option(
+    "--downscale",
+    is_flag=True,
+    help="When the quality floor is hit, shrink JPEG/WebP images to the largest resolution that fits.",
+)
+@click.option("--total", is_flag=True, help="Treat --max-size as one budget for all inputs (JPEG and WebP).")
+@click.option(
+    "--objective",
+    type=click.Choice(BUDGET_OBJECTIVES, case_sensitive=False),
+    default="min",
+    show_default=True,
+    help="With --total, maximize the lowest quality or the average quality.",
+)
+@click.option("-o", "--output-dir", type=click.Path(file_okay=False), help="With --total, directory to write into.")
+@click.option("-j", "--jobs", type=int, default=None, help="With --total, number of threads (default: CPU count).")
 @click.option("-v", "--verbose", is_flag=True, help="Enable verbose output.")
-@click.argument("file_path", type=click.Path(exists=True))
-@click.argument("output_path", type=click.Path(), required=False)
-def target_size_command(max_size: str, wild: bool, verbose: bool, file_path: str, output_path: Optional[str]):
-    """Resize an image to meet a target file size."""
+@click.argument("paths", metavar="FILE_PATH [OUTPUT_PATH] | PATHS...", nargs=-1, required=True)
+def target_size_command(
+    max_size: Optional[str],
+    min_ssim: Optional[float],
+    ssim_downsample: int,
+    wild: bool,
+    probe: str,
+    downscale: bool,
+    total: bool,
+    objective: str,
+    output_dir: Optional[str],
+    jobs: Optional[int],
+    verbose: bool,
+    paths: tuple[str, ...],
+):
+    """Resize an image to meet a target file size, or fit several images into one total size."""
+    if max_size is None and min_ssim is None:
+        raise click.UsageError("Give a target with --max-size, --min-ssim or both.")
+    if total:
+        if max_size is None or min_ssim is not None:
+            raise click.UsageError("--total shares --max-size between files and cannot be combined with --min-ssim.")
+        if downscale:
+            raise click.UsageError("--downscale cannot be combined with --total.")
+        _target_size_total(paths, max_size, objective.lower(), wild, output_dir, jobs, verbose)
+        return
+
+    if len(paths) > 2:
+        raise click.UsageError("Expected FILE_PATH [OUTPUT_PATH]; use --total to share a size between files.")
+    if not os.path.exists(paths[0]):
+        raise click.BadParameter(f"Path '{paths[0]}' does not exist.", param_hint="'FILE_PATH'")
     options = {
         "max_size": max_size,
+        "min_ssim": min_ssim,
+        "ssim_downsample": ssim_downsample,
         "wild": wild,
+        "probe": probe,
+        "downscale": downscale,
         "verbose": verbose,
-        "file_path": file_path,
-        "output_path": output_path,
+        "file_path": paths[0],
+        "output_path": paths[1] if len(paths) == 2 else None,
     }
     run_command("target-size", options)
 
 
+def _target_size_total(
+    paths: tuple[str, ...],
+    max_size: str,
+    objective: str,
+    wild: bool,
+    output_dir: Optional[str],
+    jobs: Optional[int],
+    verbose: bool,
+):
+    with cli_errors(verbose):
+        from pixr.batch import collect_inputs
+        from pixr.budget import run_budget
+
+        if jobs is not None and jobs < 1:
+            raise ValueError(f"Number of jobs must be at least 1, got: {jobs}")
+        items = list(collect_inputs(paths))
+        if not items:
+            raise ValueError("No image files found in the given paths.")
+
+        summary = run_budget(
+            items, parse_size(max_size), objective, wild, Path(output_dir) if output_dir else None, jobs, verbose
+        )
+    click.echo(summary.format())
+
+
+@cli.command(name="pipeline", help="Chain operations over a single decode and encode.")
+@click.argument("spec")
+@click.option("-q", "--quality", type=int, default=85, help="The quality used when no target size is set (1-100).")
+@click.option(
+    "--effort",
+    type=click.Choice(list(ENCODER_EFFORT), case_sensitive=False),
+    default="balanced",
+    help="Encoder effort used when no target size is set.",
+)
+@click.option(
+    "--filter",
+    "resample",
+    type=click.Choice(RESAMPLE_FILTERS, case_sensitive=False),
+    default="lanczos",
+    help="Resampling filter used by rescale stages.",
+)
+@click.option("--wild", is_flag=True, help="Prioritize meeting the size target above all else.")
+@click.option(
+    "--probe",
+    type=click.Choice(PROBE_MODES, case_sensitive=False),
+    default="full",
+    help="Probing mode used by a target-size stage.",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Enable verbose output.")
+@click.argument("file_path", type=click.Path(exists=True))
+@click.argument("output_path", type=click.Path(), required=False)
+def pipeline_command(spec: str, file_path: str, output_path: Optional[str], **options):
+    """
+    Run SPEC, e.g. "rescale:50 | convert:webp | target-size:200KB | anonymize", on an image.
+
+    The image is decoded once, passed between the stages in memory and encoded once.
+    """
+    options.update(pipeline=spec, file_path=file_path, output_path=output_path)
+    run_command("pipeline", options)
+
+
+@cli.command(name="renditions", help="Write an image at several widths and formats from a single decode.")
+@click.argument("file_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("-w", "--widths", required=True, help="Comma-separated widths in pixels, e.g. 320,640,1280.")
+@click.option("-f", "--formats", help="Comma-separated target formats, e.g. webp,jpg (default: the source format).")
+@click.option(
+    "-o", "--output-dir", type=click.Path(file_okay=False), help="Directory to write into (default: next to the input)."
+)
+@click.option("--manifest", type=click.Path(dir_okay=False), help="Write a JSON manifest with sizes and srcsets here.")
+@click.option("-q", "--quality", type=int, default=85, help="The quality of the encoded renditions (1-100).")
+@click.option(
+    "--effort",
+    type=click.Choice(list(ENCODER_EFFORT), case_sensitive=False),
+    default="balanced",
+    help="Encoder effort preset.",
+)
+@click.option(
+    "--filter",
+    "resample",
+    type=click.Choice(RESAMPLE_FILTERS, case_sensitive=False),
+    default="lanczos",
+    help="Resampling filter used to build the size pyramid.",
+)
+@click.option("-j", "--jobs", type=int, default=None, help="Number of encoder threads (default: CPU count).")
+@click.option("-v", "--verbose", is_flag=True, help="Print every rendition.")
+def renditions_command(
+    file_path: str,
+    widths: str,
+    formats: Optional[str],
+    output_dir: Optional[str],
+    manifest: Optional[str],
+    quality: int,
+    effort: str,
+    resample: str,
+    jobs: Optional[int],
+    verbose: bool,
+):
+    """Encode FILE_PATH at every width and in every format, e.g. for a responsive srcset."""
+    with cli_errors(verbose):
+        from pixr.renditions import run_renditions
+
+        if jobs is not None and jobs < 1:
+            raise ValueError(f"Number of jobs must be at least 1, got: {jobs}")
+        if not 1 <= quality <= 100:
+            raise ValueError(f"Quality must be between 1-100, got: {quality}")
+
+        summary = run_renditions(
+            Path(file_path),
+            _csv(widths, int),
+            _csv(formats) if formats else None,
+            Path(output_dir) if output_dir else None,
+            Path(manifest) if manifest else None,
+            quality,
+            effort.lower(),
+            resample.lower(),
+            jobs,
+            verbose,
+        )
+    click.echo(summary.format())
+
+
+@cli.command(name="batch", help="Run a command over directories or glob patterns in parallel.")
+@click.argument(
+    "command_name", metavar="COMMAND", type=click.Choice(["anonymize", "rescale", "convert", "target-size"])
+)
+@click.argument("paths", nargs=-1, required=True)
+@click.option("-o", "--output-dir", type=click.Path(file_okay=False), required=True, help="Directory to mirror into.")
+@click.option("-j", "--jobs", type=int, default=None, help="Number of worker processes (default: CPU count).")
+@click.option("-r", "--recursive", is_flag=True, help="Descend into subdirectories.")
+@click.option("-p", "--percentage", type=int, help="The percentage to rescale the images by.")
+@click.option("--filter", "resample", type=str, help="Resampling filter used by rescale.")
+@click.option("-f", "--target-format", type=str, help="The target format (e.g., png, jpg, webp).")
+@click.option("-q", "--quality", type=int, default=85, help="The quality of the converted images (1-100).")
+@click.option("--effort", type=str, help="Encoder effort used by convert (fast, balanced or max).")
+@click.option("-s", "--max-size", type=str, help="The maximum file size (e.g., 500KB, 2MB).")
+@click.option("--wild", is_flag=True, help="Prioritize meeting the size target above all else.")
+@click.option("--probe", type=str, help="Probing mode used by target-size (full or proxy).")
+@click.option("--downscale", is_flag=True, help="Let target-size shrink images that miss at the quality floor.")
+@click.option("--min-ssim", type=float, help="Minimum SSIM for convert and target-size (JPEG/WebP, needs NumPy).")
+@click.option("--ssim-downsample", type=int, help="Factor the luma plane is shrunk by before scoring SSIM.")
+@click.option("-v", "--verbose", is_flag=True, help="Print the result of every file.")
+def batch_command(
+    command_name: str,
+    paths: tuple[str, ...],
+    output_dir: str,
+    jobs: Optional[int],
+    recursive: bool,
+    verbose: bool,
+    **command_options,
+):
+    """Process many images with one command, mirroring the input tree into OUTPUT_DIR."""
+    with cli_errors(verbose):
+        from pixr.batch import build_commands, collect_inputs, run_batch
+        from pixr.command.core import Command
+
+        if jobs is not None and jobs < 1:
+            raise ValueError(f"Number of jobs must be at least 1, got: {jobs}")
+
+        items = list(collect_inputs(paths, recursive=recursive))
+        if not items:
+            raise ValueError("No image files found in the given paths.")
+
+        options = {key: value for key, value in command_options.items() if value is not None}
+        options.update(global_options(), verbose=verbose, file_path=str(items[0].input_path))
+        template = Command.from_cli(command_name, options)
+        commands, collisions = build_commands(template, items, Path(output_dir))
+        summary = run_batch(commands, jobs=jobs, verbose=verbose, failed=collisions)
+
+    click.echo(summary.format())
+    if summary.failed:
+        raise click.ClickException(f"{len(summary.failed)} file(s) failed.")
+
+
+@cli.command(name="sync", help="Mirror a directory tree, processing only new or changed images.")
+@click.argument("source", type=click.Path(exists=True, file_okay=False))
+@click.argument("destination", type=click.Path(file_okay=False))
+@click.option("--op", "spec", required=True, help='Pipeline applied to every image, e.g. "rescale:50 | convert:webp".')
+@click.option("-q", "--quality", type=int, default=85, help="The quality used when no target size is set (1-100).")
+@click.option(
+    "--effort",
+    type=click.Choice(list(ENCODER_EFFORT), case_sensitive=False),
+    default="balanced",
+    help="Encoder effort preset used by convert stages.",
+)
+@click.option(
+    "--filter",
+    "resample",
+    type=click.Choice(RESAMPLE_FILTERS, case_sensitive=False),
+    default="lanczos",
+    help="Resampling filter used by rescale stages.",
+)
+@click.option("--wild", is_flag=True, help="Prioritize meeting the size target above all else.")
+@click.option(
+    "--probe",
+    type=click.Choice(PROBE_MODES, case_sensitive=False),
+    default="full",
+    help="Probing mode used by a target-size stage.",
+)
+@click.option("-j", "--jobs", type=int, default=None, help="Number of worker processes (default: CPU count).")
+@click.option("-v", "--verbose", is_flag=True, help="Print the result of every processed or removed file.")
+def sync_command(source: str, destination: str, spec: str, jobs: Optional[int], verbose: bool, **options):
+    """
+    Mirror SOURCE into DESTINATION through a pipeline, keeping a manifest in DESTINATION.
+
+    Unchanged images are skipped, outputs of deleted images are removed, and an
+    interrupted run resumes where it stopped.
+    """
+    with cli_errors(verbose):
+        from pixr.command.core import Command
+        from pixr.sync import sync
+
+        if jobs is not None and jobs < 1:
+            raise ValueError(f"Number of jobs must be at least 1, got: {jobs}")
+
+        options.update(global_options(), verbose=verbose, pipeline=spec, file_path=source)
+        template = Command.from_cli("pipeline", options)
+        summary = sync(template, Path(source), Path(destination), jobs=jobs, verbose=verbose)
+
+    click.echo(summary.format())
+    if summary.failed:
+        raise click.ClickException(f"{len(summary.failed)} file(s) failed.")
+
+
+@cli.command(name="watch", help="Process images as they land in a directory.")
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+@click.option("-o", "--output-dir", type=click.Path(file_okay=False), required=True, help="Directory to mirror into.")
+@click.option("--op", "spec", required=True, help='Pipeline applied to every image, e.g. "rescale:50 | convert:webp".')
+@click.option("-q", "--quality", type=int, default=85, help="The quality used when no target size is set (1-100).")
+@click.option(
+    "--effort",
+    type=click.Choice(list(ENCODER_EFFORT), case_sensitive=False),
+    default="balanced",
+    help="Encoder effort preset used by convert stages.",
+)
+@click.option(
+    "--filter",
+    "resample",
+    type=click.Choice(RESAMPLE_FILTERS, case_sensitive=False),
+    default="lanczos",
+    help="Resampling filter used by rescale stages.",
+)
+@click.option("--wild", is_flag=True, help="Prioritize meeting the size target above all else.")
+@click.option(
+    "--probe",
+    type=click.Choice(PROBE_MODES, case_sensitive=False),
+    default="full",
+    help="Probing mode used by a target-size stage.",
+)
+@click.option("-r", "--recursive", is_flag=True, help="Watch subdirectories too.")
+@click.option("--existing", is_flag=True, help="Also process the images already in DIRECTORY.")
+@click.option(
+    "--settle",
+    type=float,
+    default=WATCH_SETTLE,
+    show_default=True,
+    help="Seconds a file must stay unchanged before it is processed (unless its writer is seen closing it).",
+)
+@click.option(
+    "--poll",
+    type=float,
+    default=None,
+    help="Poll every N seconds instead of using inotify (the default on network filesystems).",
+)
+@click.option("-j", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count).")
+@click.option(
+    "--events", type=click.File("w"), help="Write a JSON line per queued, processed or failed file ('-' for stdout)."
+)
+@click.option("-v", "--verbose", is_flag=True, help="Print the result of every file.")
+def watch_command(
+    directory: str,
+    output_dir: str,
+    spec: str,
+    recursive: bool,
+    existing: bool,
+    settle: float,
+    poll: Optional[float],
+    workers: Optional[int],
+    events,
+    verbose: bool,
+    **options,
+):
+    """Process every image written or moved into DIRECTORY through a pipeline, mirroring it into OUTPUT_DIR."""
+    with cli_errors(verbose):
+        from pixr.command.core import Command
+        from pixr.watch import Watch
+
+        if workers is not None and workers < 1:
+            raise ValueError(f"Number of workers must be at least 1, got: {workers}")
+        if poll is not None and poll <= 0:
+            raise ValueError(f"Poll interval must be positive, got: {poll}")
+
+        options.update(global_options(), verbose=verbose, pipeline=spec, file_path=directory)
+        template = Command.from_cli("pipeline", options)
+        watch = Watch(
+            template, Path(directory), Path(output_dir), workers, recursive, existing, settle, poll, events, verbose
+        )
+
+    try:
+        watch.run()
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command(name="serve", help="Serve the commands from a warm pool of worker processes.")
+@click.option("--host", default=SERVE_HOST, show_default=True, help="Interface to listen on.")
+@click.option("--port", type=int, default=SERVE_PORT, show_default=True, help="Port to listen on.")
+@click.option("--socket", "socket_path", type=click.Path(dir_okay=False), help="Listen on a Unix socket instead.")
+@click.option("-j", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count).")
+@click.option(
+    "--queue-depth",
+    type=int,
+    default=SERVE_QUEUE_DEPTH,
+    show_default=True,
+    help="Requests allowed to wait for a worker before new ones are rejected with 503.",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Log every request.")
+def serve_command(
+    host: str, port: int, socket_path: Optional[str], workers: Optional[int], queue_depth: int, verbose: bool
+):
+    """Run a pixr daemon; point clients at it with `pixr --remote`."""
+    with cli_errors(verbose):
+        from pixr.server import PixrHTTPServer, WorkerPool, create_server
+
+        pool = WorkerPool(workers or os.cpu_count() or 1, queue_depth)
+        try:
+            server = create_server(pool, host, port, Path(socket_path) if socket_path else None, verbose)
+        except BaseException:
+            pool.shutdown()
+            raise
+
+    address = f"{host}:{server.server_port}" if isinstance(server, PixrHTTPServer) else f"unix:{socket_path}"
+    click.echo(f"pixr serving on {address} with {pool.concurrency} worker(s), queue depth {pool.queue_depth}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.shutdown()
+
+
+def _csv(value: str, convert=str) -> tuple:
+    try:
+        return tuple(convert(item.strip()) for item in value.split(",") if item.strip())
+    except ValueError:
+        raise click.BadParameter(f"Expected a comma-separated list, got: '{value}'")
+
+
+@cli.command(name="bench", help="Benchmark the runners and strategies on a synthetic corpus.")
+@click.option("--sizes", default="0.1,1,4", show_default=True, help="Comma-separated image sizes in megapixels.")
+@click.option("--kinds", default="photo,screenshot,alpha,animated", show_default=True, help="Corpus image kinds.")
+@click.option("--seed", type=int, default=0, show_default=True, help="Seed of the synthetic corpus.")
+@click.option("--repeat", type=int, default=3, show_default=True, help="Runs per case; the median is reported.")
+@click.option("-k", "--match", help="Only run cases whose name contains this text.")
+@click.option(
+    "--corpus-dir",
+    type=click.Path(file_okay=False),
+    help="Where the corpus is generated and reused (default: <cache dir>/bench).",
+)
+@click.option("-o", "--output", type=click.Path(dir_okay=False), help="Write the results as JSON.")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), help="Compare against a saved JSON report.")
+@click.option("--threshold", type=float, default=0.1, show_default=True, help="Tolerated slowdown, e.g. 0.1 for 10%.")
+@click.option("--isolate/--no-isolate", default=True, help="Run every case in a fresh process (for peak RSS).")
+def bench_command(
+    sizes: str,
+    kinds: str,
+    seed: int,
+    repeat: int,
+    match: Optional[str],
+    corpus_dir: Optional[str],
+    output: Optional[str],
+    baseline: Optional[str],
+    threshold: float,
+    isolate: bool,
+):
+    """Generate a deterministic corpus and report wall time, throughput, peak RSS and probes per case."""
+    with cli_errors(verbose=False):
+        from pixr import bench
+
+        if repeat < 1:
+            raise ValueError(f"Number of runs must be at least 1, got: {repeat}")
+        directory = Path(corpus_dir or Path(global_options().get("cache_dir") or DEFAULT_CACHE_DIR) / "bench")
+        corpus = bench.generate_corpus(directory, _csv(kinds), _csv(sizes, float), seed)
+        cases = bench.build_cases(corpus, match)
+        if not cases:
+            raise ValueError("No benchmark cases match.")
+
+        results = []
+        for result in bench.run_bench(cases, repeat, isolate):
+            click.echo(bench.format_result(result))
+            results.append(result)
+
+        if output:
+            settings = {"sizes": sizes, "kinds": kinds, "seed": seed, "repeat": repeat, "match": match}
+            bench.write_report(Path(output), results, settings)
+        regressions = bench.compare(results, bench.load_report(Path(baseline)), threshold) if baseline else []
+
+    if regressions:
+        click.echo("Regressions:")
+        for regression in regressions:
+            click.echo(f"  {regression}")
+        raise click.ClickException(f"{len(regressions)} regression(s) against {baseline}.")
+
+
+@cli.group(name="cache", help="Inspect or clear the result cache.")
+def cache_group():
+    pass
+
+
+def _open_cache() -> ResultCache:
+    options = global_options()
+    cache_dir = options.get("cache_dir") or DEFAULT_CACHE_DIR
+    with cli_errors(verbose=False):
+        return ResultCache(Path(cache_dir), parse_size(options.get("cache_max_size") or DEFAULT_MAX_SIZE))
+
+
+@cache_group.command(name="stats", help="Show the number and total size of cached results.")
+def cache_stats_command():
+    cache = _open_cache()
+    stats = cache.stats()
+    click.echo(f"Cache directory: {cache.cache_dir}")
+    click.echo(f"Entries: {stats.entries}")
+    click.echo(f"Size: {stats.total_bytes / 1024 ** 2:.1f} MB of {stats.max_bytes / 1024 ** 2:.1f} MB")
+
+
+@cache_group.command(name="clear", help="Remove every cached result.")
+def cache_clear_command():
+    cache = _open_cache()
+    removed = cache.clear()
+    click.echo(f"Removed {removed} cached result(s) from {cache.cache_dir}")
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,166 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional, cast
+
+from PIL import GifImagePlugin, Image, ImageSequence
+
+from pixr.resampling import resize
+
+DEFAULT_FRAME_DURATION = 100
+TRANSPARENT_INDEX = 255
+ALPHA_THRESHOLD = 128
+
+
+@dataclass
+class Frame:
+    """One composited frame of an animation, together with its timing."""
+
+    image: Image.Image
+    duration: int
+    disposal: int
+
+
+def iter_frames(img: Image.Image) -> Iterator[Frame]:
+    """
+    Yield the frames of an animation one at a time.
+
+    Frames are decoded lazily, so only the current frame is held in memory. They come in
+    the modes the decoder produces (a GIF's first frame in P or L, later ones in RGB or
+    RGBA), so callers convert each frame to the mode they need. Animated WebP frames come
+    out composited onto the canvas, with the source's blending and disposal already applied.
+    """
+    for frame in ImageSequence.Iterator(img):
+        # The WebP decoder only fills in a frame's duration once the frame is loaded
+        frame.load()
+        yield Frame(
+            image=frame,
+            duration=frame.info.get("duration", DEFAULT_FRAME_DURATION),
+            disposal=getattr(frame, "disposal_method", 0),
+        )
+
+
+def resize_frame(
+    frame: Image.Image, size: tuple[int, int], resample: str = 'lanczos'
+) -> tuple[Image.Image, Optional[int]]:
+    """
+    Resize a frame to a palette image that a GIF can store, returning it with its transparent index.
+
+    Opaque P-mode frames are filtered in RGB and mapped back onto their own palette, so
+    they never go through RGBA or a fresh quantization; with the 'nearest' filter the
+    palette indices are resized directly. Everything else is resized in RGBA and quantized.
+    """
+    if frame.mode == "P":
+        transparency = frame.info.get("transparency")
+        if resample == 'nearest':
+            return resize(frame, size, resample), transparency
+        if transparency is None:
+            resized = resize(frame.convert("RGB"), size, resample)
+            return resized.quantize(palette=frame, dither=Image.Dither.NONE), None
+
+    if frame.mode == "L":
+        return resize(frame, size, resample), None
+
+    return to_palette(resize(frame.convert("RGBA"), size, resample))
+
+
+def to_palette(img: Image.Image) -> tuple[Image.Image, Optional[int]]:
+    """Quantize an RGBA image to at most 256 colours, reserving one index for transparent pixels."""
+    alpha = img.getchannel("A")
+    low, _ = cast(tuple[int, int], alpha.getextrema())
+    if low >= ALPHA_THRESHOLD:
+        return img.convert("RGB").quantize(256), None
+
+    paletted = img.convert("RGB").quantize(TRANSPARENT_INDEX)
+    paletted.paste(TRANSPARENT_INDEX, mask=alpha.point(lambda a: 255 if a < ALPHA_THRESHOLD else 0))
+    return paletted, TRANSPARENT_INDEX
+
+
+def decoded_frames(img: Image.Image) -> list[Frame]:
+    """Every frame of an animation as its own RGBA image, for encoders that need all frames at once."""
+    return [Frame(frame.image.convert("RGBA"), frame.duration, frame.disposal) for frame in iter_frames(img)]
+
+
+def resize_frames(
+    img: Image.Image, size: tuple[int, int], resample: str = 'lanczos', jobs: Optional[int] = None
+) -> list[Frame]:
+    """
+    Resize every frame of an animation to RGBA on a thread pool of `jobs` workers.
+
+    Frames are decoded in order (each one depends on the last) and handed to the pool as
+    they come, so resizing overlaps with decoding; Pillow releases the GIL while resampling.
+    """
+    with ThreadPoolExecutor(jobs) as pool:
+        pending = [
+            (pool.submit(resize, frame.image.convert("RGBA"), size, resample), frame) for frame in iter_frames(img)
+        ]
+        return [Frame(future.result(), frame.duration, frame.disposal) for future, frame in pending]
+
+
+def webp_animation_params(img: Image.Image) -> dict:
+    """The loop count and background colour of an animation, in the form the WebP encoder takes them."""
+    params = {"loop": img.info.get("loop", 0)}
+    # GIFs store the background as a palette index, which means nothing to RGBA frames
+    if isinstance(img.info.get("background"), tuple):
+        params["background"] = img.info["background"]
+    return params
+
+
+def write_webp_animation(fp: BinaryIO, frames: list[Frame], **params) -> None:
+    """
+    Encode frames as an animated WebP, keeping each frame's duration.
+
+    The frames are full composited canvases; libwebp picks the blend and dispose mode of
+    every frame itself, so the animation plays back exactly as the frames show it.
+    """
+    frames[0].image.save(
+        fp,
+        format="WEBP",
+        save_all=True,
+        append_images=[frame.image for frame in frames[1:]],
+        duration=[frame.duration for frame in frames],
+        **params,
+    )
+
+
+class GifStreamWriter:
+    """
+    Write an animated GIF frame by frame.
+
+    Pillow's `save_all` keeps every frame in memory until the file is written; this writer
+    encodes each frame as soon as it is added, so memory stays bounded by a single frame.
+    The first frame's palette becomes the global colour table and later frames carry their own.
+    """
+
+    def __init__(self, fp: BinaryIO, loop: Optional[int] = None, background: int = 0):
+        self.fp = fp
+        self.loop = loop
+        self.background = background
+        self.frames = 0
+
+    def add_frame(
+        self,
+        image: Image.Image,
+        duration: int,
+        disposal: int,
+        transparency: Optional[int] = None,
+        offset: tuple[int, int] = (0, 0),
+    ) -> None:
+        """Append a frame; later frames may cover only part of the canvas, placed at `offset`."""
+        params = {"duration": duration, "disposal": disposal}
+        if transparency is not None:
+            params["transparency"] = transparency
+
+        if self.frames == 0:
+            info = {"background": self.background, **params}
+            if self.loop is not None:
+                info["loop"] = self.loop
+            header, _ = GifImagePlugin.getheader(image, info=info)
+            self.fp.writelines(header)
+        else:
+            params["include_color_table"] = True
+
+        self.fp.writelines(GifImagePlugin.getdata(image, offset, **params))
+        self.frames += 1
+
+    def close(self) -> None:
+        self.fp.write(b";")
@@ -1,37 +1,187 @@
-from pathlib import Path
+import struct
+from typing import BinaryIO, Callable, Optional
+
 from PIL import Image
 
+CHUNK_SIZE = 64 * 1024
 
-def purify_image(input_path: Path, output_path: Path) -> bool:
-    """
-    Removes all metadata from an image by saving its pixels to a new file.
+# JPEG segments that carry metadata: APP1-APP13 (EXIF, XMP, ICC, IPTC, ...), APP15 and COM.
+# APP0 (JFIF) and APP14 (Adobe) are kept because decoders need them to interpret the pixels.
+JPEG_METADATA_MARKERS: set[int] = set(range(0xE1, 0xEE)) | {0xEF, 0xFE}
+JPEG_STANDALONE_MARKERS: set[int] = {0x01} | set(range(0xD0, 0xD8))
+JPEG_SOS = 0xDA
+JPEG_EOI = 0xD9
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_METADATA_CHUNKS: set[bytes] = {b"tEXt", b"iTXt", b"zTXt", b"eXIf", b"tIME"}
+
+WEBP_METADATA_CHUNKS: set[bytes] = {b"EXIF", b"XMP "}
+WEBP_VP8X_METADATA_FLAGS = 0x08 | 0x04  # EXIF and XMP presence bits
+
+
+def _read_exact(src: BinaryIO, size: int) -> bytes:
+    data = src.read(size)
+    if len(data) != size:
+        raise ValueError("Unexpected end of file")
+    return data
+
+
+def _copy(src: BinaryIO, dst: Optional[BinaryIO], size: int) -> None:
+    """Copy (or skip, when dst is None) exactly `size` bytes in bounded chunks."""
+    while size > 0:
+        data = _read_exact(src, min(size, CHUNK_SIZE))
+        if dst is not None:
+            dst.write(data)
+        size -= len(data)
+
+
+def _copy_entropy_data(src: BinaryIO, dst: BinaryIO) -> None:
+    """Copy everything after the first SOS up to and including EOI, dropping trailing data."""
+    eoi = bytes([0xFF, JPEG_EOI])
+    pending = b""
+    while True:
+        data = src.read(CHUNK_SIZE)
+        if not data:
+            dst.write(pending)
+            return
+        data = pending + data
+        end = data.find(eoi)
+        if end != -1:
+            dst.write(data[: end + 2])
+            return
+        # Hold back the last byte in case a marker is split across reads.
+        dst.write(data[:-1])
+        pending = data[-1:]
+
+
+def strip_jpeg_metadata(src: BinaryIO, dst: BinaryIO) -> None:
+    """Rewrite a JPEG stream without its metadata segments, leaving the scan data untouched."""
+    if _read_exact(src, 2) != b"\xff\xd8":
+        raise ValueError("Not a JPEG file")
+    dst.write(b"\xff\xd8")
+
+    while True:
+        if _read_exact(src, 1) != b"\xff":
+            raise ValueError("Corrupt JPEG marker")
+        marker = _read_exact(src, 1)[0]
+        while marker == 0xFF:  # fill bytes
+            marker = _read_exact(src, 1)[0]
+
+        if marker in JPEG_STANDALONE_MARKERS:
+            dst.write(bytes([0xFF, marker]))
+            continue
+        if marker == JPEG_EOI:
+            dst.write(bytes([0xFF, marker]))
+            return
+
+        length_bytes = _read_exact(src, 2)
+        length = struct.unpack(">H", length_bytes)[0]
+        if length < 2:
+            raise ValueError("Corrupt JPEG segment length")
+
+        if marker in JPEG_METADATA_MARKERS:
+            _copy(src, None, length - 2)
+            continue
+
+        dst.write(bytes([0xFF, marker]) + length_bytes)
+        _copy(src, dst, length - 2)
+
+        if marker == JPEG_SOS:
+            _copy_entropy_data(src, dst)
+            return
 
-    Args:
-        input_path: Path to the source image.
-        output_path: Path to save the purified image.
 
-    Returns:
-        True if purification was successful, False otherwise.
+def strip_png_metadata(src: BinaryIO, dst: BinaryIO) -> None:
+    """Rewrite a PNG stream without its textual and timestamp chunks."""
+    if _read_exact(src, 8) != PNG_SIGNATURE:
+        raise ValueError("Not a PNG file")
+    dst.write(PNG_SIGNATURE)
+
+    while True:
+        header = _read_exact(src, 8)
+        length, chunk_type = struct.unpack(">I4s", header)
+
+        if chunk_type in PNG_METADATA_CHUNKS:
+            _copy(src, None, length + 4)
+        else:
+            dst.write(header)
+            _copy(src, dst, length + 4)
+
+        if chunk_type == b"IEND":
+            return
+
+
+def strip_webp_metadata(src: BinaryIO, dst: BinaryIO) -> None:
     """
-    if not input_path.is_file():
-        print(f"Input file not found: {input_path}")
-        return False
+    Rewrite a WebP (RIFF) stream without its EXIF and XMP chunks.
 
-    try:
-        with Image.open(input_path) as img:
-            # Create a new image with the same mode and size, filled with the pixel data.
-            # This effectively strips all metadata (like EXIF, XMP, etc.).
-            purified_img = Image.new(img.mode, img.size)
-            purified_img.putdata(list(img.getdata()))
+    The RIFF header stores the total size up front, so the chunk table is scanned
+    first and the kept chunks are copied in a second pass. `src` must be seekable.
+    """
+    riff, _, form = struct.unpack("<4sI4s", _read_exact(src, 12))
+    if riff != b"RIFF" or form != b"WEBP":
+        raise ValueError("Not a WebP file")
+
+    chunks = []
+    while True:
+        header = src.read(8)
+        if len(header) < 8:
+            break
+        fourcc, size = struct.unpack("<4sI", header)
+        padded_size = size + (size & 1)
+        chunks.append((fourcc, src.tell(), size, padded_size))
+        src.seek(padded_size, 1)
 
-            # Save the new image, ensuring no metadata is carried over.
-            purified_img.save(output_path, format=img.format)
+    kept = [chunk for chunk in chunks if chunk[0] not in WEBP_METADATA_CHUNKS]
+    riff_size = 4 + sum(8 + padded_size for _, _, _, padded_size in kept)
+    dst.write(struct.pack("<4sI4s", b"RIFF", riff_size, b"WEBP"))
 
-            return True
+    for fourcc, offset, size, padded_size in kept:
+        src.seek(offset)
+        dst.write(struct.pack("<4sI", fourcc, size))
+        if fourcc == b"VP8X":
+            flags = _read_exact(src, 1)[0] & ~WEBP_VP8X_METADATA_FLAGS
+            dst.write(bytes([flags]))
+            _copy(src, dst, padded_size - 1)
+        else:
+            _copy(src, dst, padded_size)
 
-    except (IOError, OSError) as e:
-        print(f"Could not process file {input_path}. It might not be a valid image. Error: {e}")
+
+def detect_container_stripper(header: bytes) -> Optional[Callable[[BinaryIO, BinaryIO], None]]:
+    """Return the container-level stripper matching a file's leading bytes, if any."""
+    if header.startswith(b"\xff\xd8"):
+        return strip_jpeg_metadata
+    if header.startswith(PNG_SIGNATURE):
+        return strip_png_metadata
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return strip_webp_metadata
+    return None
+
+
+def strip_metadata(src: BinaryIO, dst: BinaryIO) -> bool:
+    """
+    Strip metadata at the container level, without decoding pixels.
+
+    Returns False if the fast path does not apply to this stream; `dst` may then hold
+    a partial copy. `src` must be seekable and is left wherever the stripper stopped.
+    """
+    start = src.tell()
+    stripper = detect_container_stripper(src.read(12))
+    src.seek(start)
+    if stripper is None:
         return False
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+    try:
+        stripper(src, dst)
+    except (ValueError, struct.error):
         return False
+    return True
+
+
+def strip_pixels(img: Image.Image) -> Image.Image:
+    """A copy of the decoded pixels alone, without EXIF, XMP or any other metadata."""
+    purified_img = Image.new(img.mode, img.size)
+    purified_img.putdata(list(img.getdata()))
+    palette = img.getpalette() if img.mode == "P" else None
+    if palette is not None:
+        purified_img.putpalette(palette)
+    return purified_img
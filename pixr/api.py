@@ -0,0 +1,705 @@
+"""
+In-process API for pixr's operations.
+
+Every function accepts encoded image bytes, a binary file object or an already opened
+`PIL.Image.Image`, and returns a `Result` holding the encoded output in memory together
+with its dimensions, the parameters that were chosen and per-stage timings. Nothing is
+read from or written to the filesystem; the CLI runners are thin wrappers around these.
+"""
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Iterator, Optional, Union, cast
+
+from PIL import Image
+
+from pixr import stats
+from pixr.anonymize import strip_metadata, strip_pixels
+from pixr.buffers import BytesLike, new_buffer
+from pixr.command.exceptions import PercentageRangeError
+from pixr.formats import BUDGET_OBJECTIVES, ENCODER_EFFORT, SUPPORTED_FORMATS, TARGET_SIZE_FORMATS
+from pixr.pipeline import Stage, parse_pipeline
+from pixr.resampling import RESAMPLE_PRESETS, resize, shrink_on_load
+from pixr.utils import parse_size
+
+if TYPE_CHECKING:
+    from pixr.budget import SizeCurve
+    from pixr.strategies import BaseOptimizationStrategy
+
+ImageInput = Union[bytes, bytearray, memoryview, BinaryIO, Image.Image]
+
+# Quality steps the full-effort encode may move above a minimum-SSIM search's fast-probe answer
+SSIM_FINAL_STEPS = 2
+
+# Animations rescale frame by frame only in these formats; other multi-frame images,
+# such as MPO or multi-page TIFF, are rescaled as their primary frame
+ANIMATED_FORMATS: tuple[str, ...] = ('GIF', 'WEBP')
+
+# Metadata carried into a pipeline's final encode unless an anonymize stage drops it
+PRESERVED_METADATA: tuple[str, ...] = ('exif', 'icc_profile')
+
+
+@dataclass
+class Result:
+    """
+    The encoded output of an operation; `data` is None when a size target cannot be met.
+
+    `data` is bytes-like: encodings are handed over as a memoryview of the buffer they were
+    written to rather than copied out of it. Pickling (e.g. to return a result from a
+    worker process) makes the one copy that cannot be avoided.
+    """
+
+    data: Optional[BytesLike]
+    format: str
+    width: int
+    height: int
+    params: dict = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.data) if self.data else 0
+
+    def __getstate__(self) -> dict:
+        data = bytes(self.data) if isinstance(self.data, memoryview) else self.data
+        return {**self.__dict__, "data": data}
+
+
+class _Timer:
+    """Accumulates wall time per stage name, reporting each stage to the stats hooks."""
+
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def __call__(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[stage] = self.timings.get(stage, 0.0) + elapsed
+            stats.emit("stage", stage=stage, seconds=elapsed)
+
+
+@contextmanager
+def _opened(image: ImageInput, timer: _Timer) -> Iterator[Image.Image]:
+    """Open encoded input lazily; images passed in are used as-is and left open."""
+    if isinstance(image, Image.Image):
+        yield image
+        return
+
+    with timer("open"):
+        img = Image.open(_as_stream(image))
+    with img:
+        yield img
+
+
+def _as_stream(image: Union[bytes, bytearray, memoryview, BinaryIO]) -> BinaryIO:
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return BytesIO(image)
+    return image
+
+
+def _encode(img: Image.Image, format: str, **save_kwargs) -> memoryview:
+    buffer = new_buffer()
+    img.save(cast(BinaryIO, buffer), format=format, **save_kwargs)
+    return buffer.view()
+
+
+def scaled_size(size: tuple[int, int], percentage: int) -> tuple[int, int]:
+    """The dimensions of `size` scaled by a percentage."""
+    if not 0 < percentage <= 100:
+        raise PercentageRangeError(percentage)
+    scale = percentage / 100.0
+    return int(size[0] * scale), int(size[1] * scale)
+
+
+def build_save_kwargs(target_format: str, quality: int, effort: str, source_format: str) -> dict:
+    """Encoder options for a target format, quality and effort preset."""
+    pil_format = SUPPORTED_FORMATS[target_format]
+    save_kwargs = dict(ENCODER_EFFORT[effort].get(pil_format, {}))
+
+    if pil_format in ('JPEG', 'WEBP'):
+        save_kwargs['quality'] = quality
+
+    if pil_format == 'WEBP' and source_format in ['jpeg', 'jpg']:
+        if quality >= 90:
+            save_kwargs['lossless'] = True
+        else:
+            save_kwargs['quality'] = min(quality - 5, 80)
+
+    return save_kwargs
+
+
+def prepare_for_format(img: Image.Image, target_format: str) -> Image.Image:
+    """Flatten transparency onto white for formats that cannot store it."""
+    if target_format in ['jpeg', 'jpg'] and img.mode == 'P':
+        img = img.convert('RGBA' if img.has_transparency_data else 'RGB')
+    if target_format in ['jpeg', 'jpg'] and img.mode in ['RGBA', 'LA']:
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'RGBA':
+            background.paste(img, mask=img.split()[-1])  # Use alpha channel as mask
+        else:
+            background.paste(img)
+        return background
+    return img
+
+
+def _check_resample(resample: str) -> None:
+    if resample not in RESAMPLE_PRESETS:
+        raise ValueError(f"Unsupported resampling filter '{resample}'. Supported: {', '.join(RESAMPLE_PRESETS)}")
+
+
+def _check_target_format(target_format: str) -> str:
+    if target_format.lower() not in SUPPORTED_FORMATS:
+        raise ValueError(
+            f"Unsupported target format '{target_format}'. Supported: {', '.join(SUPPORTED_FORMATS.keys())}"
+        )
+    return target_format.lower()
+
+
+def source_format(img: Image.Image) -> str:
+    """The format name an image is re-encoded as when no target format is given: its own, or PNG."""
+    format = (img.format or '').lower()
+    return format if format in SUPPORTED_FORMATS else 'png'
+
+
+def _write_gif(img: Image.Image, fp: BinaryIO, size: tuple[int, int], resample: str) -> None:
+    """Resize and write one frame at a time, keeping each frame's duration and disposal."""
+    from pixr.animation import GifStreamWriter, iter_frames, resize_frame
+
+    writer = GifStreamWriter(fp, loop=img.info.get("loop"), background=img.info.get("background", 0))
+    for frame in iter_frames(img):
+        resized, transparency = resize_frame(frame.image, size, resample)
+        writer.add_frame(resized, frame.duration, frame.disposal, transparency)
+    writer.close()
+
+
+def _write_animation(img: Image.Image, fp: BinaryIO, size: tuple[int, int], resample: str) -> None:
+    """Resize all frames in parallel, then encode them as an animated WebP keeping timing and loop count."""
+    from pixr.animation import resize_frames, webp_animation_params, write_webp_animation
+
+    frames = resize_frames(img, size, resample)
+    write_webp_animation(fp, frames, **webp_animation_params(img))
+
+
+def rescale(image: ImageInput, percentage: int, resample: str = 'lanczos', format: Optional[str] = None) -> Result:
+    """
+    Rescale an image by a percentage, encoding it as `format` (the source format by default).
+
+    Animated GIFs are streamed frame by frame and always stay GIFs; animated WebPs have their
+    frames resized in parallel and keep their timing and loop count. Other multi-frame images,
+    and animations encoded to a still format, are rescaled as their primary frame.
+    """
+    _check_resample(resample)
+    timer = _Timer()
+
+    with _opened(image, timer) as img:
+        size = scaled_size(img.size, percentage)
+        format = (format or img.format or 'PNG').upper()
+        params = {"percentage": percentage, "resample": resample, "original_size": img.size}
+
+        animated = getattr(img, "is_animated", False) and img.format in ANIMATED_FORMATS
+        if animated and img.format == "GIF":
+            format = "GIF"
+        if animated and format in ANIMATED_FORMATS:
+            buffer = new_buffer()
+            with timer("transform"):
+                if format == "GIF":
+                    _write_gif(img, cast(BinaryIO, buffer), size, resample)
+                else:
+                    _write_animation(img, cast(BinaryIO, buffer), size, resample)
+            params["frames"] = getattr(img, "n_frames", 1)
+            return Result(buffer.view(), format, *size, params=params, timings=timer.timings)
+
+        shrink_on_load(img, size, resample)
+        with timer("decode"):
+            img.load()
+        with timer("transform"):
+            resized = resize(img, size, resample)
+        with timer("encode"):
+            data = _encode(resized, format)
+
+    return Result(data, format, *size, params=params, timings=timer.timings)
+
+
+def convert(
+    image: ImageInput,
+    target_format: str,
+    quality: int = 85,
+    effort: str = 'balanced',
+    min_ssim: Optional[float] = None,
+    ssim_downsample: int = 1,
+) -> Result:
+    """
+    Convert an image to `target_format` (a CLI format name such as 'webp' or 'jpg').
+
+    With `min_ssim`, a JPEG or WebP target is encoded at the lowest quality whose SSIM
+    against the source reaches it instead of at `quality` (see `target_size`).
+    """
+    target_format = _check_target_format(target_format)
+    if effort not in ENCODER_EFFORT:
+        raise ValueError(f"Unsupported effort preset '{effort}'. Supported: {', '.join(ENCODER_EFFORT)}")
+    pil_format = SUPPORTED_FORMATS[target_format]
+    if min_ssim is not None:
+        _check_min_ssim(min_ssim, ssim_downsample, pil_format)
+    timer = _Timer()
+
+    try:
+        with _opened(image, timer) as img:
+            source_format = img.format.lower() if img.format else 'unknown'
+            with timer("decode"):
+                img.load()
+            with timer("transform"):
+                prepared = prepare_for_format(img, target_format)
+            if min_ssim is not None:
+                with timer("search"):
+                    result = _ssim_search(_strategy(prepared, 0, False, 'full', pil_format), min_ssim, ssim_downsample)
+                return _strategy_result(prepared, result, None, pil_format, timer)
+            save_kwargs = build_save_kwargs(target_format, quality, effort, source_format)
+            with timer("encode"):
+                data = _encode(prepared, pil_format, **save_kwargs)
+    except Exception as e:
+        raise RuntimeError(f"Failed to convert image: {e}")
+
+    return Result(data, pil_format, *prepared.size, params=save_kwargs, timings=timer.timings)
+
+
+def _strategy(
+    img: Image.Image, target_bytes: int, wild: bool, probe: str, format: str, metadata: Optional[dict] = None
+) -> "BaseOptimizationStrategy":
+    # Strategies are only needed by target-size, so they are imported on first use
+    from pixr.strategies.factory import StrategyFactory
+
+    return StrategyFactory.get_strategy(img, target_bytes, wild, probe, format=format, metadata=metadata)
+
+
+def _search(
+    img: Image.Image, target_bytes: int, wild: bool, probe: str, format: str, metadata: Optional[dict] = None
+) -> dict:
+    return _strategy(img, target_bytes, wild, probe, format, metadata).optimize()
+
+
+def _check_min_ssim(min_ssim: float, downsample: int, format: str, animated: bool = False) -> None:
+    from pixr.ssim import require_numpy
+
+    if not 0 < min_ssim <= 1:
+        raise ValueError(f"A minimum SSIM must be greater than 0 and at most 1, got: {min_ssim}")
+    if downsample < 1:
+        raise ValueError(f"The SSIM downsampling factor must be at least 1, got: {downsample}")
+    if format not in ('JPEG', 'WEBP') or animated:
+        raise ValueError(f"A minimum SSIM is only supported for JPEG and WebP stills, got: {format}")
+    require_numpy()
+
+
+def _ssim_search(strategy: "BaseOptimizationStrategy", min_ssim: float, downsample: int) -> dict:
+    """
+    Search for the lowest quality whose encoding has an SSIM of at least `min_ssim` against the image.
+
+    Every probe is encoded and scored against luma sums of the source computed once up
+    front. Strategies with fast probes (WebP) search with them, then encode the chosen
+    quality at full effort and score it again, stepping the quality up a little if the
+    full-effort encoding falls short. If not even the highest quality reaches `min_ssim`,
+    that encoding is kept and `ssim_not_met` is set.
+    """
+    from pixr.ssim import SsimReference
+    from pixr.strategies.perceptual import threshold_search
+
+    reference = SsimReference(strategy.prepared, downsample)
+    low, high = strategy.quality_range()
+    encoded: dict[int, memoryview] = {}
+
+    def measure(quality: int, final: bool = not strategy.fast_probes) -> float:
+        start = time.perf_counter()
+        encoded[quality] = strategy.encode(quality, final)
+        score = reference.score(encoded[quality])
+        params = {"quality": quality, "ssim": round(score, 4), **({} if final else {"fast": True})}
+        stats.emit("probe", params=params, size=len(encoded[quality]), seconds=time.perf_counter() - start)
+        return score
+
+    search = threshold_search(measure, min_ssim, low, high)
+    best = search.best or max(search.probes, key=lambda probe: probe.quality)
+    quality, score, probes = best.quality, best.score, len(search.probes)
+    if strategy.fast_probes:
+        for quality in range(quality, min(quality + SSIM_FINAL_STEPS, high) + 1):
+            score = measure(quality, final=True)
+            probes += 1
+            if score >= min_ssim:
+                break
+
+    data = encoded[quality]
+    return {
+        "best_result_data": data,
+        "best_params": {"quality": quality, "ssim": round(score, 4), "min_ssim": min_ssim},
+        "smallest_size": len(data),
+        "quality_floor_hit": False,
+        "probes": probes,
+        "ssim_not_met": score < min_ssim,
+    }
+
+
+def _downscale(strategy: "BaseOptimizationStrategy", result: dict, resample: str) -> tuple[Image.Image, dict]:
+    """
+    Find the largest scale whose encoding at the quality floor fits, then search quality there.
+
+    Only a few encodes at the floor quality are spent on the scale itself, and the quality
+    search runs once more, at the chosen scale. If not even the smallest scale fits, the
+    full-resolution result is kept.
+    """
+    from pixr.strategies.resolution import scale_search
+
+    source = strategy.img
+    floor_quality, _ = strategy.quality_range()
+    scaled: dict[float, Image.Image] = {}
+
+    def measure(scale: float) -> int:
+        start = time.perf_counter()
+        size = (max(1, round(source.width * scale)), max(1, round(source.height * scale)))
+        scaled[scale] = resize(source, size, resample)
+        encoded = strategy.with_image(scaled[scale]).probe_size(floor_quality)
+        params = {"quality": floor_quality, "scale": round(scale, 3)}
+        stats.emit("probe", params=params, size=encoded, seconds=time.perf_counter() - start)
+        return encoded
+
+    search = scale_search(measure, strategy.target_bytes, result["smallest_size"])
+    if search.best is None:
+        return source, {**result, "probes": result["probes"] + len(search.probes)}
+
+    img = scaled[search.best.scale]
+    downscaled = strategy.with_image(img).optimize()
+    downscaled["probes"] += result["probes"] + len(search.probes)
+    downscaled["best_params"] = {
+        **downscaled["best_params"],
+        "scale": round(search.best.scale, 3),
+        "original_size": source.size,
+    }
+    return img, downscaled
+
+
+def _strategy_result(img: Image.Image, result: dict, target_bytes: Optional[int], format: str, timer: _Timer) -> Result:
+    params = {
+        **result["best_params"],
+        "target_bytes": target_bytes,
+        "smallest_size": result.get("smallest_size"),
+        "quality_floor_hit": result.get("quality_floor_hit", False),
+        "probes": result.get("probes", 0),
+    }
+    for key in ("proxy_probes", "ssim_not_met"):
+        if key in result:
+            params[key] = result[key]
+    return Result(result["best_result_data"], format, img.width, img.height, params=params, timings=timer.timings)
+
+
+def target_size(
+    image: ImageInput,
+    max_size: Optional[Union[int, str]] = None,
+    wild: bool = False,
+    probe: str = 'full',
+    format: Optional[str] = None,
+    downscale: bool = False,
+    resample: str = 'lanczos',
+    min_ssim: Optional[float] = None,
+    ssim_downsample: int = 1,
+) -> Result:
+    """
+    Search compression settings so the encoded image fits in `max_size` (bytes, or e.g. '200KB').
+
+    The output format defaults to the source format. When even the smallest encoding at the
+    quality floor is too large, the result still holds it, and `params['quality_floor_hit']`
+    is set; `data` is None only when nothing could be encoded at all. With `downscale`, a
+    JPEG or WebP that misses at the floor is instead shrunk to the largest resolution that
+    fits, recorded in `params['scale']`.
+
+    With `min_ssim`, a JPEG or WebP still is instead encoded at the lowest quality whose
+    SSIM against the source is at least `min_ssim`, scored on the luma plane reduced by
+    `ssim_downsample`; this needs NumPy. `params['ssim']` holds the score reached, and
+    `params['ssim_not_met']` is set if even the highest quality falls short. Given as well,
+    `max_size` caps the result: if the encoding that meets `min_ssim` is larger, the size
+    search runs instead and `ssim_not_met` is set.
+    """
+    if max_size is None and min_ssim is None:
+        raise ValueError("A target size needs a maximum size, a minimum SSIM or both.")
+    target_bytes = parse_size(max_size) if isinstance(max_size, str) else max_size
+    timer = _Timer()
+
+    with _opened(image, timer) as img:
+        format = (format or img.format or '').upper()
+        if format not in TARGET_SIZE_FORMATS:
+            raise ValueError(
+                f"Input file format '{format or img.format}' is not supported for target-size. "
+                f"Supported formats are: {', '.join(sorted(TARGET_SIZE_FORMATS))}."
+            )
+        animated = getattr(img, "is_animated", False)
+        if animated and format not in ('GIF', 'WEBP'):
+            raise NotImplementedError("Target size for animated images is only supported for GIF and WebP.")
+        if downscale and (format not in ('JPEG', 'WEBP') or animated):
+            raise ValueError(f"Downscaling to a target size is only supported for JPEG and WebP stills, got: {format}")
+        if min_ssim is not None:
+            _check_min_ssim(min_ssim, ssim_downsample, format, animated)
+        _check_resample(resample)
+
+        with timer("decode"):
+            img.load()
+        with timer("search"):
+            strategy = _strategy(img, target_bytes or 0, wild, probe, format)
+            result = _ssim_search(strategy, min_ssim, ssim_downsample) if min_ssim is not None else None
+            if result is None or (target_bytes is not None and result["smallest_size"] > target_bytes):
+                searched = strategy.optimize()
+                if result is not None:
+                    searched.update(probes=searched["probes"] + result["probes"], ssim_not_met=True)
+                result = searched
+        if downscale and result.get("quality_floor_hit"):
+            with timer("downscale"):
+                img, result = _downscale(strategy, result, resample)
+
+        return _strategy_result(img, result, target_bytes, format, timer)
+
+
+def _size_curve(strategy: "BaseOptimizationStrategy", timer: _Timer) -> "SizeCurve":
+    from pixr.budget import SizeCurve, curve_qualities
+
+    with timer("decode"):
+        strategy.img.load()
+    qualities = curve_qualities(*strategy.quality_range())
+    with timer("curve"):
+        sizes = []
+        for quality in qualities:
+            start = time.perf_counter()
+            sizes.append(strategy.probe_size(quality))
+            params = {"quality": quality, "curve": True}
+            stats.emit("probe", params=params, size=sizes[-1], seconds=time.perf_counter() - start)
+    return SizeCurve(qualities, sizes)
+
+
+def target_size_budget(
+    images: list[ImageInput],
+    max_size: Union[int, str],
+    objective: str = 'min',
+    wild: bool = False,
+    jobs: Optional[int] = None,
+) -> list[Result]:
+    """
+    Fit several JPEG or WebP images into `max_size` bytes in total, returning one result per image.
+
+    The size curve of every image is sampled in parallel and the budget is shared out to
+    maximize the lowest quality (`objective='min'`) or the average one (`'mean'`); each
+    image is then searched against its own share, recorded in `params['share_bytes']`.
+    """
+    from pixr.budget import allocate
+    from pixr.strategies.factory import StrategyFactory
+
+    if objective not in BUDGET_OBJECTIVES:
+        raise ValueError(f"Unknown budget objective '{objective}'. Supported: {', '.join(BUDGET_OBJECTIVES)}")
+    budget = parse_size(max_size) if isinstance(max_size, str) else max_size
+    timers = [_Timer() for _ in images]
+
+    with ExitStack() as stack, ThreadPoolExecutor(max_workers=jobs) as pool:
+        imgs = [stack.enter_context(_opened(image, timer)) for image, timer in zip(images, timers)]
+        for img in imgs:
+            if img.format not in ('JPEG', 'WEBP') or getattr(img, "is_animated", False):
+                raise ValueError(f"A shared budget only supports still JPEG and WebP images, got: {img.format}")
+
+        strategies = [StrategyFactory.get_strategy(img, budget, wild) for img in imgs]
+        curves = list(pool.map(_size_curve, strategies, timers))
+        shares = allocate(curves, budget, objective)
+
+        def search(img: Image.Image, share: int, timer: _Timer) -> Result:
+            assert img.format is not None  # checked to be JPEG or WebP above
+            with timer("search"):
+                result = StrategyFactory.get_strategy(img, share, wild).optimize()
+            searched = _strategy_result(img, result, share, img.format, timer)
+            searched.params.update(share_bytes=share, budget_bytes=budget, objective=objective)
+            return searched
+
+        return list(pool.map(search, imgs, shares, timers))
+
+
+def _pyramid_source(levels: list[Image.Image], width: int, resample: str) -> Image.Image:
+    """The smallest level still at least the preset's reducing gap times wider than `width`."""
+    _, reducing_gap = RESAMPLE_PRESETS[resample]
+    needed = width * (reducing_gap or 1.0)
+    candidates = [level for level in levels[1:] if level.width >= needed]
+    return min(candidates, key=lambda level: level.width) if candidates else levels[0]
+
+
+def renditions(
+    image: ImageInput,
+    widths: Iterable[int],
+    formats: Optional[Iterable[str]] = None,
+    quality: int = 85,
+    effort: str = 'balanced',
+    resample: str = 'lanczos',
+    jobs: Optional[int] = None,
+) -> list[Result]:
+    """
+    Encode an image at several widths and in several formats (CLI names, the source format by default).
+
+    The input is decoded once, at the largest width's draft size for JPEG. Each width is
+    resized from the smallest rendition already made that is still at least the preset's
+    reducing gap wider, falling back to the decoded image, so most of the pyramid is built
+    from small images. Every width × format is encoded on a thread pool while the next width
+    is being resized. Widths above the image's width are skipped rather than upscaled.
+    Results come widest first, in the order of `formats` within a width, with
+    `params['width']` and `params['format']` set; the shared open and decode timings are
+    only reported on the first result.
+    """
+    _check_resample(resample)
+    if effort not in ENCODER_EFFORT:
+        raise ValueError(f"Unsupported effort preset '{effort}'. Supported: {', '.join(ENCODER_EFFORT)}")
+    requested = sorted(set(widths), reverse=True)
+    if not requested or requested[-1] < 1:
+        raise ValueError(f"Widths must be positive, got: {', '.join(map(str, requested)) or 'none'}")
+    timer = _Timer()
+
+    with _opened(image, timer) as img, ThreadPoolExecutor(max_workers=jobs) as pool:
+        if getattr(img, "is_animated", False):
+            raise NotImplementedError("Renditions of animated images are not supported.")
+        source_format = (img.format or 'png').lower()
+        formats = [_check_target_format(f) for f in formats] if formats else [source_format]
+        if source_format not in SUPPORTED_FORMATS:
+            source_format = 'png'
+
+        fitting = [width for width in requested if width <= img.width]
+        if not fitting:
+            raise ValueError(f"Every width exceeds the image's width of {img.width}px.")
+        sizes = [(width, max(1, round(img.height * width / img.width))) for width in fitting]
+        original_size = img.size
+
+        shrink_on_load(img, sizes[0], resample)
+        with timer("decode"):
+            img.load()
+
+        def encode(resized: Image.Image, target_format: str, rendition_timer: _Timer) -> Result:
+            with rendition_timer("transform"):
+                prepared = prepare_for_format(resized, target_format)
+            save_kwargs = build_save_kwargs(target_format, quality, effort, source_format)
+            with rendition_timer("encode"):
+                data = _encode(prepared, SUPPORTED_FORMATS[target_format], **save_kwargs)
+            params = {"width": resized.width, "format": target_format, "original_size": original_size, **save_kwargs}
+            return Result(data, SUPPORTED_FORMATS[target_format], *resized.size, params, rendition_timer.timings)
+
+        levels = [img]
+        futures: list[Future[Result]] = []
+        for size in sizes:
+            rendition_timer = timer if not futures else _Timer()
+            with rendition_timer("transform"):
+                source = _pyramid_source(levels, size[0], resample)
+                resized = source if source.size == size else resize(source, size, resample)
+            levels.append(resized)
+            for target_format in formats:
+                futures.append(pool.submit(encode, resized, target_format, rendition_timer))
+                rendition_timer = _Timer()
+        return [future.result() for future in futures]
+
+
+def anonymize(image: ImageInput) -> Result:
+    """
+    Remove all metadata from an image.
+
+    Encoded JPEG, PNG and WebP input is rewritten at the container level, so pixels stay
+    bit-exact; anything else (including `Image.Image` input) is re-encoded from its pixels.
+    """
+    timer = _Timer()
+
+    if not isinstance(image, Image.Image):
+        src = _as_stream(image)
+        start = src.tell()
+        buffer = BytesIO()
+        with timer("strip"):
+            stripped = strip_metadata(src, buffer)
+        if stripped:
+            data: BytesLike = buffer.getvalue()
+            with Image.open(BytesIO(data)) as img:
+                assert img.format is not None
+                return Result(data, img.format, img.width, img.height, {"method": "container"}, timer.timings)
+        src.seek(start)
+
+    with _opened(image, timer) as img:
+        with timer("decode"):
+            img.load()
+        with timer("encode"):
+            data = _encode(strip_pixels(img), img.format or 'PNG')
+        return Result(data, img.format or 'PNG', img.width, img.height, {"method": "decode"}, timer.timings)
+
+
+@dataclass
+class _PipelineState:
+    """The decoded image flowing between stages, and how it will be encoded at the end."""
+
+    image: Image.Image
+    source_format: str
+    target_format: str
+    max_size: Optional[int] = None
+    metadata: dict = field(default_factory=dict)
+
+
+def _apply_stage(stage: Stage, state: _PipelineState, resample: str) -> None:
+    if stage.name == 'rescale':
+        size = scaled_size(state.image.size, cast(int, stage.value))
+        shrink_on_load(state.image, size, resample)
+        state.image = resize(state.image, size, resample)
+    elif stage.name == 'convert':
+        state.target_format = cast(str, stage.value)
+    elif stage.name == 'target-size':
+        state.max_size = cast(int, stage.value)
+    elif stage.name == 'anonymize':
+        state.metadata = {}
+
+
+def pipeline(
+    image: ImageInput,
+    spec: Union[str, list[Stage]],
+    quality: int = 85,
+    effort: str = 'balanced',
+    resample: str = 'lanczos',
+    wild: bool = False,
+    probe: str = 'full',
+) -> Result:
+    """
+    Run a pipeline such as ``"rescale:50 | convert:webp | target-size:200KB | anonymize"``.
+
+    The input is decoded once. Rescale stages transform the in-memory image in order;
+    convert, target-size and anonymize only decide how the single final encode happens,
+    so lossy generations do not pile up.
+    """
+    stages = parse_pipeline(spec) if isinstance(spec, str) else spec
+    _check_resample(resample)
+    timer = _Timer()
+
+    with _opened(image, timer) as img:
+        if getattr(img, "is_animated", False):
+            raise NotImplementedError("Pipelines over animated images are not supported.")
+
+        format = source_format(img)
+        metadata = {key: img.info[key] for key in PRESERVED_METADATA if key in img.info}
+        state = _PipelineState(img, format, format, metadata=metadata)
+
+        with timer("transform"):
+            for stage in stages:
+                _apply_stage(stage, state, resample)
+        return _encode_pipeline(state, timer, quality, effort, wild, probe)
+
+
+def _encode_pipeline(state: _PipelineState, timer: _Timer, quality: int, effort: str, wild: bool, probe: str) -> Result:
+    """Encode the final image once, searching for a size target if one was set."""
+    pil_format = SUPPORTED_FORMATS[state.target_format]
+
+    if state.max_size is not None:
+        if pil_format not in TARGET_SIZE_FORMATS:
+            raise ValueError(
+                f"Format '{state.target_format}' is not supported for target-size. "
+                f"Supported formats are: {', '.join(sorted(TARGET_SIZE_FORMATS))}."
+            )
+        with timer("search"):
+            result = _search(state.image, state.max_size, wild, probe, pil_format, state.metadata)
+        return _strategy_result(state.image, result, state.max_size, pil_format, timer)
+
+    img = prepare_for_format(state.image, state.target_format)
+    save_kwargs = build_save_kwargs(state.target_format, quality, effort, state.source_format)
+    with timer("encode"):
+        data = _encode(img, pil_format, **save_kwargs, **state.metadata)
+    return Result(data, pil_format, img.width, img.height, params=save_kwargs, timings=timer.timings)
@@ -0,0 +1,209 @@
+import glob
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from pixr.command.core import Command, CommandType
+from pixr.formats import SUPPORTED_FORMATS
+from pixr.runner_factory import RunnerFactory
+
+IMAGE_EXTENSIONS: set[str] = {f".{name}" for name in SUPPORTED_FORMATS}
+
+_GLOB_MAGIC = set("*?[")
+
+
+@dataclass
+class BatchItem:
+    """A single input file together with the directory its output should be mirrored into."""
+
+    input_path: Path
+    relative_path: Path
+
+
+@dataclass
+class FileResult:
+    input_path: str
+    ok: bool
+    message: str
+    elapsed: float
+
+
+@dataclass
+class BatchSummary:
+    results: list[FileResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for result in self.results if result.ok)
+
+    @property
+    def failed(self) -> list[FileResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def images_per_second(self) -> float:
+        return len(self.results) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def format(self) -> str:
+        return (
+            f"Processed {len(self.results)} file(s) in {self.elapsed:.2f}s "
+            f"({self.images_per_second:.1f} img/s): {self.succeeded} succeeded, {len(self.failed)} failed."
+        )
+
+
+def is_image(path: Path) -> bool:
+    """Whether `path` has the extension of an image format pixr reads."""
+    return path.suffix.lower() in IMAGE_EXTENSIONS
+
+
+def _glob_base(pattern: str) -> Path:
+    """Return the leading part of a glob pattern that contains no wildcards."""
+    base_parts = []
+    for part in Path(pattern).parts:
+        if _GLOB_MAGIC & set(part):
+            break
+        base_parts.append(part)
+    return Path(*base_parts) if base_parts else Path(".")
+
+
+def collect_inputs(paths: Iterable[str], recursive: bool = False) -> Iterator[BatchItem]:
+    """
+    Expand directories and glob patterns into the image files they contain.
+
+    Every file is paired with its path relative to the root it was found under,
+    so the input tree can be mirrored into an output directory.
+    """
+    for raw_path in paths:
+        if _GLOB_MAGIC & set(raw_path):
+            base = _glob_base(raw_path)
+            for match in sorted(glob.glob(raw_path, recursive=True)):
+                match_path = Path(match)
+                if match_path.is_file() and is_image(match_path):
+                    yield BatchItem(match_path, match_path.relative_to(base))
+            continue
+
+        path = Path(raw_path)
+        if path.is_dir():
+            candidates = path.rglob("*") if recursive else path.iterdir()
+            for file_path in sorted(candidates):
+                if file_path.is_file() and is_image(file_path):
+                    yield BatchItem(file_path, file_path.relative_to(path))
+        elif path.is_file():
+            yield BatchItem(path, Path(path.name))
+        else:
+            raise FileNotFoundError(f"Input path not found: {raw_path}")
+
+
+def process_file(command: Command) -> FileResult:
+    """Run a single command, capturing the runner's output instead of printing it."""
+    start = time.perf_counter()
+    output = io.StringIO()
+    try:
+        with redirect_stdout(output):
+            RunnerFactory.create_runner(command).execute()
+        ok = True
+        message = output.getvalue().strip()
+    except Exception as e:
+        ok = False
+        message = str(e) or type(e).__name__
+    return FileResult(command.options.file_path, ok, message, time.perf_counter() - start)
+
+
+def _output_name(template: Command, input_path: Path) -> str:
+    """The file name the runner will write for `input_path` into an output directory."""
+    suffix = input_path.suffix
+    if template.argument == CommandType.CONVERT:
+        suffix = f".{template.options.target_format}"
+    elif template.argument == CommandType.TARGET_SIZE:
+        # The runner names the output after the decoded format, which the suffix stands in for here
+        suffix = ".jpg" if suffix.lower() in (".jpg", ".jpeg") else suffix.lower()
+    return f"{input_path.stem}{suffix}"
+
+
+def build_commands(
+    template: Command, items: Iterable[BatchItem], output_dir: Path
+) -> tuple[list[Command], list[FileResult]]:
+    """
+    Derive one command per input file from an already validated template.
+
+    `model_copy` skips validation, so the options are only validated once per batch.
+    Inputs whose output would overwrite that of an earlier input (e.g. `a.png` and
+    `a.jpg` converted to WebP, or the same relative path under two roots) get no
+    command; they are returned as failed results instead.
+    """
+    commands: list[Command] = []
+    collisions: list[FileResult] = []
+    claimed: dict[Path, Path] = {}
+    for item in items:
+        target_dir = output_dir / item.relative_path.parent
+        target = target_dir / _output_name(template, item.input_path)
+        if target in claimed:
+            message = f"Output {target} is already produced by {claimed[target]}"
+            collisions.append(FileResult(str(item.input_path), False, message, 0.0))
+            continue
+        claimed[target] = item.input_path
+
+        target_dir.mkdir(parents=True, exist_ok=True)
+        options = template.options.model_copy(
+            update={"file_path": str(item.input_path), "output_path": None, "output_dir": str(target_dir)}
+        )
+        commands.append(Command(template.argument, options))
+    return commands, collisions
+
+
+ResultCallback = Callable[[Command, FileResult], None]
+
+
+def run_batch(
+    commands: list[Command],
+    jobs: Optional[int] = None,
+    verbose: bool = False,
+    on_result: Optional[ResultCallback] = None,
+    failed: Iterable[FileResult] = (),
+) -> BatchSummary:
+    """
+    Fan the commands out across a process pool and aggregate their results.
+
+    `on_result` is called in this process with every command and its result, in order,
+    as soon as the result arrives rather than once the whole batch is done. `failed`
+    holds inputs rejected before the batch ran, which are reported and counted first.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    summary = BatchSummary()
+    for result in failed:
+        print(f"✗ {result.input_path}: {result.message}")
+        summary.results.append(result)
+    start = time.perf_counter()
+
+    if jobs == 1 or len(commands) <= 1:
+        results: Iterable[FileResult] = map(process_file, commands)
+        summary.results += _collect(commands, results, verbose, on_result)
+    else:
+        chunksize = max(1, min(32, len(commands) // (jobs * 4)))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(process_file, commands, chunksize=chunksize)
+            summary.results += _collect(commands, results, verbose, on_result)
+
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+def _collect(
+    commands: list[Command], results: Iterable[FileResult], verbose: bool, on_result: Optional[ResultCallback]
+) -> list[FileResult]:
+    collected = []
+    for command, result in zip(commands, results):
+        if not result.ok:
+            print(f"✗ {result.input_path}: {result.message}")
+        elif verbose and result.message:
+            print(result.message)
+        if on_result is not None:
+            on_result(command, result)
+        collected.append(result)
+    return collected
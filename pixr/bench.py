@@ -0,0 +1,343 @@
+"""
+Reproducible benchmarks for pixr's runners and target-size strategies.
+
+A synthetic corpus (photos, screenshots, alpha PNGs and animated GIFs at several
+megapixel sizes) is generated from a fixed seed, so two machines or two library
+versions benchmark byte-identical inputs. Each case runs in a fresh process, which
+keeps peak RSS attributable to that case alone.
+"""
+
+import io
+import json
+import multiprocessing
+import platform
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from PIL import Image, ImageChops, ImageDraw
+
+import pixr
+from pixr.stats import peak_rss_kb
+
+CORPUS_KINDS: tuple[str, ...] = ('photo', 'screenshot', 'alpha', 'animated')
+DEFAULT_SIZES: tuple[float, ...] = (0.1, 1.0, 4.0)
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.1
+
+# Corpus kind -> (file extension, PIL format)
+CORPUS_FORMATS: dict[str, tuple[str, str]] = {
+    'photo': ('.jpg', 'JPEG'),
+    'screenshot': ('.png', 'PNG'),
+    'alpha': ('.png', 'PNG'),
+    'animated': ('.gif', 'GIF'),
+}
+
+ANIMATION_FRAMES = 8
+NOISE_TILE = 256
+
+# Runner -> extra command options; target-size aims at half of the input file
+RUNNER_OPTIONS: dict[str, dict] = {
+    'rescale': {'percentage': 50},
+    'convert': {'target_format': 'webp'},
+    'target-size': {},
+    'anonymize': {},
+}
+
+# Strategy -> (corpus kinds it is benchmarked on, reference encode its target is derived from)
+STRATEGY_CASES: dict[str, tuple[tuple[str, ...], dict]] = {
+    'jpeg': (('photo', 'screenshot'), {'format': 'JPEG', 'quality': 95}),
+    'webp': (('photo', 'screenshot', 'alpha'), {'format': 'WEBP', 'quality': 95}),
+    'png': (('screenshot', 'alpha'), {'format': 'PNG'}),
+}
+STRATEGY_TARGET_RATIO = 0.4
+
+
+@dataclass
+class CorpusImage:
+    kind: str
+    megapixels: float
+    path: Path
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}-{self.megapixels:g}mp"
+
+
+@dataclass
+class BenchCase:
+    """One operation on one corpus image, e.g. ``runner:rescale/photo-1mp``."""
+
+    group: str
+    operation: str
+    image: CorpusImage
+
+    @property
+    def name(self) -> str:
+        return f"{self.group}:{self.operation}/{self.image.name}"
+
+
+@dataclass
+class CaseResult:
+    name: str
+    wall_time: float
+    images_per_second: float
+    peak_rss_kb: Optional[int]
+    probes: Optional[int]
+    timings: list[float] = field(default_factory=list)
+
+
+def _dimensions(megapixels: float, aspect: float = 4 / 3) -> tuple[int, int]:
+    height = max(int((megapixels * 1_000_000 / aspect) ** 0.5), 8)
+    return max(int(height * aspect), 8), height
+
+
+def _noise_tile(rng: random.Random) -> Image.Image:
+    return Image.frombytes("L", (NOISE_TILE, NOISE_TILE), rng.randbytes(NOISE_TILE * NOISE_TILE))
+
+
+def _tiled(tile: Image.Image, size: tuple[int, int]) -> Image.Image:
+    canvas = Image.new(tile.mode, size)
+    for top in range(0, size[1], tile.height):
+        for left in range(0, size[0], tile.width):
+            canvas.paste(tile, (left, top))
+    return canvas
+
+
+def make_photo(size: tuple[int, int], rng: random.Random) -> Image.Image:
+    """Smooth colour fields with fine grain, which compress like a camera photo."""
+    coarse = (max(size[0] // 64, 2), max(size[1] // 64, 2))
+    fields = Image.frombytes("RGB", coarse, rng.randbytes(coarse[0] * coarse[1] * 3))
+    fields = fields.resize(size, Image.Resampling.BICUBIC)
+    grain = _tiled(_noise_tile(rng), size).convert("RGB")
+    return Image.blend(fields, grain, 0.12)
+
+
+def make_screenshot(size: tuple[int, int], rng: random.Random) -> Image.Image:
+    """Flat panels and rows of text-like glyph runs on a light background."""
+    img = Image.new("RGB", size, (245, 245, 245))
+    draw = ImageDraw.Draw(img)
+    for _ in range(max(size[0] * size[1] // 40_000, 4)):
+        left, top = rng.randrange(size[0]), rng.randrange(size[1])
+        right, bottom = left + rng.randrange(20, max(size[0] // 3, 21)), top + rng.randrange(10, max(size[1] // 4, 11))
+        draw.rectangle((left, top, right, bottom), fill=tuple(rng.randrange(256) for _ in range(3)))
+    for top in range(8, size[1] - 8, 18):
+        left = 8
+        while left < size[0] - 40 and rng.random() < 0.97:
+            width = rng.randrange(6, 40)
+            draw.rectangle((left, top, left + width, top + 9), fill=(30, 30, 30))
+            left += width + rng.randrange(4, 9)
+    return img
+
+
+def make_alpha(size: tuple[int, int], rng: random.Random) -> Image.Image:
+    """Semi-transparent shapes over a transparent background fading out to one side."""
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    for _ in range(max(size[0] * size[1] // 60_000, 3)):
+        left, top = rng.randrange(size[0]), rng.randrange(size[1])
+        box = (
+            left,
+            top,
+            left + rng.randrange(10, max(size[0] // 2, 11)),
+            top + rng.randrange(10, max(size[1] // 2, 11)),
+        )
+        draw.ellipse(box, fill=tuple(rng.randrange(256) for _ in range(3)) + (rng.randrange(64, 256),))
+    fade = Image.linear_gradient("L").rotate(90).resize(size)
+    img.putalpha(ImageChops.multiply(img.getchannel("A"), fade))
+    return img
+
+
+def make_animation(size: tuple[int, int], rng: random.Random) -> list[Image.Image]:
+    """A screenshot-like background with a square sliding across it."""
+    background = make_screenshot(size, rng)
+    step = max(size[0] // ANIMATION_FRAMES, 1)
+    side = max(min(size) // 4, 4)
+    frames = []
+    for index in range(ANIMATION_FRAMES):
+        frame = background.copy()
+        left = index * step
+        ImageDraw.Draw(frame).rectangle((left, side, left + side, 2 * side), fill=(220, 40, 40))
+        frames.append(frame)
+    return frames
+
+
+def generate_image(kind: str, megapixels: float, path: Path, seed: int) -> None:
+    """Write one corpus image; the same kind, size and seed always give the same bytes."""
+    rng = random.Random(f"{seed}:{kind}:{megapixels}")
+    size = _dimensions(megapixels)
+    _, pil_format = CORPUS_FORMATS[kind]
+
+    if kind == 'photo':
+        exif = Image.Exif()
+        exif[0x010F] = "pixr-bench"  # Make, so anonymize has something to strip
+        make_photo(size, rng).save(path, pil_format, quality=92, exif=exif)
+    elif kind == 'screenshot':
+        make_screenshot(size, rng).save(path, pil_format)
+    elif kind == 'alpha':
+        make_alpha(size, rng).save(path, pil_format)
+    else:
+        frames = make_animation(size, rng)
+        frames[0].save(path, pil_format, save_all=True, append_images=frames[1:], duration=80, loop=0)
+
+
+def generate_corpus(
+    directory: Path, kinds: Iterable[str] = CORPUS_KINDS, sizes: Iterable[float] = DEFAULT_SIZES, seed: int = 0
+) -> list[CorpusImage]:
+    """Generate (or reuse previously generated) corpus images in `directory`."""
+    directory.mkdir(parents=True, exist_ok=True)
+    corpus = []
+    for kind in kinds:
+        if kind not in CORPUS_KINDS:
+            raise ValueError(f"Unknown corpus kind '{kind}'. Supported: {', '.join(CORPUS_KINDS)}")
+        for megapixels in sizes:
+            extension, _ = CORPUS_FORMATS[kind]
+            image = CorpusImage(kind, megapixels, directory / f"{kind}-{megapixels:g}mp-seed{seed}{extension}")
+            if not image.path.exists():
+                generate_image(kind, megapixels, image.path, seed)
+            corpus.append(image)
+    return corpus
+
+
+def build_cases(corpus: list[CorpusImage], match: Optional[str] = None) -> list[BenchCase]:
+    """Every runner on every image, and every strategy on the kinds it is meant for."""
+    cases = []
+    for image in corpus:
+        for operation in RUNNER_OPTIONS:
+            if operation == 'convert' and image.kind == 'animated':
+                continue
+            cases.append(BenchCase('runner', operation, image))
+        for strategy, (kinds, _) in STRATEGY_CASES.items():
+            if image.kind in kinds:
+                cases.append(BenchCase('strategy', strategy, image))
+    return [case for case in cases if not match or match in case.name]
+
+
+def _time_runner(case: BenchCase, output_dir: Path) -> tuple[float, Optional[int]]:
+    from pixr.command.core import Command
+    from pixr.runner_factory import RunnerFactory
+
+    options = dict(RUNNER_OPTIONS[case.operation])
+    if case.operation == 'target-size':
+        options['max_size'] = str(case.image.path.stat().st_size // 2)
+    command = Command.from_cli(
+        case.operation, {"verbose": False, "file_path": str(case.image.path), "output_dir": str(output_dir), **options}
+    )
+    runner = RunnerFactory.create_runner(command)
+
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        runner.run()
+    elapsed = time.perf_counter() - start
+    return elapsed, runner.result.params.get("probes") if runner.result else None
+
+
+def _time_strategy(case: BenchCase, img: Image.Image) -> tuple[float, Optional[int]]:
+    from pixr.strategies import BaseOptimizationStrategy, JpegStrategy, PngStrategy, WebPStrategy
+
+    strategies: dict[str, Callable[..., BaseOptimizationStrategy]] = {
+        'jpeg': JpegStrategy,
+        'webp': WebPStrategy,
+        'png': PngStrategy,
+    }
+    _, reference = STRATEGY_CASES[case.operation]
+    buffer = io.BytesIO()
+    source = img.convert("RGB") if reference['format'] == 'JPEG' else img
+    source.save(buffer, **reference)
+    target_bytes = int(buffer.tell() * STRATEGY_TARGET_RATIO)
+
+    start = time.perf_counter()
+    result = strategies[case.operation](img, target_bytes, wild_mode=False).optimize()
+    return time.perf_counter() - start, result.get("probes")
+
+
+def run_case(case: BenchCase, repeat: int = DEFAULT_REPEAT) -> CaseResult:
+    """Run a case `repeat` times after one untimed warm-up run and report its median wall time."""
+    timings, probes = [], None
+    with tempfile.TemporaryDirectory(prefix="pixr-bench-") as output_dir:
+        img = None
+        if case.group == 'strategy':
+            img = Image.open(case.image.path)
+            img.load()
+        for _ in range(repeat + 1):
+            if case.group == 'runner':
+                elapsed, probes = _time_runner(case, Path(output_dir))
+            else:
+                assert img is not None
+                elapsed, probes = _time_strategy(case, img)
+            timings.append(elapsed)
+        timings = timings[1:]
+
+    wall_time = statistics.median(timings)
+    return CaseResult(case.name, wall_time, 1 / wall_time if wall_time else 0.0, peak_rss_kb(), probes, timings)
+
+
+def run_bench(cases: list[BenchCase], repeat: int = DEFAULT_REPEAT, isolate: bool = True) -> Iterable[CaseResult]:
+    """Yield results case by case, each in a freshly spawned process unless `isolate` is off."""
+    context = multiprocessing.get_context("spawn")
+    for case in cases:
+        if not isolate:
+            yield run_case(case, repeat)
+            continue
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            yield executor.submit(run_case, case, repeat).result()
+
+
+def environment() -> dict:
+    return {
+        "pixr": pixr.__version__,
+        "pillow": Image.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def write_report(path: Path, results: list[CaseResult], settings: dict) -> None:
+    report = {"environment": environment(), "settings": settings, "cases": [asdict(result) for result in results]}
+    path.write_text(json.dumps(report, indent=2) + "\n")
+
+
+def load_report(path: Path) -> dict[str, dict]:
+    """Cases of a saved report, by name."""
+    return {case["name"]: case for case in json.loads(path.read_text())["cases"]}
+
+
+def compare(results: list[CaseResult], baseline: dict[str, dict], threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """
+    Describe every regression against a baseline report.
+
+    A case regresses when it is more than `threshold` slower or uses that much more peak
+    memory, or when it needs more encoder probes; cases missing on either side are ignored.
+    """
+    regressions = []
+    for result in results:
+        old = baseline.get(result.name)
+        if old is None:
+            continue
+        if result.wall_time > old["wall_time"] * (1 + threshold):
+            regressions.append(
+                f"{result.name}: {old['wall_time'] * 1000:.1f}ms -> {result.wall_time * 1000:.1f}ms "
+                f"({result.wall_time / old['wall_time'] - 1:+.0%})"
+            )
+        if result.peak_rss_kb and old.get("peak_rss_kb") and result.peak_rss_kb > old["peak_rss_kb"] * (1 + threshold):
+            regressions.append(
+                f"{result.name}: peak RSS {old['peak_rss_kb'] / 1024:.0f}MB -> {result.peak_rss_kb / 1024:.0f}MB"
+            )
+        if result.probes is not None and old.get("probes") is not None and result.probes > old["probes"]:
+            regressions.append(f"{result.name}: {old['probes']} -> {result.probes} encoder probes")
+    return regressions
+
+
+def format_result(result: CaseResult) -> str:
+    rss = f"{result.peak_rss_kb / 1024:7.0f}MB" if result.peak_rss_kb else "      n/a"
+    probes = f"{result.probes:3d} probes" if result.probes is not None else ""
+    return (
+        f"{result.name:<40} {result.wall_time * 1000:9.1f}ms {result.images_per_second:8.2f} img/s {rss} {probes}"
+    ).rstrip()
@@ -0,0 +1,191 @@
+"""
+Fit a set of images into one total byte budget.
+
+Each image's size-versus-quality curve is sampled on a coarse quality grid, and the budget
+is shared out along those curves: ``min`` raises whichever image currently has the lowest
+quality for as long as the next step still fits (maximizing the worst quality, then the
+next worst, and so on), while ``mean`` spends every byte where it buys the most quality.
+Between samples, sizes are interpolated geometrically. Whatever is left over is split
+in proportion to each image's share, and a regular target-size search then finds the
+exact quality per image within its share, so the total never exceeds the budget.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from pixr.buffers import write_atomic
+from pixr.formats import BUDGET_OBJECTIVES
+
+if TYPE_CHECKING:
+    from pixr.api import Result
+    from pixr.batch import BatchItem
+
+# Spacing of the sampled qualities; the per-image search refines between grid points.
+CURVE_STEP = 5
+
+
+def curve_qualities(low: int, high: int, step: int = CURVE_STEP) -> list[int]:
+    """The qualities a curve is sampled at: `low`, every `step` above it, and `high`."""
+    return sorted(set(range(low, high, step)) | {high})
+
+
+@dataclass
+class SizeCurve:
+    """Encoded sizes of one image at increasing qualities."""
+
+    qualities: list[int]
+    sizes: list[int]
+
+    def __post_init__(self) -> None:
+        if not self.qualities or len(self.qualities) != len(self.sizes):
+            raise ValueError("A size curve needs one size per quality, and at least one point.")
+
+    def interpolated(self) -> "SizeCurve":
+        """The curve at every whole quality, sizes between samples interpolated geometrically."""
+        qualities, sizes = [self.qualities[0]], [self.sizes[0]]
+        for (q0, s0), (q1, s1) in zip(zip(self.qualities, self.sizes), zip(self.qualities[1:], self.sizes[1:])):
+            for quality in range(q0 + 1, q1 + 1):
+                t = (quality - q0) / (q1 - q0)
+                qualities.append(quality)
+                sizes.append(round(max(s0, 1) ** (1 - t) * max(s1, 1) ** t))
+        return SizeCurve(qualities, sizes)
+
+
+def _water_fill(curves: list[SizeCurve], levels: list[int], spare: int) -> int:
+    """Raise the lowest-quality image while its next step fits, until none can move."""
+    movable = {index for index, curve in enumerate(curves) if len(curve.qualities) > 1}
+    while movable:
+        index = min(
+            movable,
+            key=lambda i: (
+                curves[i].qualities[levels[i]],
+                curves[i].sizes[levels[i] + 1] - curves[i].sizes[levels[i]],
+            ),
+        )
+        curve, level = curves[index], levels[index]
+        cost = curve.sizes[level + 1] - curve.sizes[level]
+        if cost > spare:
+            movable.discard(index)
+            continue
+        levels[index], spare = level + 1, spare - cost
+        if levels[index] == len(curve.qualities) - 1:
+            movable.discard(index)
+    return spare
+
+
+def _greedy(curves: list[SizeCurve], levels: list[int], spare: int) -> int:
+    """Repeatedly take the affordable step with the most quality gained per byte."""
+    while True:
+        best, best_gain = None, 0.0
+        for index, curve in enumerate(curves):
+            level = levels[index]
+            if level == len(curve.qualities) - 1:
+                continue
+            cost = curve.sizes[level + 1] - curve.sizes[level]
+            if cost > spare:
+                continue
+            gain = (curve.qualities[level + 1] - curve.qualities[level]) / max(cost, 1)
+            if gain > best_gain:
+                best, best_gain = index, gain
+        if best is None:
+            return spare
+        spare -= curves[best].sizes[levels[best] + 1] - curves[best].sizes[levels[best]]
+        levels[best] += 1
+
+
+def allocate(curves: list[SizeCurve], budget: int, objective: str = 'min') -> list[int]:
+    """
+    Split `budget` bytes into one share per curve.
+
+    Curves are interpolated to every whole quality first, so every share covers the
+    (estimated) size at the quality its image was allotted, plus its cut of the bytes no
+    further step could use. If even the lowest qualities exceed the
+    budget, each image gets exactly its lowest-quality size and the total overshoots.
+    """
+    if objective not in BUDGET_OBJECTIVES:
+        raise ValueError(f"Unknown budget objective '{objective}'. Supported: {', '.join(BUDGET_OBJECTIVES)}")
+
+    curves = [curve.interpolated() for curve in curves]
+    levels = [0] * len(curves)
+    spare = budget - sum(curve.sizes[0] for curve in curves)
+    if spare < 0:
+        return [curve.sizes[0] for curve in curves]
+
+    spare = (_water_fill if objective == 'min' else _greedy)(curves, levels, spare)
+
+    allotted = [curve.sizes[level] for curve, level in zip(curves, levels)]
+    total = sum(allotted) or 1
+    return [size + spare * size // total for size in allotted]
+
+
+@dataclass
+class BudgetSummary:
+    budget: int
+    objective: str
+    outputs: list[tuple[Path, Path, "Result"]] = field(default_factory=list)
+    skipped: list[Path] = field(default_factory=list)
+
+    @property
+    def total_size(self) -> int:
+        return sum(result.size for _, _, result in self.outputs)
+
+    @property
+    def met(self) -> bool:
+        return not self.skipped and self.total_size <= self.budget
+
+    def format(self) -> str:
+        qualities = [result.params["quality"] for _, _, result in self.outputs if "quality" in result.params]
+        quality_info = ""
+        if qualities:
+            quality_info = (
+                f", quality min {min(qualities)} / mean {sum(qualities) / len(qualities):.1f} / max {max(qualities)}"
+            )
+        status = "✓" if self.met else "ℹ️ Budget not met:"
+        skipped = f", {len(self.skipped)} skipped" if self.skipped else ""
+        return (
+            f"{status} {len(self.outputs)} image(s) in {self.total_size / 1024:.0f}KB of "
+            f"{self.budget / 1024:.0f}KB ({self.objective} objective{quality_info}){skipped}"
+        )
+
+
+def output_path_for(item: "BatchItem", format: str, output_dir: Optional[Path]) -> Path:
+    """Where target-size writes its result: next to the input with a suffix, or mirrored into `output_dir`."""
+    extension = ".jpg" if format == "JPEG" else f".{format.lower()}"
+    if output_dir is None:
+        return item.input_path.parent / f"{item.input_path.stem}_targeted{extension}"
+    return output_dir / item.relative_path.parent / f"{item.input_path.stem}{extension}"
+
+
+def run_budget(
+    items: Iterable["BatchItem"],
+    budget: int,
+    objective: str = 'min',
+    wild: bool = False,
+    output_dir: Optional[Path] = None,
+    jobs: Optional[int] = None,
+    verbose: bool = False,
+) -> BudgetSummary:
+    """Fit every input into `budget` bytes in total and write the results."""
+    from pixr import api
+
+    items = list(items)
+    results = api.target_size_budget([item.input_path.read_bytes() for item in items], budget, objective, wild, jobs)
+
+    summary = BudgetSummary(budget, objective)
+    for item, result in zip(items, results):
+        if not result.data:
+            share = result.params["share_bytes"]
+            print(f"❌ Could not fit {item.input_path} into its share of {share / 1024:.0f}KB; skipped.")
+            summary.skipped.append(item.input_path)
+            continue
+        output_path = output_path_for(item, result.format, output_dir)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(output_path, result.data)
+        summary.outputs.append((item.input_path, output_path, result))
+        if verbose:
+            print(
+                f"  {item.input_path} → {output_path} ({result.size / 1024:.0f}KB of a "
+                f"{result.params['share_bytes'] / 1024:.0f}KB share, quality {result.params.get('quality')})"
+            )
+    return summary
@@ -0,0 +1,183 @@
+"""
+Encode buffers handed over without copying, and atomic output writes.
+
+Strategies encode every probe into a fresh `EncodeBuffer` and keep only the buffers they
+may still return; the winner leaves as a memoryview of its buffer (`view()`), so probes
+never pile up `bytes` copies of full encodings. Within `spill_to(directory)`, which
+runners enter with their output directory, a buffer that grows past `SPILL_THRESHOLD`
+moves to a temporary file in that directory, and `write_atomic` then renames that file
+into place instead of writing the data again.
+
+Outputs are always written to a temporary file next to their destination and renamed
+over it once complete, so an interrupted run never leaves a truncated output behind.
+The spill directory is process-wide, like the stats hooks, so encoder worker threads
+see it too.
+"""
+
+import io
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Union
+
+# Encodings above this size are kept in a temporary file rather than in memory.
+SPILL_THRESHOLD = 64 * 1024 * 1024
+TEMP_PREFIX = ".pixr-"
+TEMP_SUFFIX = ".tmp"
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+_spill_dir: Optional[Path] = None
+
+
+def _default_mode() -> int:
+    """The permissions a plain open() would give a new file; mkstemp always uses 0600."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+_FILE_MODE = _default_mode()
+
+
+@contextmanager
+def spill_to(directory: Union[str, Path]) -> Iterator[Path]:
+    """Let encode buffers created within the block spill to temporary files in `directory`."""
+    global _spill_dir
+    previous, _spill_dir = _spill_dir, Path(directory)
+    try:
+        yield _spill_dir
+    finally:
+        _spill_dir = previous
+
+
+def _temp_file(directory: Path) -> tuple[BinaryIO, Path]:
+    fd, name = tempfile.mkstemp(dir=directory, prefix=TEMP_PREFIX, suffix=TEMP_SUFFIX)
+    return os.fdopen(fd, "w+b"), Path(name)
+
+
+class _SpilledMap(mmap.mmap):
+    """A memory map of a spilled buffer, which keeps the buffer (and its file) alive."""
+
+    buffer: "EncodeBuffer"
+
+
+class EncodeBuffer(io.IOBase):
+    """
+    A write-only, seekable in-memory file that moves to a temporary file once it grows too large.
+
+    It spills only while a spill directory is set (see `spill_to`); the temporary file is
+    removed when the buffer is closed, unless it was renamed into place by `commit`.
+    """
+
+    def __init__(self, spill_dir: Optional[Path] = None, threshold: Optional[int] = None):
+        self.spill_dir = spill_dir if spill_dir is not None else _spill_dir
+        self.threshold = threshold if threshold is not None else SPILL_THRESHOLD
+        self.path: Optional[Path] = None
+        # BytesIO until the buffer spills, the temporary file after
+        self._file: Union[io.BytesIO, BinaryIO] = io.BytesIO()
+        self._committed = False
+
+    @property
+    def spilled(self) -> bool:
+        return self.path is not None
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def write(self, data: BytesLike) -> int:
+        if not self.spilled and self.spill_dir is not None:
+            if self._file.tell() + memoryview(data).nbytes > self.threshold:
+                self._spill()
+        return self._file.write(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def _spill(self) -> None:
+        assert isinstance(self._file, io.BytesIO) and self.spill_dir is not None
+        if not self.spill_dir.is_dir():
+            # The output directory does not exist (yet), so the encoding stays in memory
+            self.spill_dir = None
+            return
+        spilled, self.path = _temp_file(self.spill_dir)
+        position = self._file.tell()
+        spilled.write(self._file.getbuffer())
+        spilled.seek(position)
+        self._file = spilled
+
+    def view(self) -> memoryview:
+        """The contents without copying them: the in-memory buffer, or a read-only map of the spilled file."""
+        if isinstance(self._file, io.BytesIO):
+            return self._file.getbuffer()
+        self._file.flush()
+        if os.fstat(self._file.fileno()).st_size == 0:
+            return memoryview(b"")
+        mapped = _SpilledMap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        mapped.buffer = self
+        return memoryview(mapped)
+
+    def commit(self, path: Path) -> None:
+        """Atomically make the contents the file at `path`, renaming the spilled file if possible."""
+        if self.path is not None and path.parent.resolve() == self.path.parent.resolve():
+            self._file.flush()
+            os.chmod(self.path, _FILE_MODE)
+            os.replace(self.path, path)
+            self.path, self._committed = path, True
+            self.close()
+            return
+        write_atomic(path, self.view())
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        super().close()
+        if self.spilled:
+            self._file.close()
+            if not self._committed:
+                assert self.path is not None
+                self.path.unlink(missing_ok=True)
+        # An in-memory buffer may still be exported through view(), so it is left to the garbage collector
+
+
+def new_buffer() -> EncodeBuffer:
+    """A buffer for one trial encode, spilling to the current spill directory if one is set."""
+    return EncodeBuffer()
+
+
+@contextmanager
+def atomic_output(path: Union[str, Path]) -> Iterator[BinaryIO]:
+    """A file to write the new contents of `path` into; it replaces `path` only once the block completes."""
+    path = Path(path)
+    tmp, tmp_path = _temp_file(path.parent)
+    try:
+        with tmp:
+            yield tmp
+        os.chmod(tmp_path, _FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_atomic(path: Union[str, Path], data: BytesLike) -> None:
+    """Write `data` to `path` atomically; data viewing a spilled buffer in the same directory is renamed into place."""
+    path = Path(path)
+    owner = getattr(data, "obj", None)
+    if isinstance(owner, _SpilledMap) and owner.buffer.path is not None and not owner.buffer.closed:
+        if path.parent.resolve() == owner.buffer.path.parent.resolve():
+            owner.buffer.commit(path)
+            return
+    with atomic_output(path) as f:
+        f.write(data)
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import pixr
+from pixr.buffers import atomic_output
+
+if TYPE_CHECKING:
+    from pixr.command.core import Command
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "pixr"
+DEFAULT_MAX_SIZE = "1GB"
+
+# Options describing where files live or how pixr reports, not what the output looks like.
+UNKEYED_OPTIONS: set[str] = {
+    "file_path",
+    "output_path",
+    "output_dir",
+    "verbose",
+    "cache_dir",
+    "cache_max_size",
+    "remote",
+    "stats",
+}
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: Path, digest: Optional["hashlib._Hash"] = None) -> "hashlib._Hash":
+    """Feed a file's bytes into `digest` (a new SHA-256 by default) and return it."""
+    digest = digest or hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest
+
+
+def command_context(command: "Command") -> dict:
+    """Everything besides the input that determines a command's output: options and library versions."""
+    import PIL
+
+    return {
+        "command": command.argument.value,
+        "options": command.options.model_dump(exclude=UNKEYED_OPTIONS),
+        "pixr": pixr.__version__,
+        "pillow": PIL.__version__,
+    }
+
+
+@dataclass
+class CacheStats:
+    entries: int
+    total_bytes: int
+    max_bytes: int
+
+
+class ResultCache:
+    """
+    On-disk, content-addressed cache of encoded outputs with size-bounded LRU eviction.
+
+    Entries are written to a temporary file and renamed into place, so concurrent
+    workers never observe partial entries; a hit refreshes the entry's mtime, which is
+    what eviction orders by.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.objects_dir = self.cache_dir / "objects"
+        self.tmp_dir = self.cache_dir / "tmp"
+
+    @staticmethod
+    def key_for(input_path: Path, command: "Command", output_path: Path) -> str:
+        """
+        Hash the input bytes together with the normalized options and library versions.
+
+        The output's extension is keyed as well: where no option names the format, such
+        as for rescale, the runner encodes in the format the extension implies.
+        """
+        digest = hash_file(input_path)
+        context = {**command_context(command), "output_suffix": output_path.suffix.lower()}
+        digest.update(json.dumps(context, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _path_for(self, key: str) -> Path:
+        return self.objects_dir / key[:2] / key
+
+    def restore(self, key: str, output_path: Path) -> bool:
+        """Copy a cached output to `output_path`. Returns False on a miss."""
+        path = self._path_for(key)
+        try:
+            with open(path, "rb") as src, atomic_output(output_path) as dst:
+                shutil.copyfileobj(src, dst)
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key: str, source_path: Path) -> None:
+        """Insert an encoded output atomically, then evict least recently used entries."""
+        path = self._path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp, open(source_path, "rb") as src:
+                shutil.copyfileobj(src, tmp)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        self.evict()
+
+    def _entries(self) -> list[tuple[Path, os.stat_result]]:
+        entries = []
+        for entry in self.objects_dir.glob("*/*"):
+            try:
+                entries.append((entry, entry.stat()))
+            except FileNotFoundError:  # evicted by a concurrent worker
+                continue
+        return entries
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits its size limit."""
+        entries = sorted(self._entries(), key=lambda item: item[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        removed = 0
+        for entry, stat in entries:
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= stat.st_size
+            removed += 1
+        return removed
+
+    def stats(self) -> CacheStats:
+        entries = self._entries()
+        return CacheStats(len(entries), sum(stat.st_size for _, stat in entries), self.max_bytes)
+
+    def clear(self) -> int:
+        """Remove every entry, returning how many there were."""
+        count = len(self._entries())
+        shutil.rmtree(self.objects_dir, ignore_errors=True)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        return count
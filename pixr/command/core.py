@@ -2,10 +2,11 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Optional
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ValidationError, field_validator
 
 from pixr.command.exceptions import NoSuchArgument, PercentageRangeError
-from pixr.formats import SUPPORTED_FORMATS
+from pixr.formats import ENCODER_EFFORT, PROBE_MODES, RESAMPLE_FILTERS, STATS_FORMATS, SUPPORTED_FORMATS
+from pixr.pipeline import format_pipeline, parse_pipeline
 
 
 class CommandType(Enum):
@@ -13,6 +14,7 @@ class CommandType(Enum):
     RESCALE = 'rescale'
     TARGET_SIZE = 'target-size'
     ANONYMIZE = 'anonymize'
+    PIPELINE = 'pipeline'
 
 
 class CmdOptions(BaseModel):
@@ -20,10 +22,22 @@ class CmdOptions(BaseModel):
     percentage: Optional[int] = None
     file_path: str
     output_path: Optional[str] = None
+    output_dir: Optional[str] = None
     target_format: Optional[str] = None
     quality: int = 85
+    resample: str = 'lanczos'
+    effort: str = 'balanced'
     max_size: Optional[str] = None
     wild: bool = False
+    downscale: bool = False
+    probe: str = 'full'
+    min_ssim: Optional[float] = None
+    ssim_downsample: int = 1
+    pipeline: Optional[str] = None
+    cache_dir: Optional[str] = None
+    cache_max_size: Optional[str] = None
+    remote: Optional[str] = None
+    stats: Optional[str] = None
 
     @field_validator("percentage")
     @classmethod
@@ -62,6 +76,69 @@ class CmdOptions(BaseModel):
 
         return value.lower()
 
+    @field_validator("resample")
+    @classmethod
+    def resample_valid(cls, value: str) -> str:
+        """Validator to check whether the resampling filter is known"""
+        if value.lower() not in RESAMPLE_FILTERS:
+            raise ValueError(f"Unsupported resampling filter '{value}'. Supported: {', '.join(RESAMPLE_FILTERS)}")
+
+        return value.lower()
+
+    @field_validator("effort")
+    @classmethod
+    def effort_valid(cls, value: str) -> str:
+        """Validator to check whether the encoder effort preset is known"""
+        if value.lower() not in ENCODER_EFFORT:
+            raise ValueError(f"Unsupported effort preset '{value}'. Supported: {', '.join(ENCODER_EFFORT)}")
+
+        return value.lower()
+
+    @field_validator("probe")
+    @classmethod
+    def probe_valid(cls, value: str) -> str:
+        """Validator to check whether the probing mode is known"""
+        if value.lower() not in PROBE_MODES:
+            raise ValueError(f"Unsupported probing mode '{value}'. Supported: {', '.join(PROBE_MODES)}")
+
+        return value.lower()
+
+    @field_validator("min_ssim")
+    @classmethod
+    def min_ssim_valid(cls, value: Optional[float]) -> Optional[float]:
+        """Validator to check whether the minimum SSIM is a reachable score"""
+        if value is not None and not 0 < value <= 1:
+            raise ValueError(f"Minimum SSIM must be greater than 0 and at most 1, got: {value}")
+        return value
+
+    @field_validator("ssim_downsample")
+    @classmethod
+    def ssim_downsample_valid(cls, value: int) -> int:
+        """Validator to check whether the SSIM downsampling factor is valid"""
+        if value < 1:
+            raise ValueError(f"SSIM downsampling factor must be at least 1, got: {value}")
+        return value
+
+    @field_validator("stats")
+    @classmethod
+    def stats_valid(cls, value: Optional[str]) -> Optional[str]:
+        """Validator to check whether the stats report format is known"""
+        if value is None:
+            return value
+        if value.lower() not in STATS_FORMATS:
+            raise ValueError(f"Unsupported stats format '{value}'. Supported: {', '.join(STATS_FORMATS)}")
+
+        return value.lower()
+
+    @field_validator("pipeline")
+    @classmethod
+    def pipeline_valid(cls, value: Optional[str]) -> Optional[str]:
+        """Validator to check whether the pipeline spec parses, normalizing its spelling"""
+        if value is None:
+            return value
+
+        return format_pipeline(parse_pipeline(value))
+
 
 @dataclass
 class Command:
@@ -76,3 +153,11 @@ class Command:
             raise NoSuchArgument(f"Unknown command: '{argument}'")
         cmd_options = CmdOptions(**options)
         return cls(cmd_type, cmd_options)
+
+
+def validation_message(error: ValidationError) -> str:
+    """The first validation error, without pydantic's 'Value error, ' prefix."""
+    msg = error.errors()[0]['msg']
+    if msg.startswith('Value error, '):
+        msg = msg.removeprefix('Value error, ')
+    return msg
@@ -39,3 +39,9 @@ class ConversionError(PixrError):
     """Custom error for runner-specific conversion errors."""
 
     ...
+
+
+class MissingDependency(PixrError):
+    """Custom error that is raised when a feature needs an optional package that is not installed."""
+
+    ...
@@ -11,3 +11,47 @@ SUPPORTED_FORMATS: dict[str, str] = {
 
 # PIL format names that support target-size optimization
 TARGET_SIZE_FORMATS: set[str] = {'PNG', 'JPEG', 'GIF', 'WEBP'}
+
+# Resampling filter names accepted by rescale; 'fast' is a preset trading a little
+# sharpness for the cheapest decode and resample path
+RESAMPLE_FILTERS: tuple[str, ...] = ('nearest', 'bilinear', 'bicubic', 'lanczos', 'fast')
+
+# How target-size strategies probe the size-versus-quality curve: encode the full image
+# every time, or fit the curve on a small proxy and confirm at full resolution
+PROBE_MODES: tuple[str, ...] = ('full', 'proxy')
+
+# How `target-size --total` shares a byte budget: raise the worst quality, or the average one
+BUDGET_OBJECTIVES: tuple[str, ...] = ('min', 'mean')
+
+# Report formats of `pixr --stats`: a human-readable line or one JSON object per file
+STATS_FORMATS: tuple[str, ...] = ('text', 'json')
+
+# Encoder effort preset -> PIL format -> save() options; 'fast' gives up a few percent of
+# file size for several times the throughput, 'max' spends the slowest encoder settings
+ENCODER_EFFORT: dict[str, dict[str, dict]] = {
+    'fast': {
+        'WEBP': {'method': 0},
+        'JPEG': {'optimize': False, 'progressive': False},
+        'PNG': {'compress_level': 1},
+    },
+    'balanced': {
+        'WEBP': {'method': 4},
+        'JPEG': {'optimize': True},
+        'PNG': {'compress_level': 6},
+    },
+    'max': {
+        'WEBP': {'method': 6},
+        'JPEG': {'optimize': True, 'progressive': True},
+        'PNG': {'compress_level': 9, 'optimize': True},
+    },
+}
+
+# `pixr serve` defaults: where to listen and how many requests may wait for a worker
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8765
+SERVE_QUEUE_DEPTH = 16
+
+# `pixr watch` defaults: how long a file must stay unchanged before it is processed, and
+# how often a directory on a network filesystem (where inotify sees nothing) is polled
+WATCH_SETTLE = 0.5
+WATCH_POLL_INTERVAL = 1.0
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from pixr.command.exceptions import PercentageRangeError
+from pixr.formats import SUPPORTED_FORMATS
+from pixr.utils import parse_size
+
+STAGE_SEPARATOR = "|"
+
+# Stage name -> whether the stage takes an argument after a colon
+PIPELINE_STAGES: dict[str, bool] = {
+    'rescale': True,
+    'convert': True,
+    'target-size': True,
+    'anonymize': False,
+}
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of a pipeline spec such as ``rescale:50``; `value` is the parsed argument."""
+
+    name: str
+    argument: Optional[str] = None
+    value: Union[int, str, None] = None
+
+    def __str__(self) -> str:
+        return f"{self.name}:{self.argument}" if self.argument is not None else self.name
+
+
+def parse_stage(text: str) -> Stage:
+    name, _, argument = text.strip().partition(":")
+    name, argument = name.strip().lower(), argument.strip()
+
+    if name not in PIPELINE_STAGES:
+        raise ValueError(f"Unknown pipeline stage '{name}'. Supported: {', '.join(PIPELINE_STAGES)}")
+    if PIPELINE_STAGES[name] and not argument:
+        raise ValueError(f"Pipeline stage '{name}' needs an argument, e.g. '{name}:<value>'")
+    if not PIPELINE_STAGES[name] and argument:
+        raise ValueError(f"Pipeline stage '{name}' takes no argument, got: '{argument}'")
+
+    if name == 'rescale':
+        if not argument.isdigit():
+            raise ValueError(f"Rescale percentage must be a whole number, got: '{argument}'")
+        value = int(argument)
+        if not 0 < value <= 100:
+            raise PercentageRangeError(value)
+        return Stage(name, argument, value)
+
+    if name == 'convert':
+        argument = argument.lower()
+        if argument not in SUPPORTED_FORMATS:
+            raise ValueError(
+                f"Unsupported target format '{argument}'. Supported: {', '.join(SUPPORTED_FORMATS.keys())}"
+            )
+        return Stage(name, argument, argument)
+
+    if name == 'target-size':
+        return Stage(name, argument.upper(), parse_size(argument))
+
+    return Stage(name)
+
+
+def parse_pipeline(spec: str) -> list[Stage]:
+    """Parse a spec like ``"rescale:50 | convert:webp | target-size:200KB | anonymize"``."""
+    parts = [part for part in spec.split(STAGE_SEPARATOR) if part.strip()]
+    if not parts:
+        raise ValueError("Pipeline must contain at least one stage.")
+    return [parse_stage(part) for part in parts]
+
+
+def format_pipeline(stages: list[Stage]) -> str:
+    """The canonical spelling of a pipeline, used for display and cache keys."""
+    return f" {STAGE_SEPARATOR} ".join(str(stage) for stage in stages)
+
+
+def final_format(stages: list[Stage]) -> Optional[str]:
+    """The format chosen by the last convert stage, if there is one."""
+    formats = [str(stage.value) for stage in stages if stage.name == 'convert']
+    return formats[-1] if formats else None
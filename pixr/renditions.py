@@ -0,0 +1,102 @@
+"""
+Responsive renditions: one image written at several widths and in several formats.
+
+Outputs are named ``<stem>-<width>w.<format>`` so they can be listed in an ``srcset``
+directly; the optional JSON manifest records every rendition's file, dimensions and size,
+plus a ready-made ``srcset`` per format.
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from pixr import buffers
+
+if TYPE_CHECKING:
+    from pixr.api import Result
+
+
+def rendition_name(input_path: Path, width: int, format: str) -> str:
+    return f"{input_path.stem}-{width}w.{format}"
+
+
+@dataclass
+class RenditionsSummary:
+    input_path: Path
+    original_size: tuple[int, int]
+    outputs: list[tuple[Path, "Result"]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def total_size(self) -> int:
+        return sum(result.size for _, result in self.outputs)
+
+    def format(self) -> str:
+        return (
+            f"✓ {len(self.outputs)} rendition(s) of {self.input_path} in {self.total_size / 1024:.0f}KB "
+            f"({self.elapsed:.2f}s)"
+        )
+
+    def manifest(self, relative_to: Path) -> dict:
+        """The renditions as JSON-serializable data, with paths relative to `relative_to`."""
+        renditions = []
+        srcset: dict[str, list[str]] = {}
+        for output_path, result in self.outputs:
+            path = Path(os.path.relpath(output_path, relative_to)).as_posix()
+            renditions.append(
+                {
+                    "path": path,
+                    "format": result.params["format"],
+                    "width": result.width,
+                    "height": result.height,
+                    "bytes": result.size,
+                }
+            )
+            srcset.setdefault(result.params["format"], []).append(f"{path} {result.width}w")
+        return {
+            "source": Path(os.path.relpath(self.input_path, relative_to)).as_posix(),
+            "width": self.original_size[0],
+            "height": self.original_size[1],
+            "renditions": renditions,
+            "srcset": {format: ", ".join(entries) for format, entries in srcset.items()},
+        }
+
+
+def run_renditions(
+    input_path: Path,
+    widths: Iterable[int],
+    formats: Optional[Iterable[str]] = None,
+    output_dir: Optional[Path] = None,
+    manifest_path: Optional[Path] = None,
+    quality: int = 85,
+    effort: str = 'balanced',
+    resample: str = 'lanczos',
+    jobs: Optional[int] = None,
+    verbose: bool = False,
+) -> RenditionsSummary:
+    """Write every width × format of `input_path` into `output_dir` (next to the input by default)."""
+    from pixr import api
+
+    start = time.perf_counter()
+    output_dir = output_dir or input_path.parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    with buffers.spill_to(output_dir), open(input_path, "rb") as f:
+        results = api.renditions(f, widths, formats, quality, effort, resample, jobs)
+        summary = RenditionsSummary(input_path, results[0].params["original_size"])
+        for result in results:
+            output_path = output_dir / rendition_name(input_path, result.width, result.params["format"])
+            assert result.data is not None
+            buffers.write_atomic(output_path, result.data)
+            summary.outputs.append((output_path, result))
+            if verbose:
+                print(f"  {output_path} ({result.width}x{result.height}, {result.size / 1024:.0f}KB)")
+
+    if manifest_path is not None:
+        manifest = json.dumps(summary.manifest(manifest_path.parent), indent=2) + "\n"
+        buffers.write_atomic(manifest_path, manifest.encode())
+    summary.elapsed = time.perf_counter() - start
+    return summary
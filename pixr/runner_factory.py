@@ -1,22 +1,33 @@
+from importlib import import_module
+
 from pixr.command.core import Command, CommandType
-from pixr.runners.anonymize import AnonymizeRunner
 from pixr.runners.base import BaseRunner
-from pixr.runners.convert import ConvertRunner
-from pixr.runners.rescale import RescaleRunner
-from pixr.runners.target_size import TargetSizeRunner
 
 
 class RunnerFactory:
-    _runners: dict[CommandType, type[BaseRunner]] = {
-        CommandType.TARGET_SIZE: TargetSizeRunner,
-        CommandType.RESCALE: RescaleRunner,
-        CommandType.CONVERT: ConvertRunner,
-        CommandType.ANONYMIZE: AnonymizeRunner,
+    # Runners are imported on first use, so running one command never loads the
+    # strategies, codecs and helpers of the others.
+    _runners: dict[CommandType, str] = {
+        CommandType.TARGET_SIZE: "pixr.runners.target_size:TargetSizeRunner",
+        CommandType.RESCALE: "pixr.runners.rescale:RescaleRunner",
+        CommandType.CONVERT: "pixr.runners.convert:ConvertRunner",
+        CommandType.ANONYMIZE: "pixr.runners.anonymize:AnonymizeRunner",
+        CommandType.PIPELINE: "pixr.runners.pipeline:PipelineRunner",
     }
 
     @staticmethod
-    def create_runner(command: Command):
-        runner_cls = RunnerFactory._runners.get(command.argument)
-        if not runner_cls:
+    def runner_class(command: Command) -> type[BaseRunner]:
+        if command.options.remote:
+            from pixr.runners.remote import RemoteRunner
+
+            return RemoteRunner
+
+        runner_path = RunnerFactory._runners.get(command.argument)
+        if not runner_path:
             raise ValueError(f"Unhandled creation command argument: '{command.argument}'!")
-        return runner_cls(command)
+        module_name, class_name = runner_path.split(":")
+        return getattr(import_module(module_name), class_name)
+
+    @staticmethod
+    def create_runner(command: Command):
+        return RunnerFactory.runner_class(command)(command)
@@ -1,4 +1,4 @@
-from pixr.anonymize import purify_image
+from pixr import api
 from pixr.runners.base import BaseRunner
 
 
@@ -10,7 +10,18 @@ class AnonymizeRunner(BaseRunner):
         input_path = self._validate_input_file()
         output_path = self._determine_output_path(suffix="_anonymized")
 
-        if purify_image(input_path, output_path):
-            print(f"Successfully anonymized {input_path} -> {output_path}")
-        else:
+        if self._restore_from_cache(input_path, output_path):
+            return
+
+        try:
+            with open(input_path, "rb") as f:
+                self.result = result = api.anonymize(f)
+        except (IOError, OSError, ValueError) as e:
+            print(f"Could not process file {input_path}. It might not be a valid image. Error: {e}")
             print(f"Failed to anonymize {input_path}")
+            return
+
+        assert result.data is not None
+        self._write_output(output_path, result.data)
+        self._store_in_cache(output_path)
+        print(f"Successfully anonymized {input_path} -> {output_path}")
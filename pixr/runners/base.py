@@ -1,8 +1,17 @@
+import time
 from abc import ABC, abstractmethod
+from functools import cached_property
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, ContextManager, Optional
 
+from pixr import buffers, stats
+from pixr.buffers import BytesLike
+from pixr.cache import DEFAULT_MAX_SIZE, ResultCache
 from pixr.command.core import Command
+from pixr.utils import parse_size
+
+if TYPE_CHECKING:
+    from pixr.api import Result
 
 
 class BaseRunner(ABC):
@@ -10,12 +19,42 @@ class BaseRunner(ABC):
 
     def __init__(self, command: Command) -> None:
         self.command = command
+        self._cache_key: Optional[str] = None
+        self.result: Optional["Result"] = None  # set once the operation ran (not on cache hits)
 
     @abstractmethod
     def run(self) -> None:
         """Execute the runner's main operation."""
         pass
 
+    def execute(self) -> None:
+        """Run the operation, reporting its stats when the `stats` option asks for them."""
+        report_format = self.command.options.stats
+        if not report_format:
+            with self._spilling():
+                self.run()
+            return
+
+        input_path = Path(self.command.options.file_path)
+        record = stats.FileStats(self.command.argument.value, str(input_path))
+        record.bytes_read = input_path.stat().st_size if input_path.is_file() else 0
+        stats.reset_peak_rss()
+        start = time.perf_counter()
+        try:
+            with stats.hooked(record), self._spilling():
+                self.run()
+        except Exception as e:
+            record.error = str(e) or type(e).__name__
+            raise
+        finally:
+            record.seconds = time.perf_counter() - start
+            record.peak_rss_kb = stats.peak_rss_kb()
+            record.report(report_format)
+
+    def _spilling(self) -> ContextManager[Path]:
+        """Let large encodings spill into the output directory, where writing them out is a rename."""
+        return buffers.spill_to(self._determine_output_path().parent)
+
     def _validate_input_file(self) -> Path:
         """Validate that the input file exists and is readable."""
         file_path = Path(self.command.options.file_path)
@@ -29,7 +68,13 @@ class BaseRunner(ABC):
         return file_path
 
     def _determine_output_path(self, suffix: Optional[str] = None, extension: Optional[str] = None) -> Path:
-        """Determine the output file path based on input path and options."""
+        """
+        Determine the output file path based on input path and options.
+
+        When an output directory is set (e.g. by batch mode mirroring an input tree), the
+        input file name is kept as-is; the suffix is only needed to avoid clobbering the
+        input when writing next to it.
+        """
         input_path = Path(self.command.options.file_path)
 
         output_path_option = self.command.options.output_path
@@ -37,10 +82,44 @@ class BaseRunner(ABC):
         if output_path_option:
             return Path(output_path_option)
 
+        output_dir = Path(self.command.options.output_dir or input_path.parent)
+
         stem = input_path.stem
-        if suffix:
+        if suffix and output_dir.resolve() == input_path.parent.resolve():
             stem += suffix
 
         extension = extension or input_path.suffix
 
-        return input_path.parent / f"{stem}{extension}"
+        return output_dir / f"{stem}{extension}"
+
+    @staticmethod
+    def _write_output(output_path: Path, data: BytesLike) -> None:
+        with stats.stage("write"):
+            buffers.write_atomic(output_path, data)
+        stats.emit("output", path=str(output_path), bytes=len(data))
+
+    @cached_property
+    def cache(self) -> Optional[ResultCache]:
+        """The result cache, or None when caching is disabled."""
+        cache_dir = self.command.options.cache_dir
+        if not cache_dir:
+            return None
+        return ResultCache(Path(cache_dir), parse_size(self.command.options.cache_max_size or DEFAULT_MAX_SIZE))
+
+    def _restore_from_cache(self, input_path: Path, output_path: Path) -> bool:
+        """Write a previously cached result to `output_path`, if there is one."""
+        if self.cache is None:
+            return False
+
+        self._cache_key = self.cache.key_for(input_path, self.command, output_path)
+        if not self.cache.restore(self._cache_key, output_path):
+            return False
+
+        stats.emit("output", path=str(output_path), bytes=output_path.stat().st_size, cached=True)
+        print(f"✓ Restored {input_path} -> {output_path} from cache")
+        return True
+
+    def _store_in_cache(self, output_path: Path) -> None:
+        """Remember the output written for this command and input."""
+        if self.cache is not None and self._cache_key is not None:
+            self.cache.put(self._cache_key, output_path)
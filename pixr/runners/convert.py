@@ -1,9 +1,6 @@
 from pathlib import Path
-from typing import Optional
 
-from PIL import Image
-
-from pixr.formats import SUPPORTED_FORMATS
+from pixr import api
 from pixr.runners import BaseRunner
 
 
@@ -21,52 +18,28 @@ class ConvertRunner(BaseRunner):
 
         output_path = self._determine_output_path(suffix="_converted", extension=f".{target_format}")
 
-        original_size = input_path.stat().st_size
-
-        self._convert_image(input_path, output_path, target_format, quality)
-
-        converted_size = output_path.stat().st_size
-        self._report_conversion_results(input_path, output_path, original_size, converted_size)
-
-    def _detect_source_format(self, image_path: Path) -> str:
-        """Detect the format of the source image."""
-        try:
-            with Image.open(image_path) as img:
-                return img.format.lower() if img.format else 'unknown'
-        except Exception as e:
-            raise ValueError(f"Cannot detect format of {image_path}: {e}")
+        if self._restore_from_cache(input_path, output_path):
+            return
 
-    def _convert_image(self, input_path: Path, output_path: Path, target_format: str, quality: Optional[int]) -> None:
-        """Perform the actual image conversion."""
-        try:
-            with Image.open(input_path) as img:
-                if target_format in ['jpeg', 'jpg'] and img.mode in ['RGBA', 'LA']:
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'RGBA':
-                        background.paste(img, mask=img.split()[-1])  # Use alpha channel as mask
-                    else:
-                        background.paste(img)
-                    img = background
-
-                save_kwargs = {}
-                pil_format = SUPPORTED_FORMATS[target_format]
-
-                if target_format in ['jpeg', 'jpg', 'webp']:
-                    save_kwargs['quality'] = quality
-                    save_kwargs['optimize'] = True
-
-                if target_format == 'webp':
-                    save_kwargs['method'] = 6
-                    if self._detect_source_format(input_path) in ['jpeg', 'jpg']:
-                        if quality >= 90:
-                            save_kwargs['lossless'] = True
-                        else:
-                            save_kwargs['quality'] = min(quality - 5, 80)
-
-                img.save(output_path, format=pil_format, **save_kwargs)
+        original_size = input_path.stat().st_size
 
-        except Exception as e:
-            raise RuntimeError(f"Failed to convert image: {e}")
+        with open(input_path, "rb") as f:
+            self.result = result = api.convert(
+                f,
+                target_format,
+                quality,
+                self.command.options.effort,
+                min_ssim=self.command.options.min_ssim,
+                ssim_downsample=self.command.options.ssim_downsample,
+            )
+        assert result.data is not None
+        self._write_output(output_path, result.data)
+        self._store_in_cache(output_path)
+
+        self._report_conversion_results(input_path, output_path, original_size, result.size)
+        if "ssim" in result.params:
+            not_met = " (below the minimum at every quality)" if result.params["ssim_not_met"] else ""
+            print(f"  Quality {result.params['quality']}, SSIM {result.params['ssim']:.4f}{not_met}")
 
     def _report_conversion_results(
         self, input_path: Path, output_path: Path, original_size: int, converted_size: int
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from PIL import Image
+
+from pixr import api, stats
+from pixr.pipeline import final_format, parse_pipeline
+from pixr.runners.base import BaseRunner
+
+
+class PipelineRunner(BaseRunner):
+    """Runner chaining several operations over a single decode and a single encode."""
+
+    def run(self) -> None:
+        input_path = self._validate_input_file()
+        options = self.command.options
+        if not options.pipeline:
+            raise ValueError("A pipeline spec is required, e.g. 'rescale:50 | convert:webp'.")
+        stages = parse_pipeline(options.pipeline)
+
+        with stats.stage("open"):
+            img = Image.open(input_path)
+        with img:
+            target_format = final_format(stages)
+            if target_format is None:
+                # Without a convert stage the image is re-encoded in its own format, or as PNG
+                target_format = "jpg" if img.format == "JPEG" else api.source_format(img)
+            output_path = self._determine_output_path(suffix="_pipeline", extension=f".{target_format}")
+
+            if self._restore_from_cache(input_path, output_path):
+                return
+
+            self.result = result = api.pipeline(
+                img, stages, options.quality, options.effort, options.resample, options.wild, options.probe
+            )
+
+        if not result.data:
+            print(
+                f"❌ Could not meet target of {result.params['target_bytes'] / 1024:.0f}KB. "
+                f"Smallest possible size is {result.params['smallest_size'] / 1024:.0f}KB."
+            )
+            return
+
+        self._write_output(output_path, result.data)
+        self._store_in_cache(output_path)
+        self._report_result(input_path, output_path, result)
+
+    def _report_result(self, input_path: Path, output_path: Path, result: api.Result) -> None:
+        params = result.params
+
+        quality_info = ""
+        if "quality" in params:
+            quality_info = f", quality: {params['quality']}"
+        elif "info" in params:
+            quality_info = f", {params['info']}"
+
+        print(
+            f"✓ Pipeline '{self.command.options.pipeline}': {input_path} → "
+            f"{output_path} ({result.width}x{result.height}, {result.size / 1024:.0f}KB{quality_info})"
+        )
+
+        target_bytes = params.get("target_bytes")
+        if target_bytes is not None and result.size > target_bytes:
+            print(f"ℹ️ Could not meet target of {target_bytes / 1024:.0f}KB while maintaining min quality.")
+
+        if self.command.options.verbose and "probes" in params:
+            print(f"  Encoder probes: {params['probes']}")
@@ -0,0 +1,135 @@
+import http.client
+import json
+import shutil
+import socket
+from typing import Optional
+from urllib.parse import urlencode, urlsplit
+
+from pixr import buffers, stats
+from pixr.cache import UNKEYED_OPTIONS
+from pixr.command.core import CommandType
+from pixr.command.exceptions import PixrError
+from pixr.formats import SERVE_HOST, SERVE_PORT
+from pixr.pipeline import final_format, parse_pipeline
+from pixr.runners.base import BaseRunner
+from pixr.runners.rescale import RescaleRunner
+
+REQUEST_TIMEOUT = 300
+
+
+class RemoteError(PixrError):
+    """Custom error that is raised when a pixr server rejects or fails a request."""
+
+    ...
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """An HTTP connection over a Unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: float = REQUEST_TIMEOUT):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def connect(remote: str) -> http.client.HTTPConnection:
+    """Connect to ``unix:/path/to.sock``, ``http://host:port`` or plain ``host:port``."""
+    if remote.startswith("unix:"):
+        return UnixHTTPConnection(remote.removeprefix("unix:"))
+    url = urlsplit(remote if "://" in remote else f"http://{remote}")
+    return http.client.HTTPConnection(url.hostname or SERVE_HOST, url.port or SERVE_PORT, timeout=REQUEST_TIMEOUT)
+
+
+class RemoteRunner(BaseRunner):
+    """
+    Runner that sends the input to a `pixr serve` daemon instead of processing it locally.
+
+    Output paths follow the same rules as the local runners, so scripts can switch over
+    by adding ``--remote``; the result cache is left to the local runners.
+    """
+
+    SUFFIXES: dict[CommandType, str] = {
+        CommandType.CONVERT: "_converted",
+        CommandType.TARGET_SIZE: "_targeted",
+        CommandType.ANONYMIZE: "_anonymized",
+        CommandType.PIPELINE: "_pipeline",
+    }
+
+    def run(self) -> None:
+        input_path = self._validate_input_file()
+        options = self.command.options
+        query = {
+            key: value
+            for key, value in options.model_dump(exclude=UNKEYED_OPTIONS).items()
+            if value is not None and value is not False
+        }
+        if self.command.argument == CommandType.RESCALE:
+            # The local runner encodes in the format the output path's extension implies
+            output_format = RescaleRunner._output_format(self._determine_output_path(suffix=self._suffix()))
+            if output_format:
+                query["format"] = output_format
+
+        assert options.remote is not None
+        connection = connect(options.remote)
+        try:
+            with stats.stage("remote"), open(input_path, "rb") as f:
+                # Only network errors are the server's; local read and write errors propagate as they are
+                try:
+                    connection.request(
+                        "POST",
+                        f"/{self.command.argument.value}?{urlencode(query)}",
+                        body=f,
+                        headers={"Content-Length": str(input_path.stat().st_size)},
+                    )
+                    response = connection.getresponse()
+                except OSError as e:
+                    raise RemoteError(f"Could not reach pixr server at {options.remote}: {e}")
+            if response.status != 200:
+                raise RemoteError(f"{options.remote} answered {response.status}: {response.read().decode()}")
+
+            output_path = self._determine_output_path(
+                suffix=self._suffix(), extension=self._extension(response.getheader("X-Pixr-Format"))
+            )
+            with stats.stage("write"), buffers.atomic_output(output_path) as out:
+                shutil.copyfileobj(response, out)
+        finally:
+            connection.close()
+
+        # The server's own stages are reported under a "server:" prefix
+        for name, seconds in json.loads(response.getheader("X-Pixr-Timings") or "{}").items():
+            stats.emit("stage", stage=f"server:{name}", seconds=seconds)
+        stats.emit("output", path=str(output_path), bytes=output_path.stat().st_size)
+
+        params = json.loads(response.getheader("X-Pixr-Params") or "{}")
+        print(
+            f"✓ {self.command.argument.value} {input_path} → {output_path} "
+            f"({response.getheader('X-Pixr-Width')}x{response.getheader('X-Pixr-Height')}, "
+            f"{output_path.stat().st_size / 1024:.0f}KB) via {options.remote}"
+        )
+        target_bytes = params.get("target_bytes")
+        if target_bytes is not None and output_path.stat().st_size > target_bytes:
+            print(f"ℹ️ Could not meet target of {target_bytes / 1024:.0f}KB while maintaining min quality.")
+        if options.verbose:
+            print(f"  Parameters: {params}")
+
+    def _suffix(self) -> str:
+        if self.command.argument == CommandType.RESCALE:
+            return f"_rescaled_{self.command.options.percentage}pct"
+        return self.SUFFIXES[self.command.argument]
+
+    def _extension(self, result_format: Optional[str]) -> Optional[str]:
+        """The extension the local runner would pick; target-size and pipelines follow the returned format."""
+        if self.command.argument == CommandType.CONVERT:
+            return f".{self.command.options.target_format}"
+        if self.command.argument == CommandType.PIPELINE:
+            assert self.command.options.pipeline is not None
+            target_format = final_format(parse_pipeline(self.command.options.pipeline))
+            if target_format:
+                return f".{target_format}"
+        if self.command.argument in (CommandType.TARGET_SIZE, CommandType.PIPELINE) and result_format:
+            return ".jpg" if result_format == "JPEG" else f".{result_format.lower()}"
+        return None
@@ -1,5 +1,9 @@
-from PIL import Image, ImageSequence
+from pathlib import Path
+from typing import Optional
 
+from PIL import Image
+
+from pixr import api
 from pixr.runners import BaseRunner
 
 
@@ -7,32 +11,29 @@ class RescaleRunner(BaseRunner):
     def run(self) -> None:
         """Rescale image by percentage."""
         input_path = self._validate_input_file()
-        output_path = self._determine_output_path(suffix=f"_rescaled_{self.command.options.percentage}pct")
-
-        with Image.open(input_path) as img:
-            original_dims = f"{img.width}x{img.height}"
-            scale = self.command.options.percentage / 100.0
-            new_width = int(img.width * scale)
-            new_height = int(img.height * scale)
-            new_dims = f"{new_width}x{new_height}"
-
-            if getattr(img, "is_animated", False):
-                frames = []
-                for frame in ImageSequence.Iterator(img):
-                    resized_frame = frame.convert("RGBA").resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    frames.append(resized_frame)
-
-                if frames:
-                    frames[0].save(
-                        output_path,
-                        save_all=True,
-                        append_images=frames[1:],
-                        duration=img.info.get("duration", 100),
-                        loop=img.info.get("loop", 0),
-                        disposal=2,
-                    )
-            else:
-                new_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                new_img.save(output_path)
-
-            print(f"Rescaled {input_path} ({original_dims}) to {new_dims} and saved to {output_path}")
+        percentage = self.command.options.percentage
+        assert percentage is not None
+        output_path = self._determine_output_path(suffix=f"_rescaled_{percentage}pct")
+
+        if self._restore_from_cache(input_path, output_path):
+            return
+
+        with open(input_path, "rb") as f:
+            self.result = result = api.rescale(
+                f, percentage, self.command.options.resample, self._output_format(output_path)
+            )
+
+        assert result.data is not None
+        self._write_output(output_path, result.data)
+        self._store_in_cache(output_path)
+
+        original_width, original_height = result.params["original_size"]
+        print(
+            f"Rescaled {input_path} ({original_width}x{original_height}) to {result.width}x{result.height} "
+            f"and saved to {output_path}"
+        )
+
+    @staticmethod
+    def _output_format(output_path: Path) -> Optional[str]:
+        """The format implied by the output file's extension, if Pillow knows it."""
+        return Image.registered_extensions().get(output_path.suffix.lower())
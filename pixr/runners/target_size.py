@@ -1,72 +1,95 @@
+from pathlib import Path
+
 from PIL import Image
 
-from pixr.formats import TARGET_SIZE_FORMATS
+from pixr import api, stats
 from pixr.runners import BaseRunner
-from pixr.strategies.factory import StrategyFactory
 from pixr.utils import parse_size
 
 
 class TargetSizeRunner(BaseRunner):
     def run(self) -> None:
         """
-        Adjusts an image's compression to meet a target file size
+        Adjusts an image's compression to meet a target file size, a minimum SSIM or both
         by delegating to a format-specific strategy.
         """
         input_path = self._validate_input_file()
-        if self.command.options.max_size is None:
-            raise ValueError("max_size must be provided for the target-size command.")
-        target_bytes = parse_size(self.command.options.max_size)
+        options = self.command.options
+        if options.max_size is None and options.min_ssim is None:
+            raise ValueError("max_size or min_ssim must be provided for the target-size command.")
+        target_bytes = parse_size(options.max_size) if options.max_size is not None else None
         wild_mode = self.command.options.wild
 
-        with Image.open(input_path) as img:
-            if img.format.upper() not in TARGET_SIZE_FORMATS:
-                raise ValueError(
-                    f"Input file format '{img.format}' is not supported for target-size. "
-                    f"Supported formats are: {', '.join(sorted(TARGET_SIZE_FORMATS))}."
-                )
+        with stats.stage("open"):
+            img = Image.open(input_path)
+        with img:
+            output_extension = f".{(img.format or '').lower()}"
+            if img.format == 'JPEG':
+                output_extension = ".jpg"
 
-            if getattr(img, "is_animated", False) and img.format.upper() != 'GIF':
-                raise NotImplementedError("Target size for animated images (except GIF) is not supported.")
+            output_path = self._determine_output_path(suffix="_targeted", extension=output_extension)
 
-            strategy = StrategyFactory.get_strategy(img, target_bytes, wild_mode)
-            result = strategy.optimize()
+            if self._restore_from_cache(input_path, output_path):
+                return
 
-            best_result_data = result["best_result_data"]
-            best_params = result["best_params"]
+            self.result = result = api.target_size(
+                img,
+                target_bytes,
+                wild_mode,
+                self.command.options.probe,
+                downscale=self.command.options.downscale,
+                resample=self.command.options.resample,
+                min_ssim=options.min_ssim,
+                ssim_downsample=options.ssim_downsample,
+            )
 
-            output_extension = f".{img.format.lower()}"
-            if img.format.upper() == 'JPEG':
-                output_extension = ".jpg"
+        if result.data:
+            self._write_output(output_path, result.data)
+            self._store_in_cache(output_path)
+            self._report_result(input_path, output_path, result)
+        else:
+            assert target_bytes is not None  # only a size target can leave nothing to write
+            print(
+                f"❌ Could not meet target of {target_bytes / 1024:.0f}KB. "
+                f"Smallest possible size is {result.params['smallest_size'] / 1024:.0f}KB."
+            )
 
-            output_path = self._determine_output_path(suffix="_targeted", extension=output_extension)
+    def _report_result(self, input_path: Path, output_path: Path, result: api.Result) -> None:
+        best_params = result.params
+        target_bytes = best_params["target_bytes"]
+        original_size_kb = input_path.stat().st_size / 1024
+        final_size_bytes = result.size
+        final_size_kb = final_size_bytes / 1024
 
-            if best_result_data:
-                with open(output_path, "wb") as f:
-                    f.write(best_result_data)
+        quality_info = ""
+        if "ssim" in best_params:
+            quality_info = f"(quality: {best_params['quality']}, SSIM: {best_params['ssim']:.4f})"
+        elif "quality" in best_params:
+            quality_info = f"(quality: {best_params['quality']})"
+        elif "info" in best_params:
+            quality_info = f"({best_params['info']})"
 
-                original_size_kb = input_path.stat().st_size / 1024
-                final_size_bytes = len(best_result_data)
-                final_size_kb = final_size_bytes / 1024
+        if "scale" in best_params:
+            original_width, original_height = best_params["original_size"]
+            quality_info += f" downscaled from {original_width}x{original_height} to {result.width}x{result.height}"
 
-                quality_info = ""
-                if "quality" in best_params:
-                    quality_info = f"(quality: {best_params['quality']})"
-                elif "info" in best_params:
-                    quality_info = f"({best_params['info']})"
+        if best_params.get("ssim_not_met"):
+            reason = f"within {target_bytes / 1024:.0f}KB" if "ssim" not in best_params else "at any quality"
+            print(
+                f"ℹ️ Could not reach SSIM {self.command.options.min_ssim} {reason}. "
+                f"Best result: {final_size_kb:.0f}KB {quality_info}. Output: {output_path}"
+            )
+        elif target_bytes is not None and final_size_bytes > target_bytes:
+            print(
+                f"ℹ️ Could not meet target of {target_bytes / 1024:.0f}KB while maintaining min quality. "
+                f"Best result: {final_size_kb:.0f}KB {quality_info}. Output: {output_path}"
+            )
+        else:
+            target = "Target size" if target_bytes is not None else "Target SSIM"
+            print(
+                f"✓ {target} achieved: {original_size_kb:.0f}KB → {final_size_kb:.0f}KB "
+                f"{quality_info}. Output: {output_path}"
+            )
 
-                if final_size_bytes > target_bytes:
-                    print(
-                        f"ℹ️ Could not meet target of {target_bytes / 1024:.0f}KB while maintaining min quality. "
-                        f"Best result: {final_size_kb:.0f}KB {quality_info}. Output: {output_path}"
-                    )
-                else:
-                    print(
-                        f"✓ Target size achieved: {original_size_kb:.0f}KB → {final_size_kb:.0f}KB "
-                        f"{quality_info}. Output: {output_path}"
-                    )
-            else:
-                smallest_size_kb = result["smallest_size"] / 1024
-                print(
-                    f"❌ Could not meet target of {target_bytes / 1024:.0f}KB. "
-                    f"Smallest possible size is {smallest_size_kb:.0f}KB."
-                )
+        if self.command.options.verbose:
+            print(f"  Encoder probes: {best_params['probes']}")
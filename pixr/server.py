@@ -0,0 +1,285 @@
+"""
+A long-running pixr daemon serving the CLI operations over localhost HTTP or a Unix socket.
+
+Requests are ``POST /<command>?<options>`` with the encoded image as the body, where the
+command and options are the CLI's (e.g. ``POST /rescale?percentage=50&resample=fast``).
+The response body is the encoded result; its format, dimensions, chosen parameters and
+timings are returned in ``X-Pixr-*`` headers. Work runs on a pool of worker processes
+forked and warmed up at startup; once every worker is busy and the queue is full, new
+requests are rejected with 503 instead of piling up.
+"""
+
+import json
+import os
+import socketserver
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from PIL import Image
+from pydantic import ValidationError
+
+from pixr import api
+from pixr.buffers import BytesLike
+from pixr.cache import UNKEYED_OPTIONS
+from pixr.command.core import Command, CommandType, validation_message
+from pixr.command.exceptions import PixrError
+from pixr.formats import SERVE_HOST, SERVE_PORT, SERVE_QUEUE_DEPTH
+
+MAX_REQUEST_BYTES = 256 * 1024**2
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Command -> options of which at least one must be given for it to make sense
+REQUIRED_OPTIONS: dict[CommandType, tuple[str, ...]] = {
+    CommandType.RESCALE: ("percentage",),
+    CommandType.CONVERT: ("target_format",),
+    CommandType.TARGET_SIZE: ("max_size", "min_ssim"),
+    CommandType.PIPELINE: ("pipeline",),
+}
+
+# Query parameter naming the Pillow format a rescale is encoded in; locally it comes from the output path
+OUTPUT_FORMAT_PARAMETER = "format"
+
+
+def command_from_request(argument: str, query: str) -> Command:
+    """Build a validated command from a request path and query string; paths are never taken from the client."""
+    ignored = UNKEYED_OPTIONS | {OUTPUT_FORMAT_PARAMETER}
+    options = {key: value for key, value in parse_qsl(query) if key not in ignored}
+    command = Command.from_cli(argument, {**options, "verbose": False, "file_path": "-"})
+
+    required = REQUIRED_OPTIONS.get(command.argument, ())
+    if required and all(getattr(command.options, option) is None for option in required):
+        names = " or ".join(f"'{option}'" for option in required)
+        raise ValueError(f"Option {names} is required for {command.argument.value}.")
+    return command
+
+
+def output_format_from_request(query: str) -> Optional[str]:
+    """The format a rescale is asked to be encoded in, or None to keep the source's."""
+    format = dict(parse_qsl(query)).get(OUTPUT_FORMAT_PARAMETER)
+    if format is None:
+        return None
+    Image.init()
+    if format.upper() not in Image.SAVE:
+        raise ValueError(f"Unsupported output format '{format}'.")
+    return format.upper()
+
+
+def execute(command: Command, data: bytes, output_format: Optional[str] = None) -> api.Result:
+    """Run a command on encoded image bytes through the in-process API."""
+    options = command.options
+    if command.argument == CommandType.RESCALE:
+        assert options.percentage is not None
+        return api.rescale(data, options.percentage, options.resample, output_format)
+    if command.argument == CommandType.CONVERT:
+        assert options.target_format is not None
+        return api.convert(
+            data,
+            options.target_format,
+            options.quality,
+            options.effort,
+            min_ssim=options.min_ssim,
+            ssim_downsample=options.ssim_downsample,
+        )
+    if command.argument == CommandType.TARGET_SIZE:
+        return api.target_size(
+            data,
+            options.max_size,
+            options.wild,
+            options.probe,
+            downscale=options.downscale,
+            resample=options.resample,
+            min_ssim=options.min_ssim,
+            ssim_downsample=options.ssim_downsample,
+        )
+    if command.argument == CommandType.ANONYMIZE:
+        return api.anonymize(data)
+    assert options.pipeline is not None
+    return api.pipeline(
+        data, options.pipeline, options.quality, options.effort, options.resample, options.wild, options.probe
+    )
+
+
+def _warm_up() -> int:
+    """Runs once per worker so the first real request does not pay for imports or forking."""
+    return os.getpid()
+
+
+class WorkerPool:
+    """A pre-forked process pool that admits at most `concurrency + queue_depth` requests."""
+
+    def __init__(self, concurrency: int, queue_depth: int = SERVE_QUEUE_DEPTH):
+        if concurrency < 1:
+            raise ValueError(f"Number of workers must be at least 1, got: {concurrency}")
+        if queue_depth < 0:
+            raise ValueError(f"Queue depth cannot be negative, got: {queue_depth}")
+        self.concurrency = concurrency
+        self.queue_depth = queue_depth
+        self.executor = ProcessPoolExecutor(max_workers=concurrency)
+        self._slots = threading.BoundedSemaphore(concurrency + queue_depth)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+        warm_up = [self.executor.submit(_warm_up) for _ in range(concurrency)]
+        for future in warm_up:
+            future.result()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def try_acquire(self) -> bool:
+        """Reserve a slot without waiting; False means the server is saturated."""
+        if not self._slots.acquire(blocking=False):
+            return False
+        with self._lock:
+            self._in_flight += 1
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def run(self, command: Command, data: bytes, output_format: Optional[str] = None) -> api.Result:
+        return self.executor.submit(execute, command, data, output_format).result()
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+
+class PixrRequestHandler(BaseHTTPRequestHandler):
+    server_version = "pixr"
+    protocol_version = "HTTP/1.1"
+    server: Union["PixrHTTPServer", "PixrUnixServer"]
+
+    @property
+    def pool(self) -> WorkerPool:
+        return self.server.pool
+
+    def address_string(self) -> str:
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path != "/health":
+            self._send_error(HTTPStatus.NOT_FOUND, "Not found.")
+            return
+        status = {"workers": self.pool.concurrency, "queue_depth": self.pool.queue_depth}
+        self._send(HTTPStatus.OK, json.dumps({**status, "in_flight": self.pool.in_flight}).encode(), "application/json")
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            self.close_connection = True
+            self._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Images are limited to {MAX_REQUEST_BYTES} bytes.")
+            return
+
+        # Every reply before the body is read closes the connection, since the body is left unread
+        try:
+            command = command_from_request(url.path.strip("/"), url.query)
+            output_format = output_format_from_request(url.query)
+        except ValidationError as e:
+            self.close_connection = True
+            self._send_error(HTTPStatus.BAD_REQUEST, validation_message(e))
+            return
+        except (ValueError, PixrError) as e:
+            self.close_connection = True
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+
+        # The slot is taken before the body is read, so a saturated server does not buffer uploads
+        if not self.pool.try_acquire():
+            self.close_connection = True
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, "Server is busy, try again later.", {"Retry-After": "1"})
+            return
+        try:
+            data = self.rfile.read(length)
+            result = self.pool.run(command, data, output_format)
+        except NotImplementedError as e:
+            self._send_error(HTTPStatus.NOT_IMPLEMENTED, str(e))
+            return
+        except (ValueError, RuntimeError, OSError, PixrError) as e:
+            self._send_error(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+            return
+        finally:
+            self.pool.release()
+
+        self._send_result(result)
+
+    def _send_result(self, result: api.Result) -> None:
+        headers = {
+            "X-Pixr-Format": result.format,
+            "X-Pixr-Width": str(result.width),
+            "X-Pixr-Height": str(result.height),
+            "X-Pixr-Params": json.dumps(result.params, default=str),
+            "X-Pixr-Timings": json.dumps(result.timings),
+        }
+        if not result.data:
+            self._send_error(HTTPStatus.UNPROCESSABLE_ENTITY, "Could not meet the size target.", headers)
+            return
+        self._send(HTTPStatus.OK, result.data, f"image/{result.format.lower()}", headers)
+
+    def _send_error(self, status: HTTPStatus, message: str, headers: Optional[dict] = None) -> None:
+        self._send(status, message.encode(), "text/plain; charset=utf-8", headers)
+
+    def _send(self, status: HTTPStatus, body: BytesLike, content_type: str, headers: Optional[dict] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        view = memoryview(body)
+        while view:
+            chunk, view = view[:STREAM_CHUNK_SIZE], view[STREAM_CHUNK_SIZE:]
+            self.wfile.write(chunk)
+
+
+class PixrHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], pool: WorkerPool, verbose: bool = False):
+        self.pool = pool
+        self.verbose = verbose
+        super().__init__(address, PixrRequestHandler)
+
+
+class PixrUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, pool: WorkerPool, verbose: bool = False):
+        self.pool = pool
+        self.verbose = verbose
+        self.socket_path = Path(socket_path)
+        self.socket_path.unlink(missing_ok=True)
+        super().__init__(str(self.socket_path), PixrRequestHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def create_server(
+    pool: WorkerPool,
+    host: str = SERVE_HOST,
+    port: int = SERVE_PORT,
+    socket_path: Optional[Path] = None,
+    verbose: bool = False,
+) -> socketserver.BaseServer:
+    """A server bound to a Unix socket when `socket_path` is given, else to host:port."""
+    if socket_path is not None:
+        return PixrUnixServer(socket_path, pool, verbose)
+    return PixrHTTPServer((host, port), pool, verbose)
@@ -0,0 +1,99 @@
+"""
+Structural similarity (SSIM) of encodings against their source, computed with NumPy.
+
+Scores follow Wang et al. (2004) on the luma plane, with the windows x264 uses: 8x8
+pixels on a 4-pixel grid. Their sums come from the sums of 4x4 blocks, which a reshape
+computes for the whole plane at once, so a score takes a few whole-array passes instead
+of a sliding window. The source's sums are computed once per search; scoring a probe
+costs a luma-only decode plus three block sums. With `downsample`, both planes are
+box-reduced first, which makes a score cheaper still at the price of seeing less of
+the finest artifacts.
+
+NumPy is optional: it is only imported here, and only a minimum-SSIM search needs it.
+"""
+
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+from PIL import Image
+
+from pixr.buffers import BytesLike
+from pixr.command.exceptions import MissingDependency
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    try:
+        import numpy as np
+    except ImportError:  # NumPy is optional; everything but --min-ssim works without it
+        np = None
+
+# Windows are 8x8 pixels on a 4-pixel grid, built from the sums of 4x4 blocks, as in x264
+BLOCK = 4
+WINDOW_PIXELS = (2 * BLOCK) ** 2
+DYNAMIC_RANGE = 255.0
+C1 = (0.01 * DYNAMIC_RANGE) ** 2
+C2 = (0.03 * DYNAMIC_RANGE) ** 2
+
+
+def require_numpy() -> None:
+    if np is None:
+        raise MissingDependency("Scoring SSIM needs NumPy; install it with `pip install numpy`.")
+
+
+def _window_sums(plane: "np.ndarray") -> "np.ndarray":
+    """The sum over every 8x8 window on a 4-pixel grid, or over the whole plane if it is smaller than a window."""
+    height, width = plane.shape[0] // BLOCK, plane.shape[1] // BLOCK
+    if height < 2 or width < 2:
+        return plane.sum(dtype=np.float64).reshape(1, 1) * (WINDOW_PIXELS / plane.size)
+    # Summing rows and then columns along contiguous axes is about twice as fast as one 4-D sum
+    rows = plane[: height * BLOCK, : width * BLOCK].reshape(height, BLOCK, width * BLOCK).sum(axis=1)
+    blocks = rows.reshape(height, width, BLOCK).sum(axis=2)
+    return blocks[:-1, :-1] + blocks[1:, :-1] + blocks[:-1, 1:] + blocks[1:, 1:]
+
+
+def luma_plane(img: Image.Image, downsample: int = 1) -> "np.ndarray":
+    """The image's luma (ITU-R 601) as float32, box-reduced by `downsample`."""
+    require_numpy()
+    luma = img if img.mode == 'L' else img.convert('L')
+    if downsample > 1:
+        luma = luma.reduce(downsample)
+    return np.asarray(luma, dtype=np.float32)
+
+
+class SsimReference:
+    """A source image prepared for scoring many encodings of it."""
+
+    def __init__(self, img: Image.Image, downsample: int = 1):
+        require_numpy()
+        self.downsample = downsample
+        self.plane = luma_plane(img, downsample)
+        self.sum = _window_sums(self.plane)
+        self.sum_squares = _window_sums(self.plane * self.plane)
+
+    def score(self, data: BytesLike) -> float:
+        """The mean SSIM of an encoding of the source image."""
+        with Image.open(BytesIO(data)) as img:
+            if img.format == 'JPEG':
+                img.draft('L', img.size)  # decode luma only, skipping chroma and color conversion
+            candidate = luma_plane(img, self.downsample)
+        return self.compare(candidate)
+
+    def compare(self, candidate: "np.ndarray") -> float:
+        if candidate.shape != self.plane.shape:
+            raise ValueError(f"Cannot compare a {candidate.shape} plane against a {self.plane.shape} one.")
+        n = WINDOW_PIXELS
+        sum_x, sum_y = self.sum, _window_sums(candidate)
+        sum_xx, sum_yy = self.sum_squares, _window_sums(candidate * candidate)
+        sum_xy = _window_sums(self.plane * candidate)
+        # The window statistics scaled by n^2, as in x264, which saves dividing every window
+        means = sum_x * sum_y
+        squares = sum_x * sum_x + sum_y * sum_y
+        numerator = (2 * means + C1 * n * n) * (2 * (n * sum_xy - means) + C2 * n * n)
+        denominator = (squares + C1 * n * n) * (n * (sum_xx + sum_yy) - squares + C2 * n * n)
+        return float((numerator / denominator).mean())
+
+
+def ssim(reference: Image.Image, candidate: Image.Image, downsample: int = 1) -> float:
+    """The mean SSIM of `candidate` against `reference`, two images of the same size."""
+    return SsimReference(reference, downsample).compare(luma_plane(candidate, downsample))
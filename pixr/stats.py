@@ -0,0 +1,143 @@
+"""
+Instrumentation hooks for pixr's operations.
+
+While at least one hook is registered, operations report what they spend time on as
+plain-dict events:
+
+- ``{"event": "stage", "stage": "decode", "seconds": ...}`` for every timed step
+  (open, decode, transform, search, encode, write, ...);
+- ``{"event": "probe", "params": {"quality": 80}, "size": ..., "seconds": ...}`` for
+  every trial encode a size search makes;
+- ``{"event": "output", "path": ..., "bytes": ..., "cached": ...}`` once a runner has
+  written its result.
+
+Hooks are process-wide and may be called from encoder worker threads. `FileStats` is the
+hook behind ``pixr --stats``: it folds the events of one input file into a single record.
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Iterator, Optional, TextIO
+
+Hook = Callable[[dict], None]
+
+_hooks: list[Hook] = []
+
+
+def add_hook(hook: Hook) -> None:
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    _hooks.remove(hook)
+
+
+@contextmanager
+def hooked(hook: Hook) -> Iterator[Hook]:
+    """Register `hook` for the duration of a block."""
+    add_hook(hook)
+    try:
+        yield hook
+    finally:
+        remove_hook(hook)
+
+
+def enabled() -> bool:
+    return bool(_hooks)
+
+
+def emit(event: str, **fields) -> None:
+    if not _hooks:
+        return
+    record = {"event": event, **fields}
+    for hook in tuple(_hooks):
+        hook(record)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block and report it as a stage event."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        emit("stage", stage=name, seconds=time.perf_counter() - start)
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident memory of this process, or None where it cannot be read."""
+    # VmHWM belongs to this process image, whereas Linux carries ru_maxrss over from the parent across exec
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def reset_peak_rss() -> bool:
+    """Restart peak memory tracking at the current RSS, so it covers one file in a long-lived process."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+@dataclass
+class FileStats:
+    """A hook collecting the events of processing one input file."""
+
+    command: str
+    input: str
+    output: Optional[str] = None
+    seconds: float = 0.0
+    stages: dict[str, float] = field(default_factory=dict)
+    probes: list[dict] = field(default_factory=list)
+    bytes_read: int = 0
+    bytes_written: int = 0
+    peak_rss_kb: Optional[int] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+    def __call__(self, event: dict) -> None:
+        kind = event["event"]
+        if kind == "stage":
+            self.stages[event["stage"]] = self.stages.get(event["stage"], 0.0) + event["seconds"]
+        elif kind == "probe":
+            self.probes.append({key: value for key, value in event.items() if key != "event"})
+        elif kind == "output":
+            self.output = event["path"]
+            self.bytes_written += event["bytes"]
+            self.cached = event.get("cached", False)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), default=str)
+
+    def format(self) -> str:
+        stages = []
+        for name, seconds in self.stages.items():
+            probes = f" ({len(self.probes)} probes)" if name == "search" and self.probes else ""
+            stages.append(f"{name} {seconds * 1000:.1f}ms{probes}")
+        memory = f", peak RSS {self.peak_rss_kb / 1024:.0f}MB" if self.peak_rss_kb else ""
+        status = f", failed: {self.error}" if self.error else " (from cache)" if self.cached else ""
+        return (
+            f"⏱ {self.input}: {self.seconds * 1000:.1f}ms total; {', '.join(stages) or 'no stages'}; "
+            f"read {self.bytes_read / 1024:.0f}KB, wrote {self.bytes_written / 1024:.0f}KB{memory}{status}"
+        )
+
+    def report(self, format: str = 'text', stream: Optional[TextIO] = None) -> None:
+        """Write the record as one line: human-readable text, or JSON for machine consumers."""
+        stream = stream or sys.stderr
+        stream.write((self.to_json() if format == 'json' else self.format()) + "\n")
+        stream.flush()
@@ -1,6 +1,14 @@
 from .base import BaseOptimizationStrategy
+from .gif import GifStrategy
 from .jpeg import JpegStrategy
 from .png import PngStrategy
-from .webp import WebPStrategy
+from .webp import AnimatedWebPStrategy, WebPStrategy
 
-__all__ = ["BaseOptimizationStrategy", "JpegStrategy", "PngStrategy", "WebPStrategy"]
+__all__ = [
+    "AnimatedWebPStrategy",
+    "BaseOptimizationStrategy",
+    "GifStrategy",
+    "JpegStrategy",
+    "PngStrategy",
+    "WebPStrategy",
+]
@@ -1,13 +1,35 @@
+import copy
 from abc import ABC, abstractmethod
+from typing import Optional
 
 from PIL import Image
 
+from .probing import Encoder, FullResolutionProbing, ProbingMode, ProxyProbing
+
+PROBING_MODES: dict[str, type[ProbingMode]] = {
+    'full': FullResolutionProbing,
+    'proxy': ProxyProbing,
+}
+
 
 class BaseOptimizationStrategy(ABC):
-    def __init__(self, img: Image.Image, target_bytes: int, wild_mode: bool):
+    # Whether `encode(quality, final=False)` uses a faster encoder setting than the final encode
+    fast_probes = False
+
+    def __init__(
+        self,
+        img: Image.Image,
+        target_bytes: int,
+        wild_mode: bool,
+        probe_mode: str = 'full',
+        metadata: Optional[dict] = None,
+    ):
         self.img = img
         self.target_bytes = target_bytes
         self.wild_mode = wild_mode
+        self.probing = PROBING_MODES[probe_mode]()
+        # Save options such as EXIF or an ICC profile, written into every encoding so they count towards the target
+        self.metadata = metadata or {}
 
     @abstractmethod
     def optimize(self) -> dict:
@@ -23,3 +45,39 @@ class BaseOptimizationStrategy(ABC):
             }
         """
         pass
+
+    @property
+    @abstractmethod
+    def prepared(self) -> Image.Image:
+        """The image as the encoder sees it, e.g. converted to a mode the format can store."""
+
+    def quality_range(self) -> tuple[int, int]:
+        """The lowest and highest quality the search may choose."""
+        return (1 if self.wild_mode else 50), 100
+
+    def probe_size(self, quality: int) -> int:
+        """The size of a quick encode at `quality`, for callers that sample the size curve themselves."""
+        raise NotImplementedError(f"{type(self).__name__} has no quality setting to probe.")
+
+    def encode(self, quality: int, final: bool = True) -> memoryview:
+        """The image encoded at `quality`; with `final=False`, a quicker encoder setting may be used."""
+        raise NotImplementedError(f"{type(self).__name__} has no quality setting to encode at.")
+
+    def with_image(self, img: Image.Image) -> "BaseOptimizationStrategy":
+        """The same search over another image, such as a downscaled copy of this one."""
+        clone = copy.copy(self)
+        clone.img = img
+        clone.__dict__.pop('prepared', None)
+        return clone
+
+    def _search_quality(
+        self, encode: Encoder, img: Image.Image, low: int, high: int, target_bytes: Optional[int] = None
+    ) -> dict:
+        """
+        Search for the highest quality in [low, high] that fits the target size.
+
+        `encode` returns a buffer holding the given image encoded at the given quality;
+        how the size curve is probed is up to the strategy's probing mode. Strategies
+        that re-encode the winner differently can search against a tighter target.
+        """
+        return self.probing.search(encode, img, target_bytes or self.target_bytes, low, high)
@@ -1,19 +1,42 @@
+from typing import Optional
+
 from PIL import Image
 
-from pixr.strategies import BaseOptimizationStrategy, JpegStrategy, PngStrategy, WebPStrategy
+from pixr.strategies import (
+    AnimatedWebPStrategy,
+    BaseOptimizationStrategy,
+    GifStrategy,
+    JpegStrategy,
+    PngStrategy,
+    WebPStrategy,
+)
 
 
 class StrategyFactory:
     @staticmethod
-    def get_strategy(img: Image.Image, target_bytes: int, wild_mode: bool) -> BaseOptimizationStrategy:
-        format = img.format.upper()
+    def get_strategy(
+        img: Image.Image,
+        target_bytes: int,
+        wild_mode: bool,
+        probe_mode: str = 'full',
+        format: Optional[str] = None,
+        metadata: Optional[dict] = None,
+    ) -> BaseOptimizationStrategy:
+        """
+        Pick the strategy for `format`, which defaults to the format the image was decoded from.
+
+        `metadata` holds save options such as EXIF to write into still encodings; animations ignore it.
+        """
+        format = (format or img.format or 'JPEG').upper()
         if format == 'JPEG':
-            return JpegStrategy(img, target_bytes, wild_mode)
+            return JpegStrategy(img, target_bytes, wild_mode, probe_mode, metadata)
         elif format == 'PNG':
-            return PngStrategy(img, target_bytes, wild_mode)
+            return PngStrategy(img, target_bytes, wild_mode, probe_mode, metadata)
+        elif format == 'WEBP' and getattr(img, "is_animated", False):
+            return AnimatedWebPStrategy(img, target_bytes, wild_mode, probe_mode)
         elif format == 'WEBP':
-            return WebPStrategy(img, target_bytes, wild_mode)
+            return WebPStrategy(img, target_bytes, wild_mode, probe_mode, metadata)
         elif format == 'GIF':
-            return PngStrategy(img, target_bytes, wild_mode)
+            return GifStrategy(img, target_bytes, wild_mode, probe_mode)
         else:
-            return JpegStrategy(img, target_bytes, wild_mode)
+            return JpegStrategy(img, target_bytes, wild_mode, probe_mode, metadata)
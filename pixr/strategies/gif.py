@@ -0,0 +1,251 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import BinaryIO, Iterator, Optional, cast
+
+from PIL import Image, ImageChops
+
+from pixr import stats
+from pixr.animation import ALPHA_THRESHOLD, GifStreamWriter, iter_frames
+from pixr.buffers import EncodeBuffer, new_buffer
+
+from .base import BaseOptimizationStrategy
+from .png import PALETTE_SIZES, WILD_PALETTE_SIZES
+
+# Keeping every n-th frame (the dropped frames' time goes to the kept one) is only tried
+# once no palette fits with every frame kept; wild mode may drop more.
+DECIMATION: tuple[int, ...] = (1, 2)
+WILD_DECIMATION: tuple[int, ...] = (3, 4)
+
+# GIF disposal methods
+DISPOSAL_KEEP = 1
+DISPOSAL_BACKGROUND = 2
+
+
+@dataclass
+class GifTrial:
+    colors: int
+    dither: bool
+    decimation: int = 1
+    size: int = 0
+    frames: int = 0
+    # The trial's buffer and writer, from `start` until the trial is discarded
+    _output: Optional[tuple[EncodeBuffer, GifStreamWriter]] = field(default=None, repr=False)
+
+    @property
+    def alive(self) -> bool:
+        return self._output is not None
+
+    def start(self, loop: Optional[int]) -> None:
+        buffer = new_buffer()
+        self._output = (buffer, GifStreamWriter(cast(BinaryIO, buffer), loop=loop))
+
+    def add_frame(
+        self, image: Image.Image, duration: int, disposal: int, transparency: Optional[int], offset: tuple[int, int]
+    ) -> None:
+        buffer, writer = self._live()
+        writer.add_frame(image, duration, disposal, transparency, offset=offset)
+        self.size = buffer.tell()
+        self.frames += 1
+
+    def finish(self) -> None:
+        buffer, writer = self._live()
+        writer.close()
+        self.size = buffer.tell()
+
+    def view(self) -> memoryview:
+        buffer, _ = self._live()
+        return buffer.view()
+
+    def discard(self) -> None:
+        """Stop the trial and free its output, keeping only the size it had reached."""
+        if self._output is None:
+            return
+        buffer, _ = self._output
+        self._output = None
+        buffer.close()
+
+    def _live(self) -> tuple[EncodeBuffer, GifStreamWriter]:
+        if self._output is None:
+            raise ValueError(f"The GIF trial ({self.info}) is not running.")
+        return self._output
+
+    @property
+    def info(self) -> str:
+        dithering = "dithered" if self.dither else "no dither"
+        frames = f", every {self.decimation} frames" if self.decimation > 1 else ""
+        return f"{self.colors} colors, {dithering}{frames}"
+
+
+@dataclass
+class SourceFrame:
+    """A composited frame, the part of it that changed, and which pixels there did not."""
+
+    image: Image.Image
+    duration: int
+    box: tuple[int, int, int, int]
+    unchanged: Optional[Image.Image] = None
+
+
+def _decimated(img: Image.Image, mode: str, decimation: int) -> Iterator[tuple[Image.Image, int]]:
+    """Every `decimation`-th frame, converted to `mode`, carrying the duration of the frames dropped after it."""
+    kept, duration = None, 0
+    for index, frame in enumerate(iter_frames(img)):
+        if index % decimation == 0:
+            if kept is not None:
+                yield kept, duration
+            kept, duration = frame.image.convert(mode), 0
+        duration += frame.duration
+    if kept is not None:
+        yield kept, duration
+
+
+def _changed(
+    previous: Image.Image, current: Image.Image
+) -> tuple[Optional[tuple[int, int, int, int]], Optional[Image.Image]]:
+    """The bounding box of the pixels that differ, and a mask of those inside it that do not."""
+    red, green, blue = ImageChops.difference(previous, current).split()
+    difference = ImageChops.lighter(ImageChops.lighter(red, green), blue)
+    box = difference.getbbox()
+    if box is None:
+        return None, None
+    return box, difference.crop(box).point(lambda value: 255 if value == 0 else 0)
+
+
+class GifStrategy(BaseOptimizationStrategy):
+    def optimize(self) -> dict:
+        """
+        Searches palette size, dithering and frame decimation to meet the target size.
+
+        Frames are decoded once per decimation level and fed to every trial in lockstep, so
+        only the current and previous frame are held in memory; trials run on a thread pool
+        and are dropped as soon as their output outgrows the target. Opaque animations store
+        each frame as the rectangle that changed, with unchanged pixels in it transparent.
+        The highest-fidelity trial that fits wins; the last, smallest one is always finished.
+        """
+        palette_sizes = PALETTE_SIZES + (WILD_PALETTE_SIZES if self.wild_mode else ())
+        decimations = DECIMATION + (WILD_DECIMATION if self.wild_mode else ())
+        if getattr(self.img, "n_frames", 1) == 1:
+            decimations = (1,)  # a still image has no frames to drop
+        transparent = self._has_transparency()
+
+        finished: list[GifTrial] = []
+        probes = 0
+        for decimation in decimations:
+            trials = [GifTrial(colors, dither, decimation) for colors in palette_sizes for dither in (True, False)]
+            keep_alive = trials[-1] if decimation == decimations[-1] else None
+            self._run_trials(trials, transparent, keep_alive)
+            probes += len(trials)
+            finished.extend(trial for trial in trials if trial.alive)
+
+            fitting = [trial for trial in trials if trial.alive and trial.size <= self.target_bytes]
+            if fitting:
+                return self._result(fitting[0], finished, probes, quality_floor_hit=False)
+
+        smallest = min(finished, key=lambda trial: trial.size)
+        return self._result(smallest, finished, probes, quality_floor_hit=True)
+
+    @cached_property
+    def prepared(self) -> Image.Image:
+        # Stands in for the animation wherever a single image is looked at
+        self.img.seek(0)
+        return self.img.convert("RGBA")
+
+    def _has_transparency(self) -> bool:
+        low, _ = cast(tuple[int, int], self.prepared.getchannel("A").getextrema())
+        return low < ALPHA_THRESHOLD
+
+    def _source_frames(self, transparent: bool, decimation: int) -> Iterator[SourceFrame]:
+        """
+        Stream frames ready to encode, one frame behind the decoder.
+
+        A frame identical to the one before it is folded into that frame's duration, which
+        is why each frame is only handed out once the next one has been compared with it.
+        """
+        full = (0, 0, *self.img.size)
+        pending: Optional[SourceFrame] = None
+        for image, duration in _decimated(self.img, "RGBA" if transparent else "RGB", decimation):
+            box, unchanged = full, None
+            if pending is not None and not transparent:
+                changed, unchanged = _changed(pending.image, image)
+                if changed is None:
+                    pending.duration += duration
+                    continue
+                box = changed
+            if pending is not None:
+                yield pending
+            pending = SourceFrame(image, duration, box, unchanged)
+        if pending is not None:
+            yield pending
+
+    def _run_trials(self, trials: list[GifTrial], transparent: bool, keep_alive: Optional[GifTrial]) -> None:
+        start = time.perf_counter()
+        loop = self.img.info.get("loop")
+        for trial in trials:
+            trial.start(loop)
+
+        groups: dict[int, list[GifTrial]] = {}
+        for trial in trials:
+            groups.setdefault(trial.colors, []).append(trial)
+
+        with ThreadPoolExecutor() as pool:
+            for frame in self._source_frames(transparent, trials[0].decimation):
+                live = [group for group in groups.values() if any(trial.alive for trial in group)]
+                if not live:
+                    break
+                list(pool.map(lambda group: self._encode_frame(group, frame, transparent), live))
+                for trial in trials:
+                    if trial.alive and trial is not keep_alive and trial.size > self.target_bytes:
+                        trial.discard()
+
+        for trial in trials:
+            if trial.alive:
+                trial.finish()
+            params = {"colors": trial.colors, "dither": trial.dither, "decimation": trial.decimation}
+            stats.emit("probe", params=params, size=trial.size, seconds=time.perf_counter() - start)
+
+    @staticmethod
+    def _encode_frame(group: list[GifTrial], frame: SourceFrame, transparent: bool) -> None:
+        """Quantize a frame once per palette size and write it to every live trial of that size."""
+        crop = frame.image.crop(frame.box)
+        mask = frame.unchanged
+        if transparent:
+            mask = crop.getchannel("A").point(lambda alpha: 255 if alpha < ALPHA_THRESHOLD else 0)
+            crop = crop.convert("RGB")
+
+        colors = group[0].colors
+        if mask is not None:
+            colors = min(colors, 255)  # one index is reserved for transparent pixels
+        plain = crop.quantize(colors, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+
+        for trial in group:
+            if not trial.alive:
+                continue
+            paletted = plain
+            if trial.dither:
+                paletted = crop.quantize(palette=plain, dither=Image.Dither.FLOYDSTEINBERG)
+            transparency = None
+            if mask is not None:
+                paletted = paletted.copy()
+                paletted.putpalette((plain.getpalette() or [])[: colors * 3] + [0, 0, 0])
+                paletted.paste(colors, mask=mask)
+                transparency = colors
+            disposal = DISPOSAL_BACKGROUND if transparent else DISPOSAL_KEEP
+            trial.add_frame(paletted, frame.duration, disposal, transparency, frame.box[:2])
+
+    @staticmethod
+    def _result(best: GifTrial, finished: list[GifTrial], probes: int, quality_floor_hit: bool) -> dict:
+        return {
+            "best_result_data": best.view(),
+            "best_params": {
+                "colors": best.colors,
+                "dither": best.dither,
+                "decimation": best.decimation,
+                "frames": best.frames,
+                "info": best.info,
+            },
+            "smallest_size": min(trial.size for trial in finished),
+            "quality_floor_hit": quality_floor_hit,
+            "probes": probes,
+        }
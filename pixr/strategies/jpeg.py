@@ -1,61 +1,83 @@
-import io
+from functools import cached_property
+from typing import BinaryIO, Optional, cast
+
+from PIL import Image
+
+from pixr.buffers import EncodeBuffer, new_buffer
 
 from .base import BaseOptimizationStrategy
 
+# Luminance quantization table from Annex K of the JPEG standard (quality 50 in libjpeg).
+STANDARD_LUMINANCE_TABLE: tuple[int, ...] = (
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99,
+)  # fmt: skip
+
+
+def estimate_jpeg_quality(img: Image.Image) -> Optional[int]:
+    """
+    Estimate the libjpeg quality setting a JPEG was saved with from its luminance table.
+
+    libjpeg scales the standard table by 5000 / quality (below 50) or 200 - 2 * quality,
+    so the ratio between the actual and the standard table recovers the setting.
+    """
+    tables = getattr(img, "quantization", None)
+    if not tables or 0 not in tables:
+        return None
+
+    scale = 100 * sum(tables[0]) / sum(STANDARD_LUMINANCE_TABLE)
+    if scale <= 0:
+        return None
+    quality = (200 - scale) / 2 if scale <= 100 else 5000 / scale
+    return min(max(round(quality), 1), 100)
+
 
 class JpegStrategy(BaseOptimizationStrategy):
+    def __init__(
+        self,
+        img: Image.Image,
+        target_bytes: int,
+        wild_mode: bool,
+        probe_mode: str = 'full',
+        metadata: Optional[dict] = None,
+    ):
+        super().__init__(img, target_bytes, wild_mode, probe_mode, metadata)
+        # Read from the source, so that downscaled copies are not encoded above its quality either
+        self.source_quality = estimate_jpeg_quality(img)
+
     def optimize(self) -> dict:
         """
-        Performs a binary search on JPEG quality to meet the target size.
+        Performs an interpolation search on JPEG quality to meet the target size.
+
+        The search never goes above the estimated quality of a JPEG source, since
+        re-encoding at a higher setting only inflates the file without adding detail.
         """
-        low = 1
-        high = 100
-        min_quality = 1 if self.wild_mode else 50
-        best_result_data = None
-        best_quality = -1
-        smallest_size_so_far = float('inf')
-        smallest_size_data = None
-        smallest_size_quality = -1
-        quality_floor_hit = False
-
-        img = self.img
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-
-        iterations = 0
-        max_iterations = 10  # Safety break
-
-        while low <= high and iterations < max_iterations:
-            iterations += 1
-            mid_quality = (low + high) // 2
-
-            if mid_quality < min_quality:
-                quality_floor_hit = True
-                break
-
-            with io.BytesIO() as buffer:
-                img.save(buffer, format='JPEG', quality=mid_quality, optimize=True)
-                current_size = buffer.tell()
-
-                if current_size < smallest_size_so_far:
-                    smallest_size_so_far = current_size
-                    smallest_size_data = buffer.getvalue()
-                    smallest_size_quality = mid_quality
-
-                if current_size <= self.target_bytes:
-                    best_result_data = buffer.getvalue()
-                    best_quality = mid_quality
-                    low = mid_quality + 1
-                else:
-                    high = mid_quality - 1
-
-        if not best_result_data and smallest_size_data:
-            best_result_data = smallest_size_data
-            best_quality = smallest_size_quality
-
-        return {
-            "best_result_data": best_result_data,
-            "best_params": {"quality": best_quality},
-            "smallest_size": smallest_size_so_far,
-            "quality_floor_hit": quality_floor_hit,
-        }
+        low, high = self.quality_range()
+        return self._search_quality(self._encode, self.prepared, low, high)
+
+    def quality_range(self) -> tuple[int, int]:
+        min_quality, _ = super().quality_range()
+        high = self.source_quality or 100
+        return min(min_quality, high), high
+
+    @cached_property
+    def prepared(self) -> Image.Image:
+        return self.img if self.img.mode == 'RGB' else self.img.convert('RGB')
+
+    def probe_size(self, quality: int) -> int:
+        with self._encode(self.prepared, quality) as buffer:
+            return buffer.tell()
+
+    def encode(self, quality: int, final: bool = True) -> memoryview:
+        return self._encode(self.prepared, quality).view()
+
+    def _encode(self, img: Image.Image, quality: int) -> EncodeBuffer:
+        buffer = new_buffer()
+        img.save(cast(BinaryIO, buffer), format='JPEG', quality=quality, optimize=True, **self.metadata)
+        return buffer
@@ -0,0 +1,94 @@
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from .search import _log_scale, scale_quality
+
+# Quality probed first, before anything is known about the image
+PRIOR_QUALITY = 80
+# Typical slope of log(1 - SSIM) against the log of the quantizer scale: the structural
+# error grows roughly in proportion to the quantizer step.
+PRIOR_SLOPE = 1.0
+# 1 - SSIM is floored at this, so a lossless-looking probe still has a finite log
+MIN_DISSIMILARITY = 1e-6
+
+
+@dataclass
+class ScoreProbe:
+    quality: int
+    score: float
+
+
+@dataclass
+class ThresholdSearchResult:
+    best: Optional[ScoreProbe] = None
+    probes: list[ScoreProbe] = field(default_factory=list)
+
+
+def _log_dissimilarity(score: float) -> float:
+    return math.log(max(1.0 - score, MIN_DISSIMILARITY))
+
+
+def _predict(a: ScoreProbe, b: Optional[ScoreProbe], threshold: float) -> float:
+    """
+    Predict the quality whose encoding scores exactly `threshold`.
+
+    log(1 - SSIM) is close to linear in the log of the quantizer scale, so a secant through
+    two probes in that space lands near the crossing; with one probe, a typical slope
+    stands in for the second point.
+    """
+    slope = PRIOR_SLOPE
+    if b is not None and a.quality != b.quality and a.score != b.score:
+        slope = (_log_dissimilarity(a.score) - _log_dissimilarity(b.score)) / (
+            _log_scale(a.quality) - _log_scale(b.quality)
+        )
+        if slope <= 0:
+            return (a.quality + b.quality) / 2
+    x = _log_scale(a.quality) + (_log_dissimilarity(threshold) - _log_dissimilarity(a.score)) / slope
+    return scale_quality(math.exp(x))
+
+
+def threshold_search(
+    score: Callable[[int], float], threshold: float, low: int, high: int, max_probes: int = 8
+) -> ThresholdSearchResult:
+    """
+    Find the lowest quality in [low, high] whose encoding scores at or above `threshold`.
+
+    Scores rise monotonically with quality, so the search keeps a bracket between the
+    highest failing and the lowest passing quality and places every probe where the
+    secant through the two most recent probes crosses the threshold. If the same end of
+    the bracket moves three times in a row, the next probe bisects instead. `best` is
+    None when not even `high` reaches the threshold.
+    """
+    result = ThresholdSearchResult()
+    passing: Optional[ScoreProbe] = None
+    failing: Optional[ScoreProbe] = None
+    previous: Optional[ScoreProbe] = None
+    last_side, streak = None, 0
+    quality = min(max(PRIOR_QUALITY, low), high)
+
+    while len(result.probes) < max_probes:
+        current = ScoreProbe(quality, score(quality))
+        result.probes.append(current)
+        side = current.score >= threshold
+        if side:
+            passing = current
+        else:
+            failing = current
+        streak = streak + 1 if side == last_side else 1
+        last_side = side
+
+        floor = failing.quality + 1 if failing else low
+        ceiling = passing.quality - 1 if passing else high
+        if floor > ceiling:
+            break
+
+        if passing and failing and streak >= 3:
+            guess = (passing.quality + failing.quality) / 2
+        else:
+            guess = _predict(current, previous, threshold)
+        previous = current
+        quality = min(max(round(guess), floor), ceiling)
+
+    result.best = passing
+    return result
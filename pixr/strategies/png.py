@@ -1,22 +1,133 @@
-import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+from typing import BinaryIO, Optional, cast
+
+from PIL import Image
+
+from pixr import stats
+from pixr.buffers import new_buffer
 
 from .base import BaseOptimizationStrategy
 
+# Palette sizes tried in order of decreasing fidelity; wild mode may go further down.
+PALETTE_SIZES: tuple[int, ...] = (256, 128, 64, 32, 16)
+WILD_PALETTE_SIZES: tuple[int, ...] = (8, 4, 2)
+
+# Trials are encoded with a fast zlib level first; the slow, exhaustive level is only
+# worth running when the fast result misses the target by a small margin.
+FAST_COMPRESS_LEVEL = 6
+MAX_COMPRESS_LEVEL = 9
+RECOMPRESS_MARGIN = 0.1
+# Modes the PNG encoder writes as they are
+PNG_MODES: set[str] = {'1', 'L', 'LA', 'I', 'I;16', 'P', 'RGB', 'RGBA'}
+
+
+@dataclass
+class PaletteTrial:
+    colors: Optional[int]
+    dither: bool
+    size: int = 0
+    data: Optional[memoryview] = None
+    compress_level: int = MAX_COMPRESS_LEVEL
+    encodes: int = 0
+
+    @property
+    def info(self) -> str:
+        if self.colors is None:
+            return f"lossless, compress_level {self.compress_level}"
+        dithering = "dithered" if self.dither else "no dither"
+        return f"{self.colors} colors, {dithering}, compress_level {self.compress_level}"
+
 
 class PngStrategy(BaseOptimizationStrategy):
     def optimize(self) -> dict:
         """
-        Placeholder for PNG optimization strategy.
-        Currently, it just saves the image without changes.
+        Searches palette quantization and zlib level to meet the target size.
+
+        The lossless encoding is tried first. Otherwise, palette sizes from 256 down are
+        tried with and without dithering, on a thread pool since both quantization and
+        zlib release the GIL, and the highest-fidelity trial under the target wins.
         """
-        with io.BytesIO() as buffer:
-            self.img.save(buffer, format='PNG', optimize=True)
-            data = buffer.getvalue()
-            size = buffer.tell()
+        self.img.load()
+        # The lossless trial keeps the source mode, so an indexed or grayscale image that
+        # already fits is not expanded; only the quantization trials need RGB(A).
+        lossless_img = self.img if self.img.mode in PNG_MODES else self.prepared
+        lossless = self._encode(lossless_img, PaletteTrial(colors=None, dither=False))
+        if lossless.size <= self.target_bytes:
+            return self._result(lossless, [lossless], quality_floor_hit=False)
+
+        img = self.prepared
+
+        palette_sizes = PALETTE_SIZES + (WILD_PALETTE_SIZES if self.wild_mode else ())
+        trials = [PaletteTrial(colors, dither) for colors in palette_sizes for dither in (True, False)]
+
+        finished, smallest = [lossless], lossless
+        with ThreadPoolExecutor() as pool:
+            futures = [pool.submit(self._quantize_and_encode, img, trial) for trial in trials]
+            for future in futures:
+                trial = future.result()
+                finished.append(trial)
+                if trial.size <= self.target_bytes:
+                    for pending in futures:
+                        pending.cancel()
+                    return self._result(trial, finished, quality_floor_hit=False)
+                # From here on only the smallest trial can still be returned
+                if trial.size < smallest.size:
+                    smallest.data, smallest = None, trial
+                else:
+                    trial.data = None
+
+        return self._result(smallest, finished, quality_floor_hit=True)
+
+    @cached_property
+    def prepared(self) -> Image.Image:
+        if self.img.mode in ('RGB', 'RGBA'):
+            return self.img
+        return self.img.convert('RGBA' if self.img.has_transparency_data else 'RGB')
+
+    def _quantize_and_encode(self, img: Image.Image, trial: PaletteTrial) -> PaletteTrial:
+        assert trial.colors is not None
+        method = Image.Quantize.FASTOCTREE if img.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+        dither = Image.Dither.FLOYDSTEINBERG if trial.dither else Image.Dither.NONE
+        quantized = img.quantize(colors=trial.colors, method=method, dither=dither)
+        return self._encode(quantized, trial)
+
+    def _encode(self, img: Image.Image, trial: PaletteTrial) -> PaletteTrial:
+        trial.compress_level = FAST_COMPRESS_LEVEL
+        trial.data = self._save(img, trial, compress_level=FAST_COMPRESS_LEVEL)
+        trial.encodes += 1
+
+        if self.target_bytes < len(trial.data) <= self.target_bytes * (1 + RECOMPRESS_MARGIN):
+            recompressed = self._save(img, trial, compress_level=MAX_COMPRESS_LEVEL, optimize=True)
+            trial.encodes += 1
+            if len(recompressed) < len(trial.data):
+                trial.data, trial.compress_level = recompressed, MAX_COMPRESS_LEVEL
+
+        trial.size = len(trial.data)
+        return trial
+
+    def _save(self, img: Image.Image, trial: PaletteTrial, **save_kwargs) -> memoryview:
+        start = time.perf_counter()
+        buffer = new_buffer()
+        img.save(cast(BinaryIO, buffer), format='PNG', **save_kwargs, **self.metadata)
+        data = buffer.view()
+        params = {"colors": trial.colors, "dither": trial.dither, **save_kwargs}
+        stats.emit("probe", params=params, size=len(data), seconds=time.perf_counter() - start)
+        return data
 
+    @staticmethod
+    def _result(best: PaletteTrial, finished: list[PaletteTrial], quality_floor_hit: bool) -> dict:
         return {
-            "best_result_data": data,
-            "best_params": {"info": "PNG optimization not yet implemented"},
-            "smallest_size": size,
-            "quality_floor_hit": False,
+            "best_result_data": best.data,
+            "best_params": {
+                "colors": best.colors,
+                "dither": best.dither,
+                "compress_level": best.compress_level,
+                "info": best.info,
+            },
+            "smallest_size": min(trial.size for trial in finished),
+            "quality_floor_hit": quality_floor_hit,
+            "probes": sum(trial.encodes for trial in finished),
         }
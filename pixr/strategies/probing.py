@@ -0,0 +1,171 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+from PIL import Image
+
+from pixr import stats
+from pixr.buffers import EncodeBuffer
+
+from .search import interpolation_search
+
+Encoder = Callable[[Image.Image, int], EncodeBuffer]
+
+
+class EncodingCandidates:
+    """
+    Encodes an image at requested qualities, keeping only the buffer that would be returned.
+
+    That is the best fitting encoding, or the smallest one for as long as none fits; every
+    other buffer is closed as soon as it has been measured, and the winner is handed over
+    as a view of its buffer rather than a copy.
+    """
+
+    def __init__(self, encode: Encoder, img: Image.Image, target_bytes: int):
+        self.encode = encode
+        self.img = img
+        self.target_bytes = target_bytes
+        self.probes = 0
+        self.best: Optional[EncodeBuffer] = None
+        self.best_quality = -1
+        self.smallest_size: float = float('inf')
+        self.smallest: Optional[EncodeBuffer] = None
+        self.smallest_size_quality = -1
+
+    def measure(self, quality: int) -> int:
+        self.probes += 1
+        start = time.perf_counter()
+        buffer = self.encode(self.img, quality)
+        size = buffer.tell()
+        stats.emit("probe", params={"quality": quality}, size=size, seconds=time.perf_counter() - start)
+        if size < self.smallest_size:
+            self.smallest_size = size
+            self.smallest_size_quality = quality
+            if self.best is None:
+                self._replace("smallest", buffer)
+        if size <= self.target_bytes and quality > self.best_quality:
+            self.best_quality = quality
+            self._replace("best", buffer)
+            self._replace("smallest", None)
+        if buffer is not self.best and buffer is not self.smallest:
+            buffer.close()
+        return size
+
+    def _replace(self, name: str, buffer: Optional[EncodeBuffer]) -> None:
+        previous = getattr(self, name)
+        setattr(self, name, buffer)
+        if previous is not None and previous is not self.best and previous is not self.smallest:
+            previous.close()
+
+    def result(self, **extra) -> dict:
+        kept, best_quality = self.best, self.best_quality
+        if kept is None:
+            kept, best_quality = self.smallest, self.smallest_size_quality
+
+        return {
+            "best_result_data": kept.view() if kept is not None else None,
+            "best_params": {"quality": best_quality},
+            "smallest_size": self.smallest_size,
+            "quality_floor_hit": self.best is None,
+            "probes": self.probes,
+            **extra,
+        }
+
+
+class ProbingMode(ABC):
+    """Decides how the size-versus-quality curve of an image is explored."""
+
+    @abstractmethod
+    def search(self, encode: Encoder, img: Image.Image, target_bytes: int, low: int, high: int) -> dict:
+        """Return a strategy result for the highest quality in [low, high] that fits the target."""
+        pass
+
+
+class FullResolutionProbing(ProbingMode):
+    """Every probe encodes the full-resolution image."""
+
+    def search(self, encode: Encoder, img: Image.Image, target_bytes: int, low: int, high: int) -> dict:
+        candidates = EncodingCandidates(encode, img, target_bytes)
+        interpolation_search(candidates.measure, target_bytes, low, high)
+        return candidates.result()
+
+
+class ProxyProbing(ProbingMode):
+    """
+    Fits the size curve on a small proxy of the image, then confirms at full resolution.
+
+    Proxy sizes are extrapolated by the pixel-count ratio, and the proxy search aims
+    `tolerance` below the target so the first full encode usually fits. Only full
+    encodes are ever returned, so the result still strictly respects the target; if the
+    prediction misses twice, the remaining range is searched at full resolution.
+    """
+
+    def __init__(self, method: str = 'crop', max_pixels: int = 1_000_000, tolerance: float = 0.03):
+        if method not in ('crop', 'downsample'):
+            raise ValueError(f"Unknown proxy method '{method}'")
+        self.method = method
+        self.max_pixels = max_pixels
+        self.tolerance = tolerance
+
+    def make_proxy(self, img: Image.Image) -> Optional[Image.Image]:
+        """Build the proxy image, or return None when the image is too small to benefit."""
+        pixels = img.width * img.height
+        if pixels < 4 * self.max_pixels:
+            return None
+
+        ratio = math.sqrt(self.max_pixels / pixels)
+        if self.method == 'downsample':
+            return img.reduce(max(2, round(1 / ratio)))
+
+        # Keep the crop aligned to 16px so it sees the same JPEG/VP8 macroblock grid.
+        width = max(16, int(img.width * ratio) // 16 * 16)
+        height = max(16, int(img.height * ratio) // 16 * 16)
+        left = (img.width - width) // 32 * 16
+        top = (img.height - height) // 32 * 16
+        return img.crop((left, top, left + width, top + height))
+
+    def search(self, encode: Encoder, img: Image.Image, target_bytes: int, low: int, high: int) -> dict:
+        proxy = self.make_proxy(img)
+        if proxy is None:
+            return FullResolutionProbing().search(encode, img, target_bytes, low, high)
+
+        area_ratio = (img.width * img.height) / (proxy.width * proxy.height)
+        proxy_sizes: dict[int, float] = {}
+
+        def measure_proxy(quality: int) -> int:
+            if quality not in proxy_sizes:
+                start = time.perf_counter()
+                with encode(proxy, quality) as buffer:
+                    proxy_sizes[quality] = buffer.tell() * area_ratio
+                    params = {"quality": quality, "proxy": True}
+                    stats.emit("probe", params=params, size=buffer.tell(), seconds=time.perf_counter() - start)
+            return int(proxy_sizes[quality] * correction)
+
+        def predict() -> int:
+            aim = int(target_bytes * (1 - self.tolerance))
+            search = interpolation_search(measure_proxy, aim, low, high)
+            return search.best.quality if search.best else low
+
+        candidates = EncodingCandidates(encode, img, target_bytes)
+        correction = 1.0
+        quality = predict()
+
+        for _ in range(2):
+            size = candidates.measure(quality)
+            if size <= target_bytes:
+                # The aim leaves some headroom; spend one more encode if the next step should still fit.
+                if quality < high:
+                    measure_proxy(quality + 1)
+                    if size * proxy_sizes[quality + 1] / proxy_sizes[quality] <= target_bytes:
+                        candidates.measure(quality + 1)
+                break
+            if quality == low:
+                break
+            # Rescale the extrapolated curve so it passes through the full-resolution measurement.
+            correction = size / proxy_sizes[quality]
+            quality = min(predict(), quality - 1)
+        else:
+            interpolation_search(candidates.measure, target_bytes, low, quality)
+
+        return candidates.result(proxy_probes=len(proxy_sizes))
@@ -0,0 +1,78 @@
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+# Smallest fraction of the original width and height a downscaling search may go to.
+MIN_SCALE = 0.1
+# Typical exponent of encoded size against the linear scale factor at fixed quality:
+# size follows the pixel count, minus a little for fixed headers and smoother content.
+PRIOR_EXPONENT = 1.8
+# Scale predictions aim this far below the target, so the first guess usually fits.
+AIM_MARGIN = 0.03
+# The search stops once the bracket is narrower than this fraction of the scale.
+SCALE_PRECISION = 0.02
+
+
+@dataclass
+class ScaleProbe:
+    scale: float
+    size: int
+
+
+@dataclass
+class ScaleSearchResult:
+    best: Optional[ScaleProbe] = None
+    probes: list[ScaleProbe] = field(default_factory=list)
+
+
+def _exponent(a: ScaleProbe, b: ScaleProbe) -> Optional[float]:
+    if a.scale == b.scale or a.size <= 0 or b.size <= 0:
+        return None
+    exponent = (math.log(a.size) - math.log(b.size)) / (math.log(a.scale) - math.log(b.scale))
+    return exponent if exponent > 0 else None
+
+
+def scale_search(
+    measure: Callable[[float], int],
+    target: int,
+    full_size: int,
+    min_scale: float = MIN_SCALE,
+    max_probes: int = 4,
+) -> ScaleSearchResult:
+    """
+    Find the largest scale below 1 whose encoding, at a fixed quality, fits `target`.
+
+    `full_size` is the (already measured) size at scale 1. log(size) is close to linear in
+    log(scale), so every probe is placed where the line through the closest fitting and
+    non-fitting points crosses the target, starting from a typical slope; two or three
+    probes usually settle it, and the search never spends more than `max_probes` encodes.
+    """
+    result = ScaleSearchResult()
+    over = ScaleProbe(1.0, full_size)
+    fits: Optional[ScaleProbe] = None
+    previous_over: Optional[ScaleProbe] = None
+
+    while len(result.probes) < max_probes:
+        anchor = fits or over
+        exponent = _exponent(fits, over) if fits else None
+        if exponent is None and previous_over is not None:
+            exponent = _exponent(over, previous_over)
+        exponent = exponent or PRIOR_EXPONENT
+
+        guess = anchor.scale * (target * (1 - AIM_MARGIN) / anchor.size) ** (1 / exponent)
+        floor = fits.scale if fits else min_scale
+        guess = min(max(guess, floor), over.scale * (1 - SCALE_PRECISION))
+        if fits and guess - fits.scale < SCALE_PRECISION * fits.scale:
+            break
+
+        current = ScaleProbe(guess, measure(guess))
+        result.probes.append(current)
+        if current.size <= target:
+            fits = current
+        else:
+            previous_over, over = over, current
+            if guess <= min_scale:
+                break
+
+    result.best = fits
+    return result
@@ -0,0 +1,109 @@
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+@dataclass
+class Probe:
+    quality: int
+    size: int
+
+
+@dataclass
+class SearchResult:
+    best: Optional[Probe] = None
+    probes: list[Probe] = field(default_factory=list)
+    quality_floor_hit: bool = False
+
+
+def quality_scale(quality: float) -> float:
+    """The libjpeg quantizer scale (in percent) for a quality setting."""
+    return 5000 / quality if quality < 50 else 200 - 2 * quality
+
+
+def scale_quality(scale: float) -> float:
+    """Inverse of `quality_scale`."""
+    return (200 - scale) / 2 if scale <= 100 else 5000 / scale
+
+
+# Quality probed first, before anything is known about the image
+PRIOR_QUALITY = 80
+# Typical slope of log(size) against log(quantizer scale); only used to place the second
+# probe before the curve of the image at hand is known.
+PRIOR_SLOPE = -0.6
+# Same-side moves of the bracket after which the next probe bisects instead of interpolating
+BISECT_STREAK = 4
+
+
+def _log_scale(quality: float) -> float:
+    # Quality 100 has a scale of 0; libjpeg clamps quantizer steps at 1 anyway.
+    return math.log(max(quality_scale(quality), 1.0))
+
+
+def _predict(a: Probe, b: Optional[Probe], target: int) -> float:
+    """
+    Predict the quality whose encoding hits `target`.
+
+    log(size) is close to linear in the log of the quantizer scale, far more so than in
+    quality itself, which bends sharply near 100; a secant through two probes in that
+    space lands within a step or two of the answer. With a single probe, a typical slope
+    stands in for the second point.
+    """
+    slope = PRIOR_SLOPE
+    if b is not None and a.size != b.size and a.quality != b.quality:
+        slope = (math.log(a.size) - math.log(b.size)) / (_log_scale(a.quality) - _log_scale(b.quality))
+        if slope >= 0:
+            return (a.quality + b.quality) / 2
+    x = _log_scale(a.quality) + (math.log(target) - math.log(max(a.size, 1))) / slope
+    return scale_quality(math.exp(x))
+
+
+def interpolation_search(
+    measure: Callable[[int], int], target: int, low: int, high: int, max_probes: int = 10
+) -> SearchResult:
+    """
+    Find the highest quality in [low, high] whose encoded size is at or below `target`.
+
+    Encoded size is monotone and smooth in quality, so instead of bisecting, the search
+    starts from a typical quality and places every further probe where the size curve
+    through the latest probe and the far end of the bracket is predicted to cross the
+    target. Predictions are rounded away from the side the latest probe landed on, so each
+    probe tends to close the bracket between the highest fitting and the lowest
+    overshooting quality; the search ends as soon as no quality is left inside it. If the
+    same end of the bracket moves several times in a row, the next probe bisects instead,
+    which bounds the cost on curves that are far from the model.
+    """
+    result = SearchResult()
+    fits: Optional[Probe] = None
+    over: Optional[Probe] = None
+    previous: Optional[Probe] = None
+    last_side, streak = None, 0
+    quality = min(max(PRIOR_QUALITY, low), high)
+
+    while len(result.probes) < max_probes:
+        current = Probe(quality, measure(quality))
+        result.probes.append(current)
+        side = current.size <= target
+        if side:
+            fits = current
+        else:
+            over = current
+        streak = streak + 1 if side == last_side else 1
+        last_side = side
+
+        floor = fits.quality + 1 if fits else low
+        ceiling = over.quality - 1 if over else high
+        if floor > ceiling:
+            break
+
+        if fits and over and streak >= BISECT_STREAK:
+            guess = (fits.quality + over.quality) / 2
+        else:
+            guess = _predict(current, (over if side else fits) or previous, target)
+        previous = current
+        rounded = math.ceil(guess) if side else math.floor(guess)
+        quality = min(max(rounded, floor), ceiling)
+
+    result.best = fits
+    result.quality_floor_hit = fits is None
+    return result
@@ -1,22 +1,165 @@
 import io
+import time
+from functools import cached_property
+from typing import BinaryIO, Optional, cast
+
+from PIL import Image
+
+from pixr import stats
+from pixr.buffers import EncodeBuffer, new_buffer
+from pixr.animation import Frame, decoded_frames, webp_animation_params, write_webp_animation
 
 from .base import BaseOptimizationStrategy
 
+# Probes run at the fastest encoder effort; only the final encode pays for method 6.
+PROBE_METHOD = 0
+FINAL_METHOD = 6
+# Sizes at the two effort levels differ by a few percent in either direction, so the
+# probes aim this far below the target to leave room for the final encode.
+SAFETY_MARGIN = 0.05
+# Images with at most this many colors are tried losslessly first. Lossless effort above
+# method 1 costs several times more for a percent or two, so it is not worth paying here.
+LOSSLESS_MAX_COLORS = 256
+LOSSLESS_METHOD = 1
+
 
 class WebPStrategy(BaseOptimizationStrategy):
+    fast_probes = True
+
     def optimize(self) -> dict:
         """
-        Placeholder for WebP optimization strategy.
-        Currently, it just saves the image with default quality.
+        Searches WebP quality with fast-effort probes, then encodes once at full effort.
+
+        The full-effort result is re-checked against the target: if it does not fit, the
+        quality is lowered once using the probed curve corrected by the measured
+        difference, and failing that the fast-effort encoding (which always fits the
+        margin-reduced target) is returned instead.
         """
+        min_quality, max_quality = self.quality_range()
+        img = self.prepared
+
+        if img.getcolors(LOSSLESS_MAX_COLORS) is not None:
+            lossless = self._encode(img, 100, method=LOSSLESS_METHOD, lossless=True)
+            if len(lossless) <= self.target_bytes:
+                return {
+                    "best_result_data": lossless,
+                    "best_params": {"lossless": True, "info": "lossless"},
+                    "smallest_size": len(lossless),
+                    "quality_floor_hit": False,
+                    "probes": 1,
+                }
+
+        probe_sizes: dict[int, int] = {}
+
+        def probe(probe_img: Image.Image, quality: int) -> EncodeBuffer:
+            buffer = new_buffer()
+            self._save(probe_img, cast(BinaryIO, buffer), quality=quality, method=PROBE_METHOD)
+            if probe_img is img:
+                probe_sizes[quality] = buffer.tell()
+            return buffer
+
+        aim = int(self.target_bytes * (1 - SAFETY_MARGIN))
+        result = self._search_quality(probe, img, min_quality, max_quality, target_bytes=aim)
+        return self._finalize(img, result, probe_sizes)
+
+    @cached_property
+    def prepared(self) -> Image.Image:
+        if self.img.mode in ('RGB', 'RGBA'):
+            return self.img
+        return self.img.convert('RGBA' if self.img.has_transparency_data else 'RGB')
+
+    def probe_size(self, quality: int) -> int:
         with io.BytesIO() as buffer:
-            self.img.save(buffer, format='WEBP', quality=80)
-            data = buffer.getvalue()
-            size = buffer.tell()
+            self._save(self.prepared, buffer, quality=quality, method=PROBE_METHOD)
+            return buffer.tell()
+
+    def encode(self, quality: int, final: bool = True) -> memoryview:
+        buffer = new_buffer()
+        method = FINAL_METHOD if final else PROBE_METHOD
+        self._save(self.prepared, cast(BinaryIO, buffer), quality=quality, method=method)
+        return buffer.view()
+
+    def _finalize(self, img: Image.Image, result: dict, probe_sizes: dict[int, int]) -> dict:
+        """Re-encode the searched quality at full effort, keeping the fast result if that does not fit."""
+        quality = result["best_params"]["quality"]
+
+        if result["quality_floor_hit"]:
+            # Nothing fits; full effort at the floor is usually the smallest encoding there is.
+            final = self._encode(img, quality, method=FINAL_METHOD)
+            result["probes"] += 1
+            if len(final) < len(result["best_result_data"]):
+                return self._with_final(result, final, quality)
+            return result
+
+        for _ in range(2):
+            final = self._encode(img, quality, method=FINAL_METHOD)
+            result["probes"] += 1
+            if len(final) <= self.target_bytes:
+                return self._with_final(result, final, quality)
 
+            correction = len(final) / probe_sizes.get(quality, len(final))
+            next_quality = self._corrected_quality(probe_sizes, correction, below=quality)
+            if next_quality is None:
+                break
+            quality = next_quality
+
+        # The fast-effort encoding met the margin-reduced target, so it is a safe fallback.
+        return result
+
+    def _corrected_quality(self, probe_sizes: dict[int, int], correction: float, below: int) -> Optional[int]:
+        """The highest probed quality below `below` that should fit once scaled by `correction`."""
+        fitting = [q for q, size in probe_sizes.items() if q < below and size * correction <= self.target_bytes]
+        return max(fitting) if fitting else None
+
+    def _save(self, img: Image.Image, fp: BinaryIO, **save_kwargs) -> None:
+        img.save(fp, format='WEBP', **save_kwargs, **self.metadata)
+
+    def _encode(self, img: Image.Image, quality: int, **save_kwargs) -> memoryview:
+        start = time.perf_counter()
+        buffer = new_buffer()
+        self._save(img, cast(BinaryIO, buffer), quality=quality, **save_kwargs)
+        data = buffer.view()
+        stats.emit(
+            "probe", params={"quality": quality, **save_kwargs}, size=len(data), seconds=time.perf_counter() - start
+        )
+        return data
+
+    def _with_final(self, result: dict, data: memoryview, quality: int) -> dict:
+        # The full-effort encode may fit where every fast probe missed, so the floor flag follows it
         return {
+            **result,
             "best_result_data": data,
-            "best_params": {"info": "WebP optimization not yet implemented"},
-            "smallest_size": size,
-            "quality_floor_hit": False,
+            "best_params": {"quality": quality},
+            "smallest_size": min(result["smallest_size"], len(data)),
+            "quality_floor_hit": len(data) > self.target_bytes,
         }
+
+
+class AnimatedWebPStrategy(WebPStrategy):
+    """
+    Searches one WebP quality shared by every frame of an animation.
+
+    The frames are decoded once and every probe encodes the whole animation, keeping frame
+    durations, loop count and background. Probing is always done at full resolution, since
+    a proxy of one frame says little about how the whole animation compresses.
+    """
+
+    def __init__(self, img: Image.Image, target_bytes: int, wild_mode: bool, probe_mode: str = 'full'):
+        super().__init__(img, target_bytes, wild_mode, 'full')
+
+    def optimize(self) -> dict:
+        result = super().optimize()
+        result["best_params"] = {**result["best_params"], "frames": len(self.frames)}
+        return result
+
+    @cached_property
+    def frames(self) -> list[Frame]:
+        return decoded_frames(self.img)
+
+    @cached_property
+    def prepared(self) -> Image.Image:
+        # Stands in for the animation wherever a single image is looked at, e.g. to count colors
+        return self.frames[0].image
+
+    def _save(self, img: Image.Image, fp: BinaryIO, **save_kwargs) -> None:
+        write_webp_animation(fp, self.frames, **webp_animation_params(self.img), **save_kwargs)
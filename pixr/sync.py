@@ -0,0 +1,368 @@
+"""
+Incremental mirroring of a source tree: only new or changed images are processed.
+
+A SQLite manifest in the destination records, for every source image, its size, mtime and
+content hash, the options it was processed with and the output it produced. A run walks the
+source tree one directory at a time and compares each file's stat against its directory's
+manifest rows; only files whose stat changed are hashed, and only those whose content (or
+the options) changed are processed. Outputs of sources that are gone are deleted.
+
+Every processed file is committed to the manifest as soon as its output is in place, so an
+interrupted run picks up where it stopped. Outputs are written atomically, so a file is
+either fully processed and recorded, or processed again.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Iterator, Optional
+
+from pixr.batch import FileResult, is_image, run_batch
+from pixr.buffers import TEMP_PREFIX, TEMP_SUFFIX
+from pixr.cache import command_context, hash_file
+from pixr.command.core import Command
+from pixr.pipeline import final_format, parse_pipeline
+
+MANIFEST_NAME = ".pixr-sync.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    options TEXT NOT NULL,
+    output TEXT NOT NULL,
+    PRIMARY KEY (dir, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS options (
+    key TEXT PRIMARY KEY,
+    context TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class ManifestEntry:
+    """What the manifest knows about one source image; `output` is relative to the destination."""
+
+    size: int
+    mtime_ns: int
+    hash: str
+    options: str
+    output: str
+
+
+class Manifest:
+    """
+    The sync manifest, keyed by (directory, file name) relative to the source root.
+
+    Rows are read one directory at a time, so memory stays bounded by the largest
+    directory rather than the whole tree.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        # WAL with synchronous=NORMAL makes the per-file commits cheap; a crash loses at most
+        # the last few records, whose files are then simply processed again.
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "Manifest":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def entries(self, directory: str) -> dict[str, ManifestEntry]:
+        rows = self._db.execute(
+            "SELECT name, size, mtime_ns, hash, options, output FROM files WHERE dir = ?", (directory,)
+        )
+        return {name: ManifestEntry(*values) for name, *values in rows}
+
+    def directories(self) -> list[str]:
+        return [directory for (directory,) in self._db.execute("SELECT DISTINCT dir FROM files")]
+
+    def record(self, directory: str, name: str, entry: ManifestEntry) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (directory, name, entry.size, entry.mtime_ns, entry.hash, entry.options, entry.output),
+            )
+
+    def remove(self, directory: str, names: list[str]) -> None:
+        with self._db:
+            self._db.executemany("DELETE FROM files WHERE dir = ? AND name = ?", [(directory, n) for n in names])
+
+    def register_options(self, key: str, context: str) -> None:
+        with self._db:
+            self._db.execute("INSERT OR IGNORE INTO options VALUES (?, ?)", (key, context))
+
+
+@dataclass
+class Change:
+    """A source image whose stat no longer matches the manifest (or that is not in it yet)."""
+
+    directory: str
+    name: str
+    path: Path
+    size: int
+    mtime_ns: int
+    previous: Optional[ManifestEntry]
+    hash: str = ""
+    output: str = ""
+    # (inode, mtime) of the output before processing, to tell whether the run replaced it
+    output_stamp: Optional[tuple[int, int]] = None
+
+
+@dataclass
+class SyncSummary:
+    results: list[FileResult] = field(default_factory=list)
+    unchanged: int = 0
+    touched: int = 0
+    deleted: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def processed(self) -> int:
+        return sum(1 for result in self.results if result.ok)
+
+    @property
+    def failed(self) -> list[FileResult]:
+        return [result for result in self.results if not result.ok]
+
+    def format(self) -> str:
+        return (
+            f"Synced in {self.elapsed:.2f}s: {self.processed} processed, {self.unchanged} unchanged, "
+            f"{self.touched} re-stamped, {self.deleted} removed, {len(self.failed)} failed."
+        )
+
+
+def options_key(template: Command) -> tuple[str, str]:
+    """The key identifying the options a file is processed with, and their JSON description."""
+    context = json.dumps(command_context(template), sort_keys=True)
+    return hashlib.sha256(context.encode()).hexdigest(), context
+
+
+def _join(directory: str, name: str) -> str:
+    return f"{directory}/{name}" if directory else name
+
+
+def _scan(root: Path, exclude: Path) -> Iterator[tuple[str, dict[str, os.stat_result]]]:
+    """Yield every directory below `root` (as a relative POSIX path) with the stat of its images, in sorted order."""
+    pending = [""]
+    while pending:
+        directory = pending.pop()
+        files, subdirs = {}, []
+        with os.scandir(root / directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if Path(entry.path) != exclude:
+                        subdirs.append(_join(directory, entry.name))
+                elif entry.is_file() and is_image(Path(entry.name)):
+                    files[entry.name] = entry.stat()
+        pending.extend(sorted(subdirs, reverse=True))
+        yield directory, dict(sorted(files.items()))
+
+
+def _listing(directory: Path) -> set[str]:
+    """The file names in an output directory, removing temporary files an interrupted run left behind."""
+    try:
+        names = set(os.listdir(directory))
+    except FileNotFoundError:
+        return set()
+    for name in [n for n in names if n.startswith(TEMP_PREFIX) and n.endswith(TEMP_SUFFIX)]:
+        (directory / name).unlink(missing_ok=True)
+        names.discard(name)
+    return names
+
+
+def _output_name(name: str, extension: Optional[str]) -> str:
+    return str(PurePosixPath(name).with_suffix(f".{extension}")) if extension else name
+
+
+def _prune(directory: Path, root: Path) -> None:
+    """Remove `directory` and its parents up to `root` for as long as they are empty."""
+    while directory != root and root in directory.parents:
+        try:
+            directory.rmdir()
+        except OSError:
+            return
+        directory = directory.parent
+
+
+def _stamp(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+class Sync:
+    """One run mirroring `source` into `destination` through the pipeline of `template`."""
+
+    def __init__(self, template: Command, source: Path, destination: Path, jobs: Optional[int], verbose: bool):
+        self.template = template
+        self.source = source.resolve()
+        self.destination = destination.resolve()
+        self.jobs = jobs or os.cpu_count() or 1
+        self.verbose = verbose
+        self.key, self.context = options_key(template)
+        assert template.options.pipeline is not None
+        self.extension = final_format(parse_pipeline(template.options.pipeline))
+        self.summary = SyncSummary()
+        self._changes: dict[str, Change] = {}
+
+    def run(self) -> SyncSummary:
+        if self.source == self.destination:
+            raise ValueError("The destination must differ from the source directory.")
+        start = time.perf_counter()
+        self.destination.mkdir(parents=True, exist_ok=True)
+
+        with Manifest(self.destination / MANIFEST_NAME) as manifest:
+            manifest.register_options(self.key, self.context)
+            changes = self._scan(manifest)
+            self._hash(changes)
+            pending = [change for change in changes if not self._restamped(manifest, change)]
+            commands = [self._command(change) for change in pending]
+            batch = run_batch(
+                commands, self.jobs, self.verbose, on_result=lambda cmd, result: self._record(manifest, cmd, result)
+            )
+            self.summary.results.extend(batch.results)
+
+        self.summary.elapsed = time.perf_counter() - start
+        return self.summary
+
+    def _scan(self, manifest: Manifest) -> list[Change]:
+        """Walk the source tree, removing orphaned outputs and collecting the files that may have changed."""
+        changes = []
+        walked = set()
+        for directory, files in _scan(self.source, self.destination):
+            walked.add(directory)
+            entries = manifest.entries(directory)
+            orphans = {name: entry for name, entry in entries.items() if name not in files}
+            if orphans:
+                self._delete(manifest, directory, orphans)
+            if not files:
+                continue
+
+            outputs = _listing(self.destination / directory)
+            claimed: dict[str, str] = {}
+            for name, st in files.items():
+                output_name = _output_name(name, self.extension)
+                if output_name in claimed:
+                    self._fail(directory, name, f"Output {output_name} is already produced by {claimed[output_name]}")
+                    continue
+                claimed[output_name] = name
+
+                entry = entries.get(name)
+                if (
+                    entry is not None
+                    and entry.options == self.key
+                    and entry.size == st.st_size
+                    and entry.mtime_ns == st.st_mtime_ns
+                    and PurePosixPath(entry.output).name in outputs
+                ):
+                    self.summary.unchanged += 1
+                    continue
+                changes.append(
+                    Change(
+                        directory,
+                        name,
+                        self.source / directory / name,
+                        st.st_size,
+                        st.st_mtime_ns,
+                        entry,
+                        output=_join(directory, output_name),
+                    )
+                )
+
+        for directory in manifest.directories():
+            if directory not in walked:
+                self._delete(manifest, directory, manifest.entries(directory))
+        return changes
+
+    def _hash(self, changes: list[Change]) -> None:
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            digests = executor.map(lambda change: hash_file(change.path).hexdigest(), changes)
+            for change, digest in zip(changes, digests):
+                change.hash = digest
+
+    def _restamped(self, manifest: Manifest, change: Change) -> bool:
+        """Update the stat of a file that was touched but whose content (and output) did not change."""
+        entry = change.previous
+        if (
+            entry is None
+            or entry.hash != change.hash
+            or entry.options != self.key
+            or entry.output != change.output
+            or not (self.destination / entry.output).is_file()
+        ):
+            return False
+        manifest.record(change.directory, change.name, self._entry(change))
+        self.summary.touched += 1
+        return True
+
+    def _command(self, change: Change) -> Command:
+        output_path = self.destination / change.output
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        change.output_stamp = _stamp(output_path)
+        self._changes[str(change.path)] = change
+        options = self.template.options.model_copy(
+            update={"file_path": str(change.path), "output_path": str(output_path), "output_dir": None}
+        )
+        return Command(self.template.argument, options)
+
+    def _record(self, manifest: Manifest, command: Command, result: FileResult) -> None:
+        """Commit a processed file to the manifest once its output is in place."""
+        if not result.ok:
+            return
+        change = self._changes.pop(command.options.file_path)
+        stamp = _stamp(self.destination / change.output)
+        if stamp is None or stamp == change.output_stamp:
+            # The pipeline gave up (e.g. an unreachable target size) without writing anything
+            result.ok = False
+            return
+
+        manifest.record(change.directory, change.name, self._entry(change))
+        previous = change.previous
+        if previous is not None and previous.output != change.output:
+            (self.destination / previous.output).unlink(missing_ok=True)
+
+    def _entry(self, change: Change) -> ManifestEntry:
+        return ManifestEntry(change.size, change.mtime_ns, change.hash, self.key, change.output)
+
+    def _delete(self, manifest: Manifest, directory: str, entries: dict[str, ManifestEntry]) -> None:
+        """Delete the outputs of sources that are gone, then forget them."""
+        for entry in entries.values():
+            output_path = self.destination / entry.output
+            output_path.unlink(missing_ok=True)
+            if self.verbose:
+                print(f"Removed {output_path}")
+        manifest.remove(directory, list(entries))
+        _prune(self.destination / directory, self.destination)
+        self.summary.deleted += len(entries)
+
+    def _fail(self, directory: str, name: str, message: str) -> None:
+        path = self.source / directory / name
+        print(f"✗ {path}: {message}")
+        self.summary.results.append(FileResult(str(path), False, message, 0.0))
+
+
+def sync(
+    template: Command, source: Path, destination: Path, jobs: Optional[int] = None, verbose: bool = False
+) -> SyncSummary:
+    """Mirror `source` into `destination`, processing only the images that changed since the last run."""
+    return Sync(template, source, destination, jobs, verbose).run()
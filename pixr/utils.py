@@ -2,11 +2,11 @@ import re
 
 
 def parse_size(size_str: str) -> int:
-    """Converts size strings like '500KB', '2MB' into bytes."""
+    """Converts size strings like '500KB', '2MB', '1GB' into bytes."""
     size_str = size_str.strip().upper()
-    units = {"B": 1, "KB": 1024, "MB": 1024**2}
+    units = {"B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
 
-    match = re.match(r"^(\d+\.?\d*)\s*([KM]?B)$", size_str)
+    match = re.match(r"^(\d+\.?\d*)\s*([KMG]?B)$", size_str)
     if not match:
         if size_str.isdigit():
             return int(size_str)
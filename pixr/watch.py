@@ -0,0 +1,446 @@
+"""
+Processing images as they land in a directory.
+
+Changes are picked up with inotify (through ctypes, so there is no extra dependency) or,
+where inotify cannot see them (network filesystems, other platforms), by polling the
+directory's stat. A file is only processed once it settled: inotify saw its writer close
+it or saw it renamed into place, or its size and mtime stayed the same for the settle
+time. Settled files go to a pool of pre-forked worker processes that admits a bounded
+number of files at a time; everything else waits, deduplicated, until a worker frees up.
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+
+from pixr.batch import FileResult, is_image, process_file
+from pixr.command.core import Command
+from pixr.formats import WATCH_POLL_INTERVAL, WATCH_SETTLE
+from pixr.pipeline import final_format, parse_pipeline
+from pixr.server import WorkerPool
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+READ_SIZE = 64 * 1024
+# Longest the loop blocks at a time, so a stop request is noticed promptly
+IDLE_WAIT = 0.2
+
+# Filesystems whose changes made by other hosts never reach inotify
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "fuse.sshfs", "afs", "ceph", "glusterfs"}
+
+# A file name and whether its writer is known to be done with it
+Change = tuple[Path, bool]
+
+
+def _hidden(name: str) -> bool:
+    """Dot files are skipped: uploads in progress (rsync, curl) and pixr's own temporary outputs."""
+    return name.startswith(".")
+
+
+def _wanted(path: Path) -> bool:
+    return not _hidden(path.name) and is_image(path)
+
+
+def _scan(directory: Path, recursive: bool, exclude: Optional[Path]) -> Iterator[os.DirEntry]:
+    """The image files in `directory` (and its subdirectories if recursive), skipping `exclude`."""
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    for entry in entries:
+        if _hidden(entry.name):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            if recursive and Path(entry.path) != exclude:
+                yield from _scan(Path(entry.path), recursive, exclude)
+        elif entry.is_file() and is_image(Path(entry.name)):
+            yield entry
+
+
+def network_filesystem(path: Path) -> bool:
+    """Whether `path` is on a network filesystem, according to the mount table (Linux only)."""
+    try:
+        with open("/proc/self/mounts") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    resolved = str(path.resolve())
+    best, fstype = "", ""
+    for mount_point, kind in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        inside = resolved == mount_point or resolved.startswith(mount_point.rstrip("/") + "/")
+        if inside and len(mount_point) >= len(best):
+            best, fstype = mount_point, kind
+    return fstype in NETWORK_FILESYSTEMS
+
+
+class InotifyWatcher:
+    """Watches a directory (tree) with inotify; raises OSError where inotify is unavailable."""
+
+    description = "inotify"
+
+    def __init__(self, root: Path, recursive: bool = False, exclude: Optional[Path] = None):
+        self.root = root
+        self.recursive = recursive
+        self.exclude = exclude
+        self.started = time.time_ns()
+        self._libc = self._load_libc()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+        self._dirs: dict[int, Path] = {}
+        try:
+            self._add(root)
+        except OSError:
+            self.close()
+            raise
+
+    @staticmethod
+    def _load_libc() -> ctypes.CDLL:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+
+    def _add(self, directory: Path) -> list[Change]:
+        """Watch `directory` (and, if recursive, its subdirectories), returning the files already in them."""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"Cannot watch {directory}: {os.strerror(errno)}")
+        self._dirs[wd] = directory
+
+        existing = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if self.recursive and not _hidden(entry.name) and Path(entry.path) != self.exclude:
+                        existing.extend(self._add(Path(entry.path)))
+                elif _wanted(Path(entry.path)):
+                    existing.append((Path(entry.path), False))
+        return existing
+
+    def read(self, timeout: float) -> list[Change]:
+        """Wait up to `timeout` seconds for changes and return the image files they concern."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        changes = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            start, offset = offset + EVENT_HEADER.size, offset + EVENT_HEADER.size + length
+            name = os.fsdecode(data[start:offset].rstrip(b"\0"))
+            changes.extend(self._handle(wd, mask, name))
+        return changes
+
+    def _handle(self, wd: int, mask: int, name: str) -> list[Change]:
+        if mask & IN_Q_OVERFLOW:
+            return self._rescan()
+        if mask & (IN_IGNORED | IN_DELETE_SELF):
+            self._dirs.pop(wd, None)
+            return []
+        directory = self._dirs.get(wd)
+        if directory is None or not name:
+            return []
+
+        path = directory / name
+        if not mask & IN_ISDIR:
+            return [(path, bool(mask & (IN_CLOSE_WRITE | IN_MOVED_TO)))] if _wanted(path) else []
+        if self.recursive and mask & (IN_CREATE | IN_MOVED_TO) and not _hidden(name) and path != self.exclude:
+            try:
+                return self._add(path)
+            except OSError:
+                pass  # removed again before it could be watched
+        return []
+
+    def _rescan(self) -> list[Change]:
+        """After the event queue overflowed, treat every file changed since the watch started as new."""
+        return [
+            (Path(entry.path), False)
+            for entry in _scan(self.root, self.recursive, self.exclude)
+            if entry.stat().st_mtime_ns >= self.started
+        ]
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """Watches a directory (tree) by comparing the stat of its files every `interval` seconds."""
+
+    def __init__(self, root: Path, recursive: bool = False, exclude: Optional[Path] = None, interval: float = 1.0):
+        self.root = root
+        self.recursive = recursive
+        self.exclude = exclude
+        self.interval = interval
+        self.description = f"polling every {interval:g}s"
+        self._snapshot = self._stat()
+        self._next_poll = time.monotonic() + interval
+
+    def _stat(self) -> dict[Path, tuple[int, int]]:
+        snapshot = {}
+        for entry in _scan(self.root, self.recursive, self.exclude):
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[Path(entry.path)] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout: float) -> list[Change]:
+        wait = self._next_poll - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        if wait > 0:
+            time.sleep(wait)
+        self._next_poll = time.monotonic() + self.interval
+
+        previous, self._snapshot = self._snapshot, self._stat()
+        return [(path, False) for path, stamp in self._snapshot.items() if previous.get(path) != stamp]
+
+    def close(self) -> None:
+        pass
+
+
+@dataclass
+class Pending:
+    first_seen: float
+    deadline: float
+    stamp: Optional[tuple[int, int]]
+
+
+def _stamp(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class Debouncer:
+    """
+    Holds changed files until they settled.
+
+    A file whose writer closed it (or that was renamed into place) is ready right away;
+    any other is ready once it saw no events for `settle` seconds and its size and mtime
+    are still what they were at its last event.
+    """
+
+    def __init__(self, settle: float):
+        self.settle = settle
+        self._pending: dict[Path, Pending] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, path: Path, now: float, closed: bool = False) -> None:
+        pending = self._pending.get(path)
+        deadline = now if closed else now + self.settle
+        if pending is None:
+            self._pending[path] = Pending(now, deadline, _stamp(path))
+        else:
+            pending.deadline, pending.stamp = deadline, _stamp(path)
+
+    def ready(self, now: float) -> list[Path]:
+        """The settled files, oldest first; files that vanished are dropped."""
+        settled = []
+        for path, pending in list(self._pending.items()):
+            if pending.deadline > now:
+                continue
+            stamp = _stamp(path)
+            if stamp is None:
+                del self._pending[path]
+            elif stamp != pending.stamp:
+                pending.deadline, pending.stamp = now + self.settle, stamp
+            else:
+                settled.append(path)
+        return sorted(settled, key=lambda path: self._pending[path].first_seen)
+
+    def pop(self, path: Path) -> float:
+        """Stop tracking a file that is being processed, returning when it was first seen."""
+        return self._pending.pop(path).first_seen
+
+    def timeout(self, now: float, default: float) -> float:
+        """How long to wait for events before some file may have settled."""
+        deadlines = [pending.deadline - now for pending in self._pending.values()]
+        return max(0.0, min(deadlines, default=default))
+
+
+class Watch:
+    """Processes the images landing in `root` through the pipeline of `template`, mirroring them into `output_dir`."""
+
+    def __init__(
+        self,
+        template: Command,
+        root: Path,
+        output_dir: Path,
+        workers: Optional[int] = None,
+        recursive: bool = False,
+        existing: bool = False,
+        settle: float = WATCH_SETTLE,
+        poll: Optional[float] = None,
+        events: Optional[TextIO] = None,
+        verbose: bool = False,
+    ):
+        self.template = template
+        self.root = root.resolve()
+        self.output_dir = output_dir.resolve()
+        if self.output_dir == self.root:
+            raise ValueError("The output directory must differ from the watched directory.")
+        self.workers = workers or os.cpu_count() or 1
+        self.recursive = recursive
+        self.existing = existing
+        self.debouncer = Debouncer(settle)
+        self.poll = poll
+        self.events = events
+        self.verbose = verbose
+        assert template.options.pipeline is not None
+        self.extension = final_format(parse_pipeline(template.options.pipeline))
+        # The files being processed, with the stamp their output had before
+        self._in_flight: dict[Path, Optional[tuple[int, int]]] = {}
+        self._done: queue.Queue = queue.Queue()
+
+    def open_watcher(self):
+        """inotify unless polling was asked for or the directory is on a network filesystem."""
+        exclude = self.output_dir
+        if self.poll is None and not network_filesystem(self.root):
+            try:
+                return InotifyWatcher(self.root, self.recursive, exclude)
+            except OSError:
+                pass
+        return PollingWatcher(self.root, self.recursive, exclude, self.poll or WATCH_POLL_INTERVAL)
+
+    def run(self, stop: Optional[threading.Event] = None, watching: Optional[threading.Event] = None) -> None:
+        """Watch until `stop` is set (or forever); `watching` is set once changes are being picked up."""
+        stop = stop or threading.Event()
+        watcher = self.open_watcher()
+        # One file may wait for each busy worker, so a worker never idles while files are ready
+        pool = WorkerPool(self.workers, queue_depth=self.workers)
+        try:
+            if self.existing:
+                now = time.monotonic()
+                for entry in _scan(self.root, self.recursive, self.output_dir):
+                    self.debouncer.touch(Path(entry.path), now)
+            if self.verbose:
+                print(f"Watching {self.root} ({watcher.description})")
+            if watching is not None:
+                watching.set()
+
+            blocked = False
+            while not stop.is_set():
+                if blocked:
+                    # Settled files are waiting for a worker: wait for one to finish instead of spinning
+                    self._report(wait=IDLE_WAIT)
+                timeout = 0.0 if blocked else self.debouncer.timeout(time.monotonic(), default=IDLE_WAIT)
+                for path, closed in watcher.read(min(timeout, IDLE_WAIT)):
+                    self.debouncer.touch(path, time.monotonic(), closed)
+                self._report()
+                blocked = self._dispatch(pool)
+        finally:
+            watcher.close()
+            pool.shutdown()
+            self._report()
+
+    def _dispatch(self, pool: WorkerPool) -> bool:
+        """Hand settled files to the pool; True if some of them have to wait."""
+        blocked = False
+        for path in self.debouncer.ready(time.monotonic()):
+            if path in self._in_flight:
+                blocked = True  # changed again while being processed; it goes again once that finished
+                continue
+            if not pool.try_acquire():
+                return True
+            first_seen = self.debouncer.pop(path)
+            command = self._command(path)
+            assert command.options.output_path is not None
+            self._in_flight[path] = _stamp(Path(command.options.output_path))
+            self._emit("queued", input=str(path))
+            future = pool.executor.submit(process_file, command)
+            future.add_done_callback(partial(self._finished, pool, path, command, first_seen))
+        return blocked
+
+    def _finished(self, pool: WorkerPool, path: Path, command: Command, first_seen: float, future: Future) -> None:
+        pool.release()
+        try:
+            result = future.result()
+        except Exception as e:  # the worker died, e.g. BrokenProcessPool
+            result = FileResult(str(path), False, str(e) or type(e).__name__, 0.0)
+        self._done.put((path, command, first_seen, result, time.monotonic()))
+
+    def _report(self, wait: float = 0.0) -> None:
+        """Report the files the workers finished, waiting up to `wait` seconds for the first one."""
+        while True:
+            try:
+                path, command, first_seen, result, finished = (
+                    self._done.get(timeout=wait) if wait else self._done.get_nowait()
+                )
+            except queue.Empty:
+                return
+            wait = 0.0
+            stamp = self._in_flight.pop(path, None)
+            if result.ok and _stamp(Path(command.options.output_path)) in (None, stamp):
+                # The pipeline gave up (e.g. an unreachable target size) without writing anything
+                result.ok = False
+            if not result.ok:
+                print(f"✗ {path}: {result.message}")
+            elif self.verbose and result.message:
+                print(result.message)
+            self._emit(
+                "processed" if result.ok else "failed",
+                input=str(path),
+                output=command.options.output_path if result.ok else None,
+                seconds=round(result.elapsed, 4),
+                latency=round(finished - first_seen, 4),
+                message=result.message,
+            )
+
+    def _command(self, path: Path) -> Command:
+        relative = path.relative_to(self.root)
+        output_path = self.output_dir / (relative.with_suffix(f".{self.extension}") if self.extension else relative)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        options = self.template.options.model_copy(
+            update={"file_path": str(path), "output_path": str(output_path), "output_dir": None}
+        )
+        return Command(self.template.argument, options)
+
+    def _emit(self, event: str, **fields) -> None:
+        if self.events is None:
+            return
+        self.events.write(json.dumps({"event": event, "time": time.time(), **fields}) + "\n")
+        self.events.flush()
@@ -0,0 +1,126 @@
+import io
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image, ImageDraw
+
+from pixr import api
+from pixr.__main__ import cli
+from pixr.animation import iter_frames, resize_frames
+from pixr.strategies.webp import AnimatedWebPStrategy
+
+DURATIONS = [40 + 10 * i for i in range(10)]
+BACKGROUND = (10, 20, 30, 255)
+
+
+@pytest.fixture(scope="module")
+def sticker_webp() -> bytes:
+    """A ball moving over a grainy backdrop, with uneven frame durations."""
+    backdrop = Image.effect_noise((200, 150), 40).convert("RGB")
+    frames = []
+    for i in range(10):
+        frame = backdrop.copy()
+        ImageDraw.Draw(frame).ellipse((i * 15, 40, i * 15 + 50, 90), fill=(230, 20 * i, 40))
+        frames.append(frame)
+    buffer = io.BytesIO()
+    frames[0].save(
+        buffer,
+        "WEBP",
+        save_all=True,
+        append_images=frames[1:],
+        duration=DURATIONS,
+        loop=3,
+        background=BACKGROUND,
+        quality=95,
+    )
+    return buffer.getvalue()
+
+
+def _animation(data: bytes) -> tuple[list[int], dict, tuple[int, int]]:
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.format == "WEBP"
+        return [frame.duration for frame in iter_frames(img)], dict(img.info), img.size
+
+
+def test_iter_frames_reads_webp_durations(sticker_webp: bytes):
+    durations, info, _ = _animation(sticker_webp)
+
+    assert durations == DURATIONS
+    assert info["loop"] == 3 and info["background"] == BACKGROUND
+
+
+def test_resize_frames_keeps_order_and_timing(sticker_webp: bytes):
+    with Image.open(io.BytesIO(sticker_webp)) as img:
+        frames = resize_frames(img, (100, 75), jobs=4)
+        img.seek(9)
+        last = img.convert("RGBA").resize((100, 75), Image.Resampling.LANCZOS)
+
+    assert [frame.duration for frame in frames] == DURATIONS
+    assert all(frame.image.size == (100, 75) for frame in frames)
+    assert frames[-1].image.tobytes() == last.tobytes()
+
+
+def test_rescale_animated_webp(sticker_webp: bytes):
+    result = api.rescale(sticker_webp, 50)
+
+    durations, info, size = _animation(result.data)
+    assert result.format == "WEBP" and result.params["frames"] == 10
+    assert size == (100, 75)
+    assert durations == DURATIONS
+    assert info["loop"] == 3 and info["background"] == BACKGROUND
+
+
+def test_rescale_treats_other_multi_frame_images_as_stills(sticker_webp: bytes):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), "red").save(buffer, "MPO", save_all=True, append_images=[Image.new("RGB", (64, 48))])
+
+    mpo = api.rescale(buffer.getvalue(), 50)
+    png = api.rescale(sticker_webp, 50, format="png")
+
+    assert mpo.format == "MPO" and "frames" not in mpo.params
+    with Image.open(io.BytesIO(mpo.data)) as img:
+        assert img.size == (32, 24) and not getattr(img, "is_animated", False)
+        assert img.getpixel((0, 0))[0] > 200
+    with Image.open(io.BytesIO(png.data)) as img:
+        assert img.format == "PNG" and img.size == (100, 75) and not getattr(img, "is_animated", False)
+
+
+def test_target_size_animated_webp_uses_one_quality(sticker_webp: bytes):
+    target = len(sticker_webp) * 3 // 4
+
+    result = api.target_size(sticker_webp, target)
+
+    assert not result.params["quality_floor_hit"]
+    assert result.size <= target
+    assert result.params["frames"] == 10 and "quality" in result.params
+    durations, info, size = _animation(result.data)
+    assert size == (200, 150)
+    assert durations == DURATIONS
+    assert info["loop"] == 3
+
+
+def test_animated_webp_strategy_ignores_proxy_probing(sticker_webp: bytes):
+    with Image.open(io.BytesIO(sticker_webp)) as img:
+        strategy = AnimatedWebPStrategy(img, len(sticker_webp), wild_mode=False, probe_mode='proxy')
+        result = strategy.optimize()
+
+    assert "proxy_probes" not in result
+    assert len(result["best_result_data"]) <= len(sticker_webp)
+
+
+def test_downscale_rejects_animations(sticker_webp: bytes):
+    with pytest.raises(ValueError, match="JPEG and WebP stills"):
+        api.target_size(sticker_webp, 1000, downscale=True)
+
+
+def test_cli_target_size_animated_webp(tmp_path: Path, sticker_webp: bytes):
+    input_file = tmp_path / "sticker.webp"
+    input_file.write_bytes(sticker_webp)
+
+    result = CliRunner().invoke(cli, ["target-size", str(input_file), "-s", str(len(sticker_webp) * 3 // 4)])
+
+    assert result.exit_code == 0, result.output
+    assert "Target size achieved" in result.output
+    durations, _, _ = _animation((tmp_path / "sticker_targeted.webp").read_bytes())
+    assert durations == DURATIONS
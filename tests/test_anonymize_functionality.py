@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import pytest
+from PIL import Image, PngImagePlugin
+
+from pixr.command.core import Command
+from pixr.runners.anonymize import AnonymizeRunner
+
+
+@pytest.fixture
+def exif_bytes() -> bytes:
+    exif = Image.Exif()
+    exif[0x010F] = "SecretCam"  # Make
+    exif[0x0131] = "pixr-test"  # Software
+    return exif.tobytes()
+
+
+def _anonymize(input_path: Path, output_path: Path) -> None:
+    command = Command.from_cli(
+        "anonymize", {"verbose": False, "file_path": str(input_path), "output_path": str(output_path)}
+    )
+    AnonymizeRunner(command).run()
+
+
+def _noise(size=(64, 48)) -> Image.Image:
+    return Image.effect_noise(size, 64).convert("RGB")
+
+
+def test_anonymize_jpeg_drops_segments_and_keeps_scan(tmp_path: Path, exif_bytes: bytes):
+    """JPEG metadata segments are dropped while the compressed scan is copied verbatim."""
+    input_path = tmp_path / "photo.jpg"
+    output_path = tmp_path / "photo_anonymized.jpg"
+    _noise().save(input_path, "JPEG", exif=exif_bytes, comment=b"top secret", quality=90)
+
+    _anonymize(input_path, output_path)
+
+    original, purified = input_path.read_bytes(), output_path.read_bytes()
+    assert b"SecretCam" not in purified
+    assert b"top secret" not in purified
+    scan_start = original.index(b"\xff\xda")
+    assert purified.endswith(original[scan_start:])
+
+    with Image.open(input_path) as a, Image.open(output_path) as b:
+        assert a.tobytes() == b.tobytes()
+        assert not b.getexif()
+
+
+def test_anonymize_png_drops_text_chunks(tmp_path: Path):
+    """Ancillary text chunks are removed from PNG files without re-encoding."""
+    input_path = tmp_path / "shot.png"
+    output_path = tmp_path / "shot_anonymized.png"
+    info = PngImagePlugin.PngInfo()
+    info.add_text("Author", "Jane Doe")
+    info.add_itxt("Comment", "hidden", zip=True)
+    _noise().save(input_path, "PNG", pnginfo=info)
+
+    _anonymize(input_path, output_path)
+
+    assert b"Jane Doe" not in output_path.read_bytes()
+    with Image.open(output_path) as img:
+        assert "Author" not in img.info
+        with Image.open(input_path) as original:
+            assert img.tobytes() == original.tobytes()
+
+
+def test_anonymize_webp_drops_exif_chunk(tmp_path: Path, exif_bytes: bytes):
+    """EXIF chunks are removed from WebP files and the VP8X flags are kept consistent."""
+    input_path = tmp_path / "pic.webp"
+    output_path = tmp_path / "pic_anonymized.webp"
+    _noise().save(input_path, "WEBP", exif=exif_bytes, quality=80)
+
+    _anonymize(input_path, output_path)
+
+    purified = output_path.read_bytes()
+    assert b"SecretCam" not in purified
+    assert int.from_bytes(purified[4:8], "little") == len(purified) - 8
+    with Image.open(output_path) as img, Image.open(input_path) as original:
+        assert "exif" not in img.info
+        assert img.tobytes() == original.tobytes()
+
+
+def test_anonymize_falls_back_to_decoding(tmp_path: Path):
+    """Formats without a container-level fast path are still anonymized by re-encoding."""
+    input_path = tmp_path / "legacy.bmp"
+    output_path = tmp_path / "legacy_anonymized.bmp"
+    _noise().save(input_path, "BMP")
+
+    _anonymize(input_path, output_path)
+
+    with Image.open(output_path) as img, Image.open(input_path) as original:
+        assert img.tobytes() == original.tobytes()
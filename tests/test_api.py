@@ -0,0 +1,99 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from pixr import api
+from pixr.command.exceptions import PercentageRangeError
+
+
+def _encoded(fmt: str = "JPEG", size=(160, 120), **save_kwargs) -> bytes:
+    buffer = BytesIO()
+    Image.effect_noise(size, 50).convert("RGB").save(buffer, fmt, **save_kwargs)
+    return buffer.getvalue()
+
+
+def _decode(result: api.Result) -> Image.Image:
+    img = Image.open(BytesIO(result.data))
+    assert img.format == result.format
+    assert img.size == (result.width, result.height)
+    return img
+
+
+def test_rescale_accepts_bytes_and_file_objects():
+    data = _encoded("PNG")
+
+    from_bytes = api.rescale(data, 50)
+    from_stream = api.rescale(BytesIO(data), 50, resample="fast")
+
+    assert (from_bytes.width, from_bytes.height) == (80, 60)
+    assert from_bytes.params["original_size"] == (160, 120)
+    assert set(from_bytes.timings) == {"open", "decode", "transform", "encode"}
+    assert _decode(from_stream).format == "PNG"
+
+
+def test_rescale_streams_animated_gif():
+    frames = [Image.new("RGB", (40, 40), color) for color in ("red", "blue")]
+    buffer = BytesIO()
+    frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:], duration=[70, 140])
+
+    result = api.rescale(buffer.getvalue(), 50)
+
+    img = _decode(result)
+    assert img.n_frames == result.params["frames"] == 2
+    assert (img.size, img.info["duration"]) == ((20, 20), 70)
+
+
+def test_convert_accepts_open_images():
+    img = Image.open(BytesIO(_encoded("PNG")))
+
+    result = api.convert(img, "WEBP", quality=70, effort="fast")
+
+    assert result.params == {"method": 0, "quality": 70}
+    assert _decode(result).format == "WEBP"
+
+
+def test_target_size_parses_size_strings():
+    result = api.target_size(_encoded(quality=95), "12KB")
+
+    assert result.size <= 12 * 1024
+    assert result.params["target_bytes"] == 12 * 1024
+    assert result.params["probes"] >= 1
+    assert "quality" in result.params
+    assert _decode(result).format == "JPEG"
+
+
+def test_target_size_rejects_unsupported_formats():
+    with pytest.raises(ValueError, match="not supported for target-size"):
+        api.target_size(_encoded("BMP"), 1024)
+
+
+def test_anonymize_strips_containers_and_decoded_images():
+    exif = Image.Exif()
+    exif[0x010F] = "SecretCam"
+    data = _encoded(exif=exif.tobytes())
+
+    stripped = api.anonymize(data)
+    redecoded = api.anonymize(Image.open(BytesIO(data)))
+
+    assert stripped.params["method"] == "container"
+    assert redecoded.params["method"] == "decode"
+    for result in (stripped, redecoded):
+        assert b"SecretCam" not in result.data
+        assert "exif" not in _decode(result).info
+
+
+def test_pipeline_returns_final_encoding():
+    result = api.pipeline(BytesIO(_encoded()), "rescale:50 | convert:png")
+
+    assert (result.format, result.width, result.height) == ("PNG", 80, 60)
+    assert {"transform", "encode"} <= set(result.timings)
+
+
+def test_invalid_arguments_raise():
+    with pytest.raises(PercentageRangeError):
+        api.rescale(_encoded(), 0)
+    with pytest.raises(ValueError, match="Unsupported resampling filter"):
+        api.rescale(_encoded(), 50, resample="sinc")
+    with pytest.raises(ValueError, match="Unsupported target format"):
+        api.convert(_encoded(), "heic")
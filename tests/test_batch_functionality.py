@@ -0,0 +1,89 @@
+from pathlib import Path
+
+from click.testing import CliRunner
+from PIL import Image
+
+from pixr.__main__ import cli
+from pixr.batch import collect_inputs
+
+
+def _make_tree(root: Path) -> None:
+    (root / "nested").mkdir(parents=True)
+    Image.new("RGB", (100, 80), color="red").save(root / "a.png")
+    Image.new("RGB", (60, 40), color="blue").save(root / "nested" / "b.jpg")
+    (root / "notes.txt").write_text("not an image")
+
+
+def test_collect_inputs_mirrors_relative_paths(tmp_path: Path):
+    """Directories are expanded into image files paired with their relative paths."""
+    _make_tree(tmp_path / "in")
+
+    flat = [item.relative_path for item in collect_inputs([str(tmp_path / "in")])]
+    recursive = [item.relative_path for item in collect_inputs([str(tmp_path / "in")], recursive=True)]
+    globbed = [item.relative_path for item in collect_inputs([str(tmp_path / "in" / "**" / "*.jpg")])]
+
+    assert flat == [Path("a.png")]
+    assert recursive == [Path("a.png"), Path("nested/b.jpg")]
+    assert globbed == [Path("nested/b.jpg")]
+
+
+def test_batch_rescale_mirrors_tree(tmp_path: Path):
+    """Batch mode processes every image and mirrors the input tree into the output directory."""
+    _make_tree(tmp_path / "in")
+    out_dir = tmp_path / "out"
+
+    result = CliRunner().invoke(
+        cli, ["batch", "rescale", str(tmp_path / "in"), "-r", "-p", "50", "-o", str(out_dir), "-j", "2"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Processed 2 file(s)" in result.output
+    assert "2 succeeded, 0 failed" in result.output
+
+    with Image.open(out_dir / "a.png") as img:
+        assert img.size == (50, 40)
+    with Image.open(out_dir / "nested" / "b.jpg") as img:
+        assert img.size == (30, 20)
+
+
+def test_batch_convert_changes_extension(tmp_path: Path):
+    """Converted outputs keep their relative names but take the target extension."""
+    _make_tree(tmp_path / "in")
+    out_dir = tmp_path / "out"
+
+    result = CliRunner().invoke(cli, ["batch", "convert", str(tmp_path / "in"), "-f", "webp", "-o", str(out_dir)])
+
+    assert result.exit_code == 0, result.output
+    assert (out_dir / "a.webp").exists()
+
+
+def test_batch_reports_failures(tmp_path: Path):
+    """A failing file is reported in the summary and makes the command exit non-zero."""
+    in_dir = tmp_path / "in"
+    in_dir.mkdir()
+    Image.new("RGB", (10, 10)).save(in_dir / "good.png")
+    (in_dir / "broken.png").write_bytes(b"not really a png")
+
+    result = CliRunner().invoke(
+        cli, ["batch", "rescale", str(in_dir), "-p", "50", "-o", str(tmp_path / "out"), "-j", "1"]
+    )
+
+    assert result.exit_code != 0
+    assert "1 succeeded, 1 failed" in result.output
+    assert "broken.png" in result.output
+
+
+def test_batch_fails_inputs_whose_outputs_collide(tmp_path: Path):
+    """Two inputs that would write the same output are not silently overwritten."""
+    in_dir = tmp_path / "in"
+    in_dir.mkdir()
+    Image.new("RGB", (10, 10), "red").save(in_dir / "a.png")
+    Image.new("RGB", (10, 10), "blue").save(in_dir / "a.jpg")
+    out_dir = tmp_path / "out"
+
+    result = CliRunner().invoke(cli, ["batch", "convert", str(in_dir), "-f", "webp", "-o", str(out_dir), "-j", "1"])
+
+    assert result.exit_code != 0
+    assert "1 succeeded, 1 failed" in result.output
+    assert "already produced by" in result.output
+    assert [p.name for p in out_dir.iterdir()] == ["a.webp"]
@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+from click.testing import CliRunner
+from PIL import Image
+
+from pixr import bench
+from pixr.__main__ import cli
+
+TINY = 0.02  # megapixels
+
+
+def test_corpus_is_deterministic(tmp_path: Path):
+    first = bench.generate_corpus(tmp_path / "a", sizes=(TINY,), seed=7)
+    second = bench.generate_corpus(tmp_path / "b", sizes=(TINY,), seed=7)
+    other_seed = bench.generate_corpus(tmp_path / "c", kinds=("photo",), sizes=(TINY,), seed=8)
+
+    assert [image.kind for image in first] == list(bench.CORPUS_KINDS)
+    assert [image.path.read_bytes() for image in first] == [image.path.read_bytes() for image in second]
+    assert other_seed[0].path.read_bytes() != first[0].path.read_bytes()
+
+
+def test_corpus_images_match_their_kind(tmp_path: Path):
+    corpus = {image.kind: image for image in bench.generate_corpus(tmp_path, sizes=(TINY,))}
+
+    with Image.open(corpus["photo"].path) as img:
+        assert img.format == "JPEG" and img.getexif()
+    with Image.open(corpus["alpha"].path) as img:
+        assert img.mode == "RGBA" and img.getchannel("A").getextrema()[0] == 0
+    with Image.open(corpus["animated"].path) as img:
+        assert img.is_animated and img.n_frames == bench.ANIMATION_FRAMES
+
+
+def test_build_cases_covers_runners_and_strategies(tmp_path: Path):
+    corpus = bench.generate_corpus(tmp_path, kinds=("screenshot", "animated"), sizes=(TINY,))
+    names = [case.name for case in bench.build_cases(corpus)]
+
+    assert "runner:convert/screenshot-0.02mp" in names
+    assert "strategy:png/screenshot-0.02mp" in names
+    assert "runner:convert/animated-0.02mp" not in names
+    assert [case.name for case in bench.build_cases(corpus, match="strategy:jpeg")] == [
+        "strategy:jpeg/screenshot-0.02mp"
+    ]
+
+
+def test_run_bench_reports_probes_and_timings(tmp_path: Path):
+    corpus = bench.generate_corpus(tmp_path, kinds=("photo",), sizes=(TINY,))
+    cases = bench.build_cases(corpus, match="target-size")
+
+    [result] = bench.run_bench(cases, repeat=2, isolate=False)
+
+    assert result.name == "runner:target-size/photo-0.02mp"
+    assert len(result.timings) == 2 and result.wall_time > 0
+    assert result.probes >= 1
+
+
+def test_compare_flags_regressions():
+    baseline = {"case": {"name": "case", "wall_time": 0.1, "peak_rss_kb": 1000, "probes": 5}}
+    steady = bench.CaseResult("case", 0.105, 9.5, 1050, 5)
+    slower = bench.CaseResult("case", 0.2, 5.0, 2000, 7)
+
+    assert bench.compare([steady], baseline, threshold=0.1) == []
+    regressions = bench.compare([slower], baseline, threshold=0.1)
+    assert len(regressions) == 3
+    assert bench.compare([bench.CaseResult("new", 1.0, 1.0, None, None)], baseline) == []
+
+
+def test_cli_writes_report_and_compares_with_baseline(tmp_path: Path):
+    report = tmp_path / "report.json"
+    args = ["bench", "--sizes", str(TINY), "--kinds", "photo", "-k", "anonymize", "--repeat", "1", "--no-isolate"]
+    args += ["--corpus-dir", str(tmp_path / "corpus")]
+
+    result = CliRunner().invoke(cli, [*args, "--output", str(report)])
+    assert result.exit_code == 0, result.output
+    assert "runner:anonymize/photo-0.02mp" in result.output
+
+    cases = json.loads(report.read_text())["cases"]
+    assert [case["name"] for case in cases] == ["runner:anonymize/photo-0.02mp"]
+
+    cases[0]["wall_time"] /= 1000
+    report.write_text(json.dumps({"cases": cases}))
+    result = CliRunner().invoke(cli, [*args, "--baseline", str(report)])
+    assert result.exit_code != 0
+    assert "1 regression(s)" in result.output
+
+
+def test_cli_rejects_unknown_kind(tmp_path: Path):
+    result = CliRunner().invoke(cli, ["bench", "--kinds", "vector", "--corpus-dir", str(tmp_path)])
+
+    assert result.exit_code != 0
+    assert "Unknown corpus kind 'vector'" in result.output
@@ -0,0 +1,160 @@
+import random
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from pixr import api
+from pixr.__main__ import cli
+from pixr.budget import SizeCurve, allocate, curve_qualities
+
+
+def _photo(side: int, grain: int, seed: int) -> bytes:
+    """A smooth JPEG with adjustable grain, so images differ in how costly quality is."""
+    rng = random.Random(seed)
+    coarse = Image.frombytes("RGB", (side // 16, side // 16), rng.randbytes((side // 16) ** 2 * 3))
+    noise = Image.effect_noise((side, side), grain).convert("RGB")
+    img = Image.blend(coarse.resize((side, side), Image.Resampling.BICUBIC), noise, 0.15)
+    buffer = BytesIO()
+    img.save(buffer, "JPEG", quality=92)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def gallery() -> list[bytes]:
+    return [_photo(240, 10, 0), _photo(320, 40, 1), _photo(400, 80, 2)]
+
+
+def _quality_at(curve: SizeCurve, share: int) -> int:
+    interpolated = curve.interpolated()
+    return max(q for q, size in zip(interpolated.qualities, interpolated.sizes) if size <= share)
+
+
+def test_curve_qualities_cover_the_range():
+    assert curve_qualities(50, 92) == [50, 55, 60, 65, 70, 75, 80, 85, 90, 92]
+    assert curve_qualities(90, 90) == [90]
+
+
+def test_interpolated_curve_is_geometric_between_samples():
+    curve = SizeCurve([50, 60], [1000, 4000]).interpolated()
+
+    assert curve.qualities == list(range(50, 61))
+    assert curve.sizes[0] == 1000 and curve.sizes[-1] == 4000
+    assert curve.sizes[5] == 2000
+
+
+def test_allocate_min_maximizes_the_lowest_quality():
+    cheap = SizeCurve([50, 75, 100], [1_000, 2_000, 8_000])
+    costly = SizeCurve([50, 75, 100], [10_000, 20_000, 80_000])
+
+    shares = allocate([cheap, costly], 30_000, 'min')
+
+    assert sum(shares) <= 30_000
+    # The costly image sets the minimum; bytes it cannot use go on raising the cheap one
+    worst = _quality_at(costly, shares[1])
+    assert _quality_at(cheap, shares[0]) >= worst
+    assert cheap.interpolated().sizes[worst - 50] + costly.interpolated().sizes[worst + 1 - 50] > 30_000
+
+
+def test_allocate_mean_spends_bytes_where_quality_is_cheap():
+    cheap = SizeCurve([50, 75, 100], [1_000, 2_000, 8_000])
+    costly = SizeCurve([50, 75, 100], [10_000, 20_000, 80_000])
+
+    min_shares = allocate([cheap, costly], 30_000, 'min')
+    mean_shares = allocate([cheap, costly], 30_000, 'mean')
+
+    assert sum(mean_shares) <= 30_000
+    assert _quality_at(cheap, mean_shares[0]) == 100
+    mean_quality = [_quality_at(cheap, mean_shares[0]), _quality_at(costly, mean_shares[1])]
+    min_quality = [_quality_at(cheap, min_shares[0]), _quality_at(costly, min_shares[1])]
+    assert sum(mean_quality) >= sum(min_quality)
+
+
+def test_allocate_falls_back_to_floors_when_over_budget():
+    curves = [SizeCurve([50, 100], [5_000, 9_000]), SizeCurve([50, 100], [6_000, 9_000])]
+
+    assert allocate(curves, 10_000) == [5_000, 6_000]
+    with pytest.raises(ValueError, match="Unknown budget objective"):
+        allocate(curves, 10_000, 'max')
+
+
+@pytest.mark.parametrize("objective", ["min", "mean"])
+def test_target_size_budget_meets_total(gallery: list[bytes], objective: str):
+    budget = sum(map(len, gallery)) // 3
+
+    results = api.target_size_budget(gallery, budget, objective, jobs=2)
+
+    assert len(results) == len(gallery)
+    assert sum(result.size for result in results) <= budget
+    for result in results:
+        assert result.format == "JPEG"
+        assert result.size <= result.params["share_bytes"]
+        assert result.params["budget_bytes"] == budget
+
+
+def test_target_size_budget_beats_an_even_split(gallery: list[bytes]):
+    budget = sum(map(len, gallery)) // 3
+
+    shared = api.target_size_budget(gallery, budget, 'min')
+    even = [api.target_size(data, budget // len(gallery)) for data in gallery]
+
+    assert min(result.params["quality"] for result in shared) >= min(result.params["quality"] for result in even)
+    assert sum(result.size for result in shared) <= budget
+
+
+def test_target_size_budget_rejects_other_formats(static_image_path: Path):
+    with pytest.raises(ValueError, match="only supports still JPEG and WebP"):
+        api.target_size_budget([static_image_path.read_bytes()], "10KB")
+
+
+def test_cli_total_writes_every_output(tmp_path: Path, gallery: list[bytes]):
+    source = tmp_path / "gallery"
+    source.mkdir()
+    for index, data in enumerate(gallery):
+        (source / f"{index}.jpg").write_bytes(data)
+    budget = sum(map(len, gallery)) // 3
+
+    result = CliRunner().invoke(
+        cli, ["target-size", "--total", "-s", str(budget), str(source), "-o", str(tmp_path / "out"), "-v"]
+    )
+
+    assert result.exit_code == 0, result.output
+    outputs = sorted((tmp_path / "out").iterdir())
+    assert [path.name for path in outputs] == ["0.jpg", "1.jpg", "2.jpg"]
+    assert sum(path.stat().st_size for path in outputs) <= budget
+    assert "✓ 3 image(s)" in result.output
+
+
+def test_cli_single_file_mode_still_takes_one_input(tmp_path: Path, image_file_factory):
+    first, second = image_file_factory("a.jpg"), image_file_factory("b.jpg")
+
+    result = CliRunner().invoke(cli, ["target-size", "-s", "10KB", str(first), str(second), str(tmp_path / "c.jpg")])
+
+    assert result.exit_code != 0
+    assert "use --total" in result.output
+
+
+def test_run_budget_skips_images_without_data(tmp_path: Path, gallery: list[bytes], monkeypatch):
+    """An image that could not be encoded at all is reported instead of crashing the write."""
+    from pixr.batch import BatchItem
+    from pixr.budget import run_budget
+
+    paths = []
+    for index, data in enumerate(gallery[:2]):
+        paths.append(tmp_path / f"{index}.jpg")
+        paths[-1].write_bytes(data)
+    target_size_budget = api.target_size_budget
+
+    def first_missing(*args, **kwargs) -> list[api.Result]:
+        results = target_size_budget(*args, **kwargs)
+        results[0].data = None
+        return results
+
+    monkeypatch.setattr(api, "target_size_budget", first_missing)
+    summary = run_budget([BatchItem(path, Path(path.name)) for path in paths], sum(map(len, gallery)), jobs=1)
+
+    assert summary.skipped == [paths[0]]
+    assert [output.name for _, output, _ in summary.outputs] == ["1_targeted.jpg"]
+    assert not summary.met and "1 skipped" in summary.format()
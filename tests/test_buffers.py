@@ -0,0 +1,148 @@
+import io
+import os
+import pickle
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from pixr import api, buffers
+from pixr.__main__ import cli
+from pixr.buffers import EncodeBuffer, atomic_output, spill_to, write_atomic
+from pixr.strategies.probing import EncodingCandidates, FullResolutionProbing
+
+
+def _temp_files(directory: Path) -> list[Path]:
+    return list(directory.glob(f"{buffers.TEMP_PREFIX}*"))
+
+
+def _umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def test_buffer_stays_in_memory_without_spill_directory():
+    buffer = EncodeBuffer(threshold=4)
+    buffer.write(b"0123456789")
+
+    assert not buffer.spilled
+    assert buffer.tell() == 10
+    assert buffer.view() == b"0123456789"
+
+
+def test_buffer_spills_into_directory_and_commits_by_rename(tmp_path: Path):
+    with spill_to(tmp_path):
+        buffer = EncodeBuffer(threshold=4)
+    buffer.write(b"0123")
+    assert not buffer.spilled
+    buffer.write(b"456789")
+
+    assert buffer.spilled and buffer.path.parent == tmp_path
+    view = buffer.view()
+    assert view == b"0123456789"
+
+    write_atomic(tmp_path / "out.bin", view)
+
+    assert (tmp_path / "out.bin").read_bytes() == b"0123456789"
+    assert (tmp_path / "out.bin").stat().st_mode & 0o777 == 0o666 & ~_umask()
+    assert _temp_files(tmp_path) == []
+    assert view == b"0123456789"
+
+
+def test_spilled_buffer_is_removed_when_closed(tmp_path: Path):
+    buffer = EncodeBuffer(tmp_path, threshold=1)
+    buffer.write(b"discarded")
+    assert len(_temp_files(tmp_path)) == 1
+
+    buffer.close()
+
+    assert _temp_files(tmp_path) == []
+
+
+def test_buffer_keeps_memory_when_spill_directory_is_missing(tmp_path: Path):
+    buffer = EncodeBuffer(tmp_path / "missing", threshold=1)
+    buffer.write(b"kept")
+
+    assert not buffer.spilled and buffer.view() == b"kept"
+
+
+def test_atomic_output_keeps_old_file_on_failure(tmp_path: Path):
+    path = tmp_path / "out.jpg"
+    path.write_bytes(b"old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_output(path) as f:
+            f.write(b"partial")
+            raise RuntimeError("encoder crashed")
+
+    assert path.read_bytes() == b"old"
+    assert _temp_files(tmp_path) == []
+
+
+def test_candidates_keep_only_the_returned_buffer():
+    img = Image.effect_noise((200, 150), 40).convert("RGB")
+    encoded: list[EncodeBuffer] = []
+
+    def encode(probe_img: Image.Image, quality: int) -> EncodeBuffer:
+        buffer = EncodeBuffer()
+        probe_img.save(buffer, format="JPEG", quality=quality)
+        encoded.append(buffer)
+        return buffer
+
+    target = len(encode(img, 75).view())
+    result = FullResolutionProbing().search(encode, img, target, 50, 100)
+
+    open_buffers = [buffer for buffer in encoded[1:] if not buffer.closed]
+    assert len(open_buffers) == 1
+    assert result["best_result_data"] == open_buffers[0].view()
+    assert len(result["best_result_data"]) <= target
+
+
+def test_candidates_fall_back_to_the_smallest_buffer():
+    sizes = iter([b"x" * 30, b"x" * 10, b"x" * 20])
+
+    def encode(img, quality):
+        buffer = EncodeBuffer()
+        buffer.write(next(sizes))
+        return buffer
+
+    candidates = EncodingCandidates(encode, None, 0)
+    for quality in (60, 50, 55):
+        candidates.measure(quality)
+    result = candidates.result()
+
+    assert result["quality_floor_hit"]
+    assert len(result["best_result_data"]) == 10 and result["best_params"]["quality"] == 50
+
+
+def test_results_with_views_can_be_pickled():
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), "red").save(buffer, "PNG")
+
+    result = api.convert(buffer.getvalue(), "jpg")
+    restored = pickle.loads(pickle.dumps(result))
+
+    assert isinstance(result.data, memoryview)
+    assert restored.data == bytes(result.data)
+
+
+def test_cli_output_spills_and_is_renamed_into_place(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(buffers, "SPILL_THRESHOLD", 1024)
+    spilled = []
+    original_spill = EncodeBuffer._spill
+    monkeypatch.setattr(EncodeBuffer, "_spill", lambda self: spilled.append(original_spill(self)))
+    input_file = tmp_path / "photo.png"
+    Image.effect_noise((300, 200), 40).convert("RGB").save(input_file)
+
+    result = CliRunner().invoke(cli, ["target-size", str(input_file), "-s", "40KB"])
+
+    assert result.exit_code == 0, result.output
+    output = tmp_path / "photo_targeted.png"
+    with Image.open(output) as img:
+        img.load()
+        assert img.size == (300, 200)
+    assert output.stat().st_size <= 40 * 1024
+    assert spilled
+    assert _temp_files(tmp_path) == []
@@ -0,0 +1,92 @@
+import os
+from pathlib import Path
+
+from click.testing import CliRunner
+from PIL import Image
+
+from pixr.__main__ import cli
+from pixr.cache import ResultCache
+from pixr.command.core import Command
+
+
+def _rescale(cache_dir: Path, input_path: Path, percentage: int = 50, *extra: str):
+    return CliRunner().invoke(
+        cli, ["--cache-dir", str(cache_dir), *extra, "rescale", str(input_path), "-p", str(percentage)]
+    )
+
+
+def test_second_run_is_restored_from_cache(tmp_path: Path, static_image_path: Path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    output_path = static_image_path.with_name("static_rescaled_50pct.png")
+
+    first = _rescale(cache_dir, static_image_path)
+    assert first.exit_code == 0, first.output
+    expected = output_path.read_bytes()
+    output_path.unlink()
+
+    monkeypatch.setattr(Image, "open", lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError("decoded")))
+    second = _rescale(cache_dir, static_image_path)
+
+    assert second.exit_code == 0, second.output
+    assert "from cache" in second.output
+    assert output_path.read_bytes() == expected
+
+
+def test_cache_key_depends_on_content_and_options(tmp_path: Path, static_image_path: Path):
+    def key(output_path: str = "out.png", **options) -> str:
+        command = Command.from_cli("rescale", {"verbose": False, "file_path": str(static_image_path), **options})
+        return ResultCache.key_for(static_image_path, command, Path(output_path))
+
+    assert key(percentage=50) == key("/elsewhere/out.PNG", percentage=50, verbose=True)
+    assert key(percentage=50) != key("out.jpg", percentage=50)
+    assert key(percentage=50) != key(percentage=25)
+    assert key(percentage=50) != key(percentage=50, resample="fast")
+
+    before = key(percentage=50)
+    Image.new("RGB", (100, 80), color="blue").save(static_image_path)
+    assert key(percentage=50) != before
+
+
+def test_cache_keeps_outputs_of_different_formats_apart(tmp_path: Path, static_image_path: Path):
+    cache_dir = tmp_path / "cache"
+    for name in ("out.jpg", "out.webp"):
+        args = ["--cache-dir", str(cache_dir), "rescale", "-p", "50", str(static_image_path), str(tmp_path / name)]
+        result = CliRunner().invoke(cli, args)
+        assert result.exit_code == 0, result.output
+        assert "from cache" not in result.output
+
+    with Image.open(tmp_path / "out.jpg") as jpeg, Image.open(tmp_path / "out.webp") as webp:
+        assert (jpeg.format, webp.format) == ("JPEG", "WEBP")
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache", max_bytes=300)
+    source = tmp_path / "payload.bin"
+    source.write_bytes(b"x" * 100)
+
+    for i, key in enumerate(["aa01", "bb02", "cc03"]):
+        cache.put(key, source)
+        os.utime(cache._path_for(key), (1000 + i, 1000 + i))
+    assert cache.restore("aa01", tmp_path / "restored.bin")  # refreshes aa01
+
+    cache.put("dd04", source)
+
+    assert cache.stats().entries == 3
+    assert cache.restore("aa01", tmp_path / "restored.bin")
+    assert not cache.restore("bb02", tmp_path / "restored.bin")
+    assert cache.restore("cc03", tmp_path / "restored.bin")
+    assert not list((tmp_path / "cache" / "tmp").iterdir())
+
+
+def test_cache_stats_and_clear_commands(tmp_path: Path, static_image_path: Path):
+    cache_dir = tmp_path / "cache"
+    _rescale(cache_dir, static_image_path)
+    runner = CliRunner()
+
+    stats = runner.invoke(cli, ["--cache-dir", str(cache_dir), "cache", "stats"])
+    assert stats.exit_code == 0, stats.output
+    assert "Entries: 1" in stats.output
+
+    cleared = runner.invoke(cli, ["--cache-dir", str(cache_dir), "cache", "clear"])
+    assert "Removed 1 cached result(s)" in cleared.output
+    assert ResultCache(cache_dir, 1024).stats().entries == 0
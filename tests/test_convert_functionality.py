@@ -1,5 +1,7 @@
 import pytest
+from PIL import Image
 
+from pixr import api
 from pixr.command.core import CmdOptions, Command, CommandType
 from pixr.runner_factory import RunnerFactory
 from pixr.runners.convert import ConvertRunner
@@ -63,3 +65,43 @@ class TestConvertFunctionality:
         assert command.argument == CommandType.CONVERT
         assert command.options.target_format == "webp"
         assert command.options.quality == 90
+
+
+@pytest.mark.parametrize("effort", ["fast", "balanced", "max"])
+def test_convert_with_effort_preset(image_file_factory, effort):
+    """Every effort preset produces a valid image in the target format."""
+    input_path = image_file_factory("effort.png", size=(120, 90), fmt="PNG")
+    command = Command.from_cli(
+        "convert",
+        {"verbose": False, "file_path": str(input_path), "target_format": "webp", "effort": effort},
+    )
+
+    RunnerFactory.create_runner(command).run()
+
+    with Image.open(input_path.with_name("effort_converted.webp")) as img:
+        assert img.format == "WEBP"
+        assert img.size == (120, 90)
+
+
+def test_build_save_kwargs_maps_effort_to_encoder_knobs():
+    assert api.build_save_kwargs("webp", 85, "fast", "png") == {"method": 0, "quality": 85}
+    assert api.build_save_kwargs("png", 85, "max", "jpeg") == {"compress_level": 9, "optimize": True}
+    assert api.build_save_kwargs("jpg", 70, "fast", "png")["optimize"] is False
+
+
+def test_convert_decodes_input_once(image_file_factory, monkeypatch):
+    """The source format is read from the already opened image instead of reopening the file."""
+    input_path = image_file_factory("once.jpg", size=(60, 40))
+    opened = []
+    original_open = Image.open
+    monkeypatch.setattr(Image, "open", lambda *args, **kwargs: opened.append(args) or original_open(*args, **kwargs))
+    command = Command.from_cli("convert", {"verbose": False, "file_path": str(input_path), "target_format": "webp"})
+
+    RunnerFactory.create_runner(command).run()
+
+    assert len(opened) == 1
+
+
+def test_cmd_options_rejects_unknown_effort():
+    with pytest.raises(ValueError, match="Unsupported effort preset"):
+        CmdOptions(verbose=False, file_path="/path/to/input.png", target_format="webp", effort="ludicrous")
@@ -0,0 +1,92 @@
+import random
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from pixr import api
+from pixr.__main__ import cli
+from pixr.strategies.resolution import MIN_SCALE, SCALE_PRECISION, scale_search
+
+
+@pytest.fixture(scope="module")
+def camera_jpeg() -> bytes:
+    """A large, grainy photo that cannot reach small targets at quality 50."""
+    rng = random.Random(0)
+    width, height = 1600, 1200
+    coarse = Image.frombytes("RGB", (width // 32, height // 32), rng.randbytes((width // 32) * (height // 32) * 3))
+    img = Image.blend(
+        coarse.resize((width, height), Image.Resampling.BICUBIC),
+        Image.effect_noise((width, height), 40).convert("RGB"),
+        0.15,
+    )
+    buffer = BytesIO()
+    img.save(buffer, "JPEG", quality=92)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("exponent", [1.6, 2.0, 2.3])
+def test_scale_search_finds_largest_fitting_scale(exponent: float):
+    full_size = 1_000_000
+    target = 200_000
+    measured = []
+
+    def measure(scale: float) -> int:
+        measured.append(scale)
+        return int(full_size * scale**exponent)
+
+    result = scale_search(measure, target, full_size)
+
+    optimum = (target / full_size) ** (1 / exponent)
+    assert result.best is not None and result.best.size <= target
+    assert optimum * (1 - 3 * SCALE_PRECISION) <= result.best.scale <= optimum
+    assert len(measured) <= 4
+
+
+def test_scale_search_gives_up_below_min_scale():
+    result = scale_search(lambda scale: 500_000, 1_000, 500_000)
+
+    assert result.best is None
+    assert [probe.scale for probe in result.probes] == [MIN_SCALE]
+
+
+def test_target_size_downscales_when_floor_is_hit(camera_jpeg: bytes):
+    full = api.target_size(camera_jpeg, 60_000)
+    downscaled = api.target_size(camera_jpeg, 60_000, downscale=True)
+
+    assert full.params["quality_floor_hit"]
+    assert not downscaled.params["quality_floor_hit"]
+    assert downscaled.size <= 60_000
+    assert downscaled.params["quality"] >= 50
+    assert downscaled.params["original_size"] == (1600, 1200)
+    # The reported scale is rounded to three digits, so it pins the width down to a pixel
+    assert downscaled.width < 1600 and abs(downscaled.width - 1600 * downscaled.params["scale"]) <= 1
+    assert downscaled.params["probes"] <= full.params["probes"] + 8
+    with Image.open(BytesIO(downscaled.data)) as img:
+        assert img.size == (downscaled.width, downscaled.height)
+
+
+def test_target_size_keeps_resolution_when_quality_suffices(camera_jpeg: bytes):
+    result = api.target_size(camera_jpeg, len(camera_jpeg) // 2, downscale=True)
+
+    assert "scale" not in result.params
+    assert (result.width, result.height) == (1600, 1200)
+
+
+def test_downscale_rejects_formats_without_quality(static_image_path: Path):
+    with pytest.raises(ValueError, match="only supported for JPEG and WebP"):
+        api.target_size(static_image_path.read_bytes(), 100, downscale=True)
+
+
+def test_cli_downscale(tmp_path: Path, camera_jpeg: bytes):
+    input_file = tmp_path / "camera.jpg"
+    input_file.write_bytes(camera_jpeg)
+
+    result = CliRunner().invoke(cli, ["target-size", str(input_file), "-s", "60KB", "--downscale"])
+
+    assert result.exit_code == 0, result.output
+    assert "Target size achieved" in result.output
+    assert "downscaled from 1600x1200" in result.output
+    assert (tmp_path / "camera_targeted.jpg").stat().st_size <= 60 * 1024
@@ -0,0 +1,148 @@
+import io
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image, ImageChops, ImageDraw, ImageStat
+
+from pixr import api
+from pixr.__main__ import cli
+from pixr.strategies.gif import GifStrategy, GifTrial
+
+DURATIONS = [40 + 10 * i for i in range(12)]
+
+
+@pytest.fixture(scope="module")
+def sprite_gif() -> bytes:
+    """A ball moving over a noisy, static backdrop."""
+    backdrop = Image.effect_noise((240, 160), 50).convert("RGB")
+    frames = []
+    for i in range(12):
+        frame = backdrop.copy()
+        x = min(i, 6) * 25
+        ImageDraw.Draw(frame).ellipse((x, 40, x + 50, 90), fill=(230, 20 * i, 40))
+        frames.append(frame)
+    buffer = io.BytesIO()
+    frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:], duration=DURATIONS, loop=0)
+    return buffer.getvalue()
+
+
+def _frames(data: bytes) -> list[tuple[Image.Image, int]]:
+    with Image.open(io.BytesIO(data)) as img:
+        frames = []
+        for index in range(img.n_frames):
+            img.seek(index)
+            frames.append((img.convert("RGB"), img.info["duration"]))
+        return frames
+
+
+def test_gif_strategy_keeps_frames_and_timing(sprite_gif: bytes):
+    with Image.open(io.BytesIO(sprite_gif)) as img:
+        result = GifStrategy(img, len(sprite_gif), wild_mode=False).optimize()
+
+    assert not result["quality_floor_hit"]
+    assert len(result["best_result_data"]) <= len(sprite_gif)
+    assert result["best_params"]["decimation"] == 1
+    frames = _frames(result["best_result_data"])
+    source = _frames(sprite_gif)
+    assert [duration for _, duration in frames] == [duration for _, duration in source]
+    for (image, _), (original, _) in zip(frames, source):
+        assert max(ImageStat.Stat(ImageChops.difference(image, original)).mean) < 3
+
+
+def test_gif_strategy_stores_only_changed_regions(sprite_gif: bytes):
+    with Image.open(io.BytesIO(sprite_gif)) as img:
+        result = GifStrategy(img, len(sprite_gif), wild_mode=False).optimize()
+
+    with Image.open(io.BytesIO(result["best_result_data"])) as img:
+        img.seek(1)
+        assert img.tile[0][1][2] - img.tile[0][1][0] < img.width
+
+
+def test_gif_strategy_reduces_colors_to_meet_target(sprite_gif: bytes):
+    full = len(GifStrategy(Image.open(io.BytesIO(sprite_gif)), 10**9, False).optimize()["best_result_data"])
+
+    with Image.open(io.BytesIO(sprite_gif)) as img:
+        result = GifStrategy(img, full * 2 // 3, wild_mode=False).optimize()
+
+    assert len(result["best_result_data"]) <= full * 2 // 3
+    assert result["best_params"]["colors"] < 256 or result["best_params"]["decimation"] > 1
+
+
+def test_gif_strategy_returns_smallest_when_floor_is_hit(sprite_gif: bytes):
+    with Image.open(io.BytesIO(sprite_gif)) as img:
+        result = GifStrategy(img, 100, wild_mode=False).optimize()
+
+    assert result["quality_floor_hit"]
+    assert len(result["best_result_data"]) == result["smallest_size"]
+    assert result["best_params"]["decimation"] == 2
+    frames = _frames(result["best_result_data"])
+    assert sum(duration for _, duration in frames) == sum(DURATIONS)
+
+
+def test_gif_trial_discard_is_idempotent():
+    trial = GifTrial(16, dither=False)
+    trial.start(loop=0)
+    trial.add_frame(Image.new("P", (4, 4)), 100, 1, None, (0, 0))
+    size = trial.size
+
+    trial.discard()
+    trial.discard()
+
+    assert not trial.alive and trial.size == size > 0
+    with pytest.raises(ValueError, match="not running"):
+        trial.view()
+
+
+def test_gif_strategy_keeps_transparency():
+    frames = []
+    for i in range(4):
+        frame = Image.new("RGBA", (80, 60), (0, 0, 0, 0))
+        ImageDraw.Draw(frame).rectangle((i * 10, 10, i * 10 + 30, 40), fill=(0, 200, 0, 255))
+        frames.append(frame)
+    buffer = io.BytesIO()
+    frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:], duration=80, loop=0, disposal=2)
+
+    result = api.target_size(buffer.getvalue(), buffer.tell() * 2)
+
+    with Image.open(io.BytesIO(result.data)) as img:
+        for index in range(4):
+            img.seek(index)
+            rgba = img.convert("RGBA")
+            assert rgba.getpixel((index * 10 + 5, 20))[3] == 255
+            assert rgba.getpixel((79, 59))[3] == 0
+
+
+def test_target_size_keeps_static_gif_a_gif():
+    buffer = io.BytesIO()
+    Image.effect_noise((120, 90), 40).convert("RGB").save(buffer, "GIF")
+
+    result = api.target_size(buffer.getvalue(), buffer.tell())
+
+    assert result.format == "GIF"
+    assert result.data[:6] in (b"GIF87a", b"GIF89a")
+    assert result.params["frames"] == 1
+
+
+def test_gif_strategy_never_decimates_a_still_gif():
+    buffer = io.BytesIO()
+    Image.effect_noise((120, 90), 40).convert("RGB").save(buffer, "GIF")
+
+    with Image.open(buffer) as img:
+        result = GifStrategy(img, 100, wild_mode=True).optimize()
+
+    assert result["quality_floor_hit"]
+    assert result["best_params"]["decimation"] == 1
+    assert "frames" not in result["best_params"]["info"]
+
+
+def test_cli_target_size_animated_gif(tmp_path: Path, sprite_gif: bytes):
+    input_file = tmp_path / "sprite.gif"
+    input_file.write_bytes(sprite_gif)
+
+    result = CliRunner().invoke(cli, ["target-size", str(input_file), "-s", str(len(sprite_gif))])
+
+    assert result.exit_code == 0, result.output
+    assert "Target size achieved" in result.output
+    with Image.open(tmp_path / "sprite_targeted.gif") as img:
+        assert img.format == "GIF" and img.is_animated
@@ -0,0 +1,74 @@
+import io
+
+import pytest
+from PIL import Image, ImageFilter
+
+from pixr.strategies.jpeg import JpegStrategy, estimate_jpeg_quality
+from pixr.strategies.search import interpolation_search
+
+
+def _photo_like(size=(600, 400)) -> Image.Image:
+    return Image.effect_noise(size, 40).convert("RGB").filter(ImageFilter.GaussianBlur(1.5))
+
+
+def _reopen_as_jpeg(img: Image.Image, quality: int) -> Image.Image:
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=quality)
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+@pytest.mark.parametrize("quality", [20, 50, 75, 92])
+def test_estimate_jpeg_quality_from_quantization_tables(quality: int):
+    assert estimate_jpeg_quality(_reopen_as_jpeg(_photo_like(), quality)) == quality
+
+
+def test_estimate_jpeg_quality_for_non_jpeg_is_none():
+    assert estimate_jpeg_quality(Image.new("RGB", (10, 10))) is None
+
+
+def test_interpolation_search_finds_highest_fitting_quality():
+    """The search lands on the exact optimum in at most 4 encodes on average, where bisection needs 6."""
+    images = [
+        _photo_like(),
+        _photo_like((800, 600)).filter(ImageFilter.GaussianBlur(2)),
+        Image.effect_noise((400, 300), 60),
+    ]
+    probe_counts = []
+    for img in images:
+        sizes = {}
+
+        def measure(quality: int) -> int:
+            if quality not in sizes:
+                buffer = io.BytesIO()
+                img.save(buffer, "JPEG", quality=quality, optimize=True)
+                sizes[quality] = buffer.tell()
+            return sizes[quality]
+
+        low_size, high_size = measure(50), measure(95)
+        for fraction in (0.1, 0.3, 0.5, 0.7, 0.9):
+            target = int(low_size + (high_size - low_size) * fraction)
+            result = interpolation_search(measure, target, 50, 95)
+
+            assert result.best is not None
+            assert result.best.size <= target < measure(result.best.quality + 1)
+            probe_counts.append(len(result.probes))
+
+    assert sum(probe_counts) / len(probe_counts) <= 4
+
+
+def test_jpeg_strategy_never_exceeds_source_quality():
+    """A generous target is met at the source's own quality instead of re-encoding higher."""
+    source = _reopen_as_jpeg(_photo_like(), 70)
+
+    result = JpegStrategy(source, 10 * 1024 * 1024, wild_mode=False).optimize()
+
+    assert result["best_params"]["quality"] == 70
+    assert result["probes"] == 1
+
+
+def test_jpeg_strategy_reports_floor_hit():
+    result = JpegStrategy(_reopen_as_jpeg(_photo_like(), 95), 1024, wild_mode=False).optimize()
+
+    assert result["quality_floor_hit"]
+    assert result["best_params"]["quality"] == 50
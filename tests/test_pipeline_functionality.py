@@ -0,0 +1,127 @@
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from pixr.__main__ import cli
+from pixr.command.core import Command
+from pixr.command.exceptions import PercentageRangeError
+from pixr.pipeline import format_pipeline, parse_pipeline
+from pixr.runners.pipeline import PipelineRunner
+
+
+@pytest.fixture
+def photo_path(tmp_path: Path) -> Path:
+    """A noisy JPEG with EXIF metadata, large enough for size targets to matter."""
+    file_path = tmp_path / "photo.jpg"
+    exif = Image.Exif()
+    exif[0x010F] = "PixrCam"  # Make
+    Image.effect_noise((400, 300), 60).convert("RGB").save(file_path, quality=95, exif=exif)
+    return file_path
+
+
+def _run(spec: str, file_path: Path, **options) -> None:
+    options = {"verbose": False, "file_path": str(file_path), "pipeline": spec, **options}
+    PipelineRunner(Command.from_cli("pipeline", options)).run()
+
+
+def test_parse_pipeline_normalizes_spec():
+    stages = parse_pipeline(" Rescale:50|convert:WEBP |target-size:200kb| anonymize ")
+
+    assert [stage.name for stage in stages] == ["rescale", "convert", "target-size", "anonymize"]
+    assert [stage.value for stage in stages] == [50, "webp", 200 * 1024, None]
+    assert format_pipeline(stages) == "rescale:50 | convert:webp | target-size:200KB | anonymize"
+
+
+@pytest.mark.parametrize(
+    "spec, error",
+    [
+        ("", ValueError),
+        ("blur:3", ValueError),
+        ("rescale", ValueError),
+        ("rescale:half", ValueError),
+        ("rescale:150", PercentageRangeError),
+        ("convert:xyz", ValueError),
+        ("target-size:lots", ValueError),
+        ("anonymize:now", ValueError),
+    ],
+)
+def test_parse_pipeline_rejects_invalid_specs(spec: str, error: type):
+    with pytest.raises(error):
+        parse_pipeline(spec)
+
+
+def test_pipeline_decodes_once_and_encodes_final_format(photo_path: Path, monkeypatch):
+    opened = []
+    original_open = Image.open
+
+    def counting_open(*args, **kwargs):
+        opened.append(args[0])
+        return original_open(*args, **kwargs)
+
+    monkeypatch.setattr(Image, "open", counting_open)
+    _run("rescale:50 | convert:webp | target-size:20KB | anonymize", photo_path)
+    monkeypatch.undo()
+
+    assert len(opened) == 1
+    output_path = photo_path.with_name("photo_pipeline.webp")
+    assert output_path.stat().st_size <= 20 * 1024
+    with Image.open(output_path) as img:
+        assert img.format == "WEBP"
+        assert img.size == (200, 150)
+
+
+def test_pipeline_keeps_metadata_unless_anonymized(photo_path: Path, tmp_path: Path):
+    kept = tmp_path / "kept.jpg"
+    stripped = tmp_path / "stripped.jpg"
+
+    _run("rescale:50", photo_path, output_path=str(kept))
+    _run("rescale:50 | anonymize", photo_path, output_path=str(stripped))
+
+    with Image.open(kept) as img:
+        assert img.getexif()[0x010F] == "PixrCam"
+    with Image.open(stripped) as img:
+        assert not img.getexif()
+
+
+def test_pipeline_names_output_after_the_encoded_format(photo_path: Path, tmp_path: Path):
+    # PPM is not a format pixr writes, so the pipeline re-encodes it as PNG
+    scan_path = tmp_path / "scan.ppm"
+    with Image.open(photo_path) as img:
+        img.save(scan_path)
+
+    _run("rescale:50", photo_path)
+    _run("rescale:50", scan_path)
+
+    with Image.open(photo_path.with_name("photo_pipeline.jpg")) as img:
+        assert img.format == "JPEG"
+    with Image.open(tmp_path / "scan_pipeline.png") as img:
+        assert img.format == "PNG" and img.size == (200, 150)
+    assert not (tmp_path / "scan_pipeline.ppm").exists()
+
+
+@pytest.mark.parametrize("format", ["jpeg", "webp", "png"])
+def test_pipeline_keeps_metadata_through_a_size_target(photo_path: Path, tmp_path: Path, format: str):
+    output_path = tmp_path / f"targeted.{format}"
+    spec = f"rescale:25 | convert:{format} | target-size:40KB"
+
+    _run(spec, photo_path, output_path=str(output_path))
+
+    assert output_path.stat().st_size <= 40 * 1024
+    with Image.open(output_path) as img:
+        assert img.getexif()[0x010F] == "PixrCam"
+
+
+def test_pipeline_rejects_target_size_for_unsupported_format(photo_path: Path):
+    with pytest.raises(ValueError, match="not supported for target-size"):
+        _run("convert:bmp | target-size:10KB", photo_path)
+
+
+def test_pipeline_command(photo_path: Path):
+    result = CliRunner().invoke(cli, ["pipeline", "rescale:25|convert:png", str(photo_path)])
+
+    assert result.exit_code == 0, result.output
+    assert "rescale:25 | convert:png" in result.output
+    with Image.open(photo_path.with_name("photo_pipeline.png")) as img:
+        assert img.size == (100, 75)
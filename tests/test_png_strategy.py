@@ -0,0 +1,78 @@
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from pixr.strategies.png import PngStrategy
+
+
+@pytest.fixture
+def screenshot() -> Image.Image:
+    """A screenshot-like image: flat UI blocks over a smooth gradient with some noise."""
+    img = Image.linear_gradient("L").resize((400, 300)).convert("RGB")
+    img = Image.blend(img, Image.effect_noise((400, 300), 30).convert("RGB"), 0.3)
+    draw = ImageDraw.Draw(img)
+    for i in range(8):
+        draw.rectangle((20 + i * 45, 20, 55 + i * 45, 80), fill=(40 * i, 200 - 20 * i, 120))
+    return img
+
+
+def _lossless_size(img: Image.Image) -> int:
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG", optimize=True)
+    return buffer.tell()
+
+
+def test_png_strategy_keeps_lossless_when_it_fits(screenshot: Image.Image):
+    result = PngStrategy(screenshot, 10 * 1024 * 1024, wild_mode=False).optimize()
+
+    assert result["best_params"]["colors"] is None
+    with Image.open(io.BytesIO(result["best_result_data"])) as img:
+        assert img.mode == "RGB"
+
+
+def test_png_strategy_quantizes_to_meet_target(screenshot: Image.Image):
+    """A target below the lossless size is met with a palette image."""
+    target = _lossless_size(screenshot) // 3
+
+    result = PngStrategy(screenshot, target, wild_mode=False).optimize()
+
+    assert len(result["best_result_data"]) <= target
+    assert not result["quality_floor_hit"]
+    assert result["best_params"]["colors"] in (256, 128, 64, 32, 16)
+    with Image.open(io.BytesIO(result["best_result_data"])) as img:
+        assert img.mode == "P"
+        assert img.size == screenshot.size
+
+
+def test_png_strategy_reports_floor_hit(screenshot: Image.Image):
+    result = PngStrategy(screenshot, 100, wild_mode=False).optimize()
+
+    assert result["quality_floor_hit"]
+    assert len(result["best_result_data"]) == result["smallest_size"]
+
+
+def test_png_strategy_preserves_alpha():
+    img = Image.new("RGBA", (200, 200), (255, 0, 0, 0))
+    img.paste(Image.effect_noise((100, 100), 60).convert("RGBA"), (50, 50))
+    target = _lossless_size(img) // 2
+
+    result = PngStrategy(img, target, wild_mode=False).optimize()
+
+    with Image.open(io.BytesIO(result["best_result_data"])) as out:
+        assert out.convert("RGBA").getpixel((0, 0))[3] == 0
+
+
+def test_png_strategy_keeps_indexed_source_that_fits(screenshot: Image.Image):
+    """An indexed PNG under the target is kept as it is rather than expanded to RGB and re-quantized."""
+    indexed = screenshot.quantize(colors=64)
+    target = _lossless_size(indexed) * 3 // 2
+    assert _lossless_size(indexed.convert("RGB")) > target
+
+    result = PngStrategy(indexed, target, wild_mode=False).optimize()
+
+    assert not result["quality_floor_hit"]
+    assert result["best_params"]["colors"] is None
+    with Image.open(io.BytesIO(result["best_result_data"])) as img:
+        assert img.mode == "P"
+        assert img.tobytes() == indexed.tobytes()
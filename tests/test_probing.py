@@ -0,0 +1,62 @@
+import io
+import random
+
+import pytest
+from PIL import Image, ImageFilter
+
+from pixr.strategies.jpeg import JpegStrategy
+from pixr.strategies.probing import FullResolutionProbing, ProxyProbing
+from pixr.strategies.webp import WebPStrategy
+
+
+@pytest.fixture(scope="module")
+def large_photo() -> Image.Image:
+    rng = random.Random(0)
+    noise = Image.frombytes("L", (400, 300), bytes(min(max(int(rng.gauss(128, 40)), 0), 255) for _ in range(120_000)))
+    return noise.convert("RGB").filter(ImageFilter.GaussianBlur(1.2)).resize((1600, 1200))
+
+
+def _full_size(img: Image.Image, quality: int) -> int:
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=quality, optimize=True)
+    return buffer.tell()
+
+
+@pytest.mark.parametrize("method", ["crop", "downsample"])
+def test_make_proxy_shrinks_large_images(large_photo: Image.Image, method: str):
+    proxy = ProxyProbing(method=method, max_pixels=100_000).make_proxy(large_photo)
+
+    assert proxy is not None
+    assert proxy.width * proxy.height <= 120_000
+    if method == "crop":
+        assert proxy.width % 16 == 0 and proxy.height % 16 == 0
+
+
+def test_make_proxy_skips_small_images():
+    assert ProxyProbing(max_pixels=100_000).make_proxy(Image.new("RGB", (300, 300))) is None
+
+
+@pytest.mark.parametrize("fraction", [0.2, 0.6])
+def test_proxy_probing_respects_target_with_few_full_encodes(large_photo: Image.Image, fraction: float):
+    """The proxy result never exceeds the target and needs only one or two full encodes."""
+    low_size, high_size = _full_size(large_photo, 50), _full_size(large_photo, 95)
+    target = int(low_size + (high_size - low_size) * fraction)
+    encode = JpegStrategy(large_photo, target, wild_mode=False)._encode
+
+    proxy_result = ProxyProbing(max_pixels=100_000).search(encode, large_photo, target, 50, 95)
+    full_result = FullResolutionProbing().search(encode, large_photo, target, 50, 95)
+
+    assert len(proxy_result["best_result_data"]) <= target
+    assert proxy_result["probes"] <= 3
+    assert proxy_result["probes"] < full_result["probes"]
+    assert abs(proxy_result["best_params"]["quality"] - full_result["best_params"]["quality"]) <= 3
+
+
+def test_webp_strategy_supports_proxy_probing(large_photo: Image.Image):
+    strategy = WebPStrategy(large_photo, 60 * 1024, wild_mode=False, probe_mode="proxy")
+    strategy.probing = ProxyProbing(max_pixels=100_000)
+
+    result = strategy.optimize()
+
+    assert len(result["best_result_data"]) <= 60 * 1024
+    assert "proxy_probes" in result
@@ -0,0 +1,79 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image, ImageChops, ImageFilter, ImageStat
+
+from pixr import api
+from pixr.__main__ import cli
+
+
+@pytest.fixture(scope="module")
+def photo_bytes() -> bytes:
+    bands = [Image.effect_noise((200, 150), 40).filter(ImageFilter.GaussianBlur(1.2)) for _ in range(3)]
+    buffer = io.BytesIO()
+    Image.merge("RGB", bands).resize((1600, 1200)).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def test_renditions_encode_every_width_and_format(photo_bytes: bytes):
+    results = api.renditions(photo_bytes, [400, 1200, 100], ["webp", "jpg"])
+
+    assert [(r.width, r.params["format"]) for r in results] == [
+        (1200, "webp"),
+        (1200, "jpg"),
+        (400, "webp"),
+        (400, "jpg"),
+        (100, "webp"),
+        (100, "jpg"),
+    ]
+    for result in results:
+        with Image.open(io.BytesIO(result.data)) as img:
+            assert img.format == result.format
+            assert img.size == (result.width, result.width * 3 // 4)
+    assert "decode" in results[0].timings and "decode" not in results[1].timings
+
+
+def test_renditions_match_direct_resize(photo_bytes: bytes):
+    """Deriving small widths from larger renditions stays close to resizing the original."""
+    (result,) = api.renditions(photo_bytes, [100], ["png"], resample="fast")
+    direct = Image.open(io.BytesIO(photo_bytes)).convert("RGB").resize((100, 75), Image.Resampling.LANCZOS)
+
+    with Image.open(io.BytesIO(result.data)) as img:
+        error = ImageStat.Stat(ImageChops.difference(img.convert("RGB"), direct)).mean
+    assert max(error) < 4
+
+
+def test_renditions_skip_upscaling(photo_bytes: bytes):
+    results = api.renditions(photo_bytes, [3200, 800])
+
+    assert [(r.width, r.format) for r in results] == [(800, "JPEG")]
+    with pytest.raises(ValueError, match="exceeds the image's width"):
+        api.renditions(photo_bytes, [3200])
+
+
+def test_renditions_cli_writes_outputs_and_manifest(tmp_path: Path, photo_bytes: bytes):
+    source = tmp_path / "hero.jpg"
+    source.write_bytes(photo_bytes)
+    out, manifest = tmp_path / "out", tmp_path / "hero.json"
+
+    result = CliRunner().invoke(
+        cli, ["renditions", str(source), "-w", "320,640", "-f", "webp,jpg", "-o", str(out), "--manifest", str(manifest)]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "4 rendition(s)" in result.output
+    assert sorted(p.name for p in out.iterdir()) == [
+        "hero-320w.jpg",
+        "hero-320w.webp",
+        "hero-640w.jpg",
+        "hero-640w.webp",
+    ]
+    data = json.loads(manifest.read_text())
+    assert data["source"] == "hero.jpg" and data["width"] == 1600
+    assert data["srcset"]["webp"] == "out/hero-640w.webp 640w, out/hero-320w.webp 320w"
+    assert {r["path"]: r["bytes"] for r in data["renditions"]}["out/hero-320w.jpg"] == (
+        out / "hero-320w.jpg"
+    ).stat().st_size
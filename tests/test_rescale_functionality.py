@@ -1,9 +1,11 @@
 from pathlib import Path
 
 import pytest
-from PIL import Image, ImageSequence
+from PIL import GifImagePlugin, Image, ImageSequence
 
+from pixr.animation import iter_frames
 from pixr.command.core import CmdOptions, Command
+from pixr.resampling import shrink_on_load
 from pixr.runners.rescale import RescaleRunner
 
 
@@ -57,3 +59,88 @@ def test_rescale_animated_gif(animated_gif_path: Path):
 
         frame_dims = [(frame.width, frame.height) for frame in ImageSequence.Iterator(img)]
         assert all(dim == (25, 20) for dim in frame_dims)
+
+
+@pytest.mark.parametrize("resample", ["nearest", "bilinear", "bicubic", "lanczos", "fast"])
+def test_rescale_jpeg_with_filter(image_file_factory, resample: str):
+    """Every resampling filter produces exactly the requested dimensions."""
+    input_path: Path = image_file_factory("photo.jpg", size=(800, 600))
+    command = Command.from_cli(
+        "rescale",
+        {"file_path": str(input_path), "percentage": 10, "resample": resample, "verbose": False},
+    )
+
+    RescaleRunner(command).run()
+
+    with Image.open(input_path.parent / "photo_rescaled_10pct.jpg") as img:
+        assert img.size == (80, 60)
+
+
+@pytest.mark.parametrize("resample, expected_size", [("lanczos", (400, 300)), ("fast", (100, 75))])
+def test_shrink_on_load_respects_quality_tier(image_file_factory, resample: str, expected_size: tuple[int, int]):
+    """JPEG DCT scaling never reduces below the target size times the preset's reducing gap."""
+    input_path: Path = image_file_factory("camera.jpg", size=(800, 600))
+
+    with Image.open(input_path) as img:
+        shrink_on_load(img, (100, 75), resample)
+        assert img.size == expected_size
+
+
+def test_cmd_options_rejects_unknown_filter():
+    with pytest.raises(ValueError, match="Unsupported resampling filter"):
+        CmdOptions(verbose=False, percentage=50, file_path="/test/path.jpg", resample="sinc")
+
+
+def _rescale(file_path: Path, percentage: int, **options) -> None:
+    options = {"verbose": False, "file_path": str(file_path), "percentage": percentage, **options}
+    RescaleRunner(Command.from_cli("rescale", options)).run()
+
+
+@pytest.mark.parametrize("resample", ["lanczos", "nearest"])
+def test_rescale_gif_preserves_frame_timing_and_disposal(tmp_path: Path, resample: str):
+    input_path = tmp_path / "timed.gif"
+    frames = [Image.new("RGB", (60, 40), color) for color in ("red", "green", "blue")]
+    frames[0].save(
+        input_path, save_all=True, append_images=frames[1:], duration=[50, 120, 300], disposal=[1, 2, 1], loop=3
+    )
+
+    _rescale(input_path, 50, resample=resample)
+
+    with Image.open(tmp_path / "timed_rescaled_50pct.gif") as img:
+        assert img.info["loop"] == 3
+        timings = []
+        for frame in ImageSequence.Iterator(img):
+            assert frame.size == (30, 20)
+            timings.append((frame.info["duration"], frame.disposal_method))
+        assert timings == [(50, 1), (120, 2), (300, 1)]
+        img.seek(2)
+        assert img.convert("RGB").getpixel((15, 10)) == (0, 0, 255)
+
+
+def test_rescale_gif_keeps_transparency(tmp_path: Path):
+    input_path = tmp_path / "transparent.gif"
+    frames = []
+    for color in ("red", "blue"):
+        frame = Image.new("RGBA", (40, 40), (0, 0, 0, 0))
+        frame.paste(Image.new("RGBA", (20, 20), color), (10, 10))
+        frames.append(frame)
+    frames[0].save(input_path, save_all=True, append_images=frames[1:], duration=80, disposal=2)
+
+    _rescale(input_path, 50)
+
+    with Image.open(tmp_path / "transparent_rescaled_50pct.gif") as img:
+        assert img.n_frames == 2
+        first = img.convert("RGBA")
+        assert first.getpixel((0, 0))[3] == 0
+        assert first.getpixel((10, 10))[:3] == (255, 0, 0)
+
+
+def test_iter_frames_leaves_gif_decoder_settings_alone(animated_gif_path: Path):
+    """Other threads decoding GIFs must not see a changed loading strategy, even mid-iteration."""
+    strategy = GifImagePlugin.LOADING_STRATEGY
+
+    with Image.open(animated_gif_path) as img:
+        frames = iter_frames(img)
+        next(frames)
+        assert GifImagePlugin.LOADING_STRATEGY == strategy
+        assert all(frame.image.mode in ("P", "L", "RGB", "RGBA") for frame in frames)
@@ -0,0 +1,158 @@
+import http.client
+import json
+import threading
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from pixr.__main__ import cli
+from pixr.runners.remote import connect
+from pixr.server import WorkerPool, command_from_request, create_server, output_format_from_request
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = WorkerPool(concurrency=1, queue_depth=0)
+    yield pool
+    pool.shutdown()
+
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def http_server(pool: WorkerPool):
+    server = _serve(create_server(pool, port=0))
+    yield f"127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _post(remote: str, path: str, body: bytes) -> http.client.HTTPResponse:
+    connection = connect(remote)
+    connection.request("POST", path, body=body)
+    return connection.getresponse()
+
+
+def test_command_from_request_validates_options():
+    command = command_from_request("rescale", "percentage=50&resample=FAST&file_path=/etc/passwd")
+
+    assert command.options.percentage == 50
+    assert command.options.resample == "fast"
+    assert command.options.file_path == "-"
+    with pytest.raises(ValueError, match="'percentage' is required"):
+        command_from_request("rescale", "")
+    assert command_from_request("rescale", "percentage=50&format=JPEG").options.percentage == 50
+    assert output_format_from_request("percentage=50&format=jpeg") == "JPEG"
+    assert output_format_from_request("percentage=50") is None
+    with pytest.raises(ValueError, match="Unsupported output format"):
+        output_format_from_request("format=nonsense")
+
+
+def test_server_returns_encoded_result(http_server: str, static_image_path: Path):
+    response = _post(http_server, "/convert?target_format=webp&quality=70", static_image_path.read_bytes())
+
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "image/webp"
+    assert response.getheader("X-Pixr-Width") == "100"
+    assert json.loads(response.getheader("X-Pixr-Params"))["quality"] == 70
+    assert response.read()[8:12] == b"WEBP"
+
+
+def test_server_rejects_bad_requests(http_server: str, static_image_path: Path):
+    assert _post(http_server, "/rescale?percentage=500", static_image_path.read_bytes()).status == 400
+    assert _post(http_server, "/rescale?percentage=50", b"not an image").status == 422
+
+
+def test_server_applies_backpressure(http_server: str, pool: WorkerPool, static_image_path: Path):
+    assert pool.try_acquire()  # occupy the only slot
+    try:
+        response = _post(http_server, "/anonymize", static_image_path.read_bytes())
+    finally:
+        pool.release()
+
+    assert response.status == 503
+    assert response.getheader("Retry-After") == "1"
+
+
+def test_server_rejects_before_reading_the_body(http_server: str, pool: WorkerPool):
+    connection = connect(http_server)
+    connection.timeout = 5
+    assert pool.try_acquire()
+    try:
+        connection.putrequest("POST", "/anonymize")
+        connection.putheader("Content-Length", str(64 * 1024**2))
+        connection.endheaders()  # the body is never sent
+        response = connection.getresponse()
+    finally:
+        pool.release()
+
+    assert response.status == 503
+    assert response.getheader("Connection") == "close"
+
+
+def test_remote_client_over_unix_socket(pool: WorkerPool, tmp_path: Path, static_image_path: Path):
+    socket_path = tmp_path / "pixr.sock"
+    server = _serve(create_server(pool, socket_path=socket_path))
+    try:
+        result = CliRunner().invoke(
+            cli, ["--remote", f"unix:{socket_path}", "rescale", str(static_image_path), "-p", "50"]
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result.exit_code == 0, result.output
+    with Image.open(static_image_path.with_name("static_rescaled_50pct.png")) as img:
+        assert img.size == (50, 40)
+    assert not socket_path.exists()
+
+
+def test_remote_client_reports_unreachable_server(static_image_path: Path, tmp_path: Path):
+    result = CliRunner().invoke(
+        cli, ["--remote", f"unix:{tmp_path / 'missing.sock'}", "anonymize", str(static_image_path)]
+    )
+
+    assert result.exit_code != 0
+    assert "Could not reach pixr server" in result.output
+
+
+def test_remote_client_reports_local_write_errors_as_such(pool: WorkerPool, tmp_path: Path, static_image_path: Path):
+    socket_path = tmp_path / "pixr.sock"
+    output_path = tmp_path / "missing" / "out.png"
+    server = _serve(create_server(pool, socket_path=socket_path))
+    try:
+        result = CliRunner().invoke(
+            cli, ["--remote", f"unix:{socket_path}", "rescale", str(static_image_path), str(output_path), "-p", "50"]
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result.exit_code != 0
+    assert "Could not reach pixr server" not in result.output
+
+
+def test_remote_rescale_matches_local_output_format(pool: WorkerPool, tmp_path: Path, static_image_path: Path):
+    socket_path = tmp_path / "pixr.sock"
+    local_path, remote_path = tmp_path / "local.jpg", tmp_path / "remote.jpg"
+    assert CliRunner().invoke(cli, ["rescale", str(static_image_path), str(local_path), "-p", "50"]).exit_code == 0
+    server = _serve(create_server(pool, socket_path=socket_path))
+    try:
+        result = CliRunner().invoke(
+            cli, ["--remote", f"unix:{socket_path}", "rescale", str(static_image_path), str(remote_path), "-p", "50"]
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result.exit_code == 0, result.output
+    with Image.open(local_path) as local, Image.open(remote_path) as remote:
+        assert local.format == remote.format == "JPEG"
+        assert local.size == remote.size
+    assert remote_path.read_bytes() == local_path.read_bytes()
@@ -0,0 +1,103 @@
+import io
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image, ImageFilter
+
+from pixr import api, ssim
+from pixr.__main__ import cli
+from pixr.command.exceptions import MissingDependency
+from pixr.strategies.perceptual import threshold_search
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture(scope="module")
+def photo() -> Image.Image:
+    bands = [Image.effect_noise((160, 120), 40).filter(ImageFilter.GaussianBlur(1.2)) for _ in range(3)]
+    return Image.merge("RGB", bands).resize((640, 480))
+
+
+def _jpeg(img: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def test_ssim_is_one_for_identical_images_and_falls_with_quality(photo: Image.Image):
+    reference = ssim.SsimReference(photo)
+    scores = [reference.score(_jpeg(photo, quality)) for quality in (20, 50, 90)]
+
+    assert ssim.ssim(photo, photo) == pytest.approx(1.0)
+    assert scores == sorted(scores) and 0.5 < scores[0] < scores[-1] < 1.0
+    assert ssim.SsimReference(photo, downsample=2).plane.shape == (240, 320)
+
+
+def test_threshold_search_finds_lowest_passing_quality():
+    calls = []
+
+    def score(quality: int) -> float:
+        calls.append(quality)
+        return 1 - 2 / quality
+
+    result = threshold_search(score, 0.97, 1, 100)
+
+    # 1 - 2/q >= 0.97 first holds at q = 67
+    assert result.best.quality == 67
+    assert len(calls) <= 8 and len(set(calls)) == len(calls)
+    assert threshold_search(score, 0.999, 1, 100).best is None
+
+
+def test_target_size_min_ssim_picks_lowest_quality_meeting_it(photo: Image.Image):
+    data = _jpeg(photo, 95)
+    result = api.target_size(data, min_ssim=0.985)
+
+    quality = result.params["quality"]
+    reference = ssim.SsimReference(Image.open(io.BytesIO(data)))
+    assert result.format == "JPEG" and not result.params["ssim_not_met"]
+    assert reference.score(result.data) == pytest.approx(result.params["ssim"], abs=1e-4)
+    assert result.params["ssim"] >= 0.985
+    assert reference.score(_jpeg(photo, quality - 1)) < 0.985
+
+
+def test_max_size_caps_min_ssim(photo: Image.Image):
+    data = _jpeg(photo, 95)
+    unbounded = api.target_size(data, min_ssim=0.99)
+    cap = unbounded.size * 4 // 5
+    capped = api.target_size(data, cap, min_ssim=0.99)
+
+    assert capped.size <= cap and not capped.params["quality_floor_hit"]
+    assert capped.params["ssim_not_met"] and "ssim" not in capped.params
+
+
+def test_convert_to_webp_with_min_ssim(photo: Image.Image):
+    buffer = io.BytesIO()
+    photo.save(buffer, "PNG")
+    result = api.convert(buffer.getvalue(), "webp", min_ssim=0.98, ssim_downsample=2)
+
+    assert result.format == "WEBP"
+    assert ssim.SsimReference(photo, downsample=2).score(result.data) >= 0.98
+    with pytest.raises(ValueError, match="only supported for JPEG and WebP"):
+        api.convert(buffer.getvalue(), "png", min_ssim=0.98)
+
+
+def test_target_size_cli_needs_a_size_or_ssim(tmp_path: Path, photo: Image.Image):
+    source = tmp_path / "photo.jpg"
+    source.write_bytes(_jpeg(photo, 95))
+    runner = CliRunner()
+
+    missing = runner.invoke(cli, ["target-size", str(source)])
+    assert missing.exit_code != 0 and "--min-ssim" in missing.output
+
+    result = runner.invoke(cli, ["target-size", str(source), "--min-ssim", "0.98"])
+    assert result.exit_code == 0, result.output
+    assert "Target SSIM achieved" in result.output
+    assert (tmp_path / "photo_targeted.jpg").exists()
+
+
+def test_min_ssim_without_numpy_fails_cleanly(monkeypatch: pytest.MonkeyPatch, photo: Image.Image):
+    monkeypatch.setattr(ssim, "np", None)
+
+    with pytest.raises(MissingDependency, match="NumPy"):
+        api.target_size(_jpeg(photo, 95), min_ssim=0.98)
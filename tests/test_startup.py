@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+
+# Cumulative `-X importtime` budget for `pixr.__main__`, in microseconds. Importing
+# click alone takes about 20ms; the budget leaves room for slower machines but fails
+# as soon as PIL, pydantic or the runners are pulled in at startup again.
+IMPORT_BUDGET_US = int(os.environ.get("PIXR_IMPORT_BUDGET_US", 100_000))
+
+HEAVY_MODULES = (
+    "PIL",
+    "pydantic",
+    "pixr.api",
+    "pixr.runners",
+    "pixr.strategies",
+    "pixr.batch",
+    "pixr.server",
+    "pixr.bench",
+    "pixr.sync",
+    "pixr.watch",
+    "pixr.ssim",
+    "numpy",
+)
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": str(PACKAGE_ROOT)}
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env, check=True)
+
+
+def _cumulative_import_time(module: str) -> int:
+    stderr = _python("-X", "importtime", "-c", f"import {module}").stderr
+    for line in stderr.splitlines():
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if name.strip() == module:
+            return int(cumulative)
+    raise AssertionError(f"{module} not found in import times")
+
+
+def test_cli_import_time_within_budget():
+    best = min(_cumulative_import_time("pixr.__main__") for _ in range(3))
+
+    assert best <= IMPORT_BUDGET_US, f"importing pixr.__main__ took {best}us, budget is {IMPORT_BUDGET_US}us"
+
+
+def test_help_does_not_load_heavy_dependencies():
+    script = (
+        "import sys\n"
+        "from pixr.__main__ import cli\n"
+        "try:\n"
+        "    cli(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(' '.join(sys.modules))\n"
+    )
+    loaded = _python("-c", script).stdout.splitlines()[-1].split()
+
+    assert not [name for name in loaded if name.startswith(HEAVY_MODULES)]
@@ -0,0 +1,119 @@
+import json
+import random
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from pixr import api, stats
+from pixr.__main__ import cli
+
+
+@pytest.fixture
+def photo_bytes() -> bytes:
+    rng = random.Random(0)
+    img = Image.frombytes("RGB", (160, 120), rng.randbytes(160 * 120 * 3))
+    buffer = BytesIO()
+    img.save(buffer, "JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def test_hooks_receive_stages_and_probes(photo_bytes: bytes):
+    events = []
+    with stats.hooked(events.append):
+        result = api.target_size(photo_bytes, len(photo_bytes) // 2)
+
+    assert not stats.enabled()
+    assert [event["stage"] for event in events if event["event"] == "stage"] == ["open", "decode", "search"]
+    probes = [event for event in events if event["event"] == "probe"]
+    assert len(probes) == result.params["probes"]
+    assert all(probe["size"] > 0 and probe["seconds"] >= 0 for probe in probes)
+    assert result.params["quality"] in [probe["params"]["quality"] for probe in probes]
+
+
+def test_png_probes_report_palette_params(tmp_path: Path):
+    buffer = BytesIO()
+    Image.effect_noise((120, 90), 80).convert("RGB").save(buffer, "PNG")
+    events = []
+    with stats.hooked(events.append):
+        api.target_size(buffer.getvalue(), buffer.tell() // 2)
+
+    params = [event["params"] for event in events if event["event"] == "probe"]
+    assert params[0] == {"colors": None, "dither": False, "compress_level": 6}
+    assert any(param["colors"] == 256 for param in params)
+
+
+def test_file_stats_folds_events():
+    record = stats.FileStats("rescale", "in.png", bytes_read=2048)
+    with stats.hooked(record):
+        with stats.stage("decode"):
+            pass
+        stats.emit("stage", stage="decode", seconds=0.5)
+        stats.emit("probe", params={"quality": 80}, size=100, seconds=0.1)
+        stats.emit("output", path="out.png", bytes=1024)
+
+    assert record.stages["decode"] >= 0.5
+    assert record.probes == [{"params": {"quality": 80}, "size": 100, "seconds": 0.1}]
+    assert (record.output, record.bytes_written) == ("out.png", 1024)
+    assert "read 2KB, wrote 1KB" in record.format()
+    assert json.loads(record.to_json())["command"] == "rescale"
+
+
+def test_cli_stats_json_lines(tmp_path: Path, photo_bytes: bytes):
+    file_path = tmp_path / "photo.jpg"
+    file_path.write_bytes(photo_bytes)
+
+    result = CliRunner().invoke(cli, ["--stats", "--stats-format", "json", "target-size", str(file_path), "-s", "20KB"])
+
+    assert result.exit_code == 0, result.output
+    [line] = result.stderr.splitlines()
+    record = json.loads(line)
+    assert record["command"] == "target-size"
+    assert record["bytes_read"] == len(photo_bytes)
+    assert record["bytes_written"] == Path(record["output"]).stat().st_size
+    assert set(record["stages"]) == {"open", "decode", "search", "write"}
+    assert record["probes"] and record["error"] is None
+    if record["peak_rss_kb"] is not None:
+        assert record["peak_rss_kb"] > 0
+
+
+def test_cli_stats_flag_reports_text(static_image_path: Path):
+    result = CliRunner().invoke(cli, ["--stats", "rescale", str(static_image_path), "-p", "50"])
+
+    assert result.exit_code == 0, result.output
+    assert result.stderr.startswith(f"⏱ {static_image_path}:")
+    assert "transform" in result.stderr and "write" in result.stderr
+
+
+def test_cli_stats_format_option(static_image_path: Path):
+    result = CliRunner().invoke(
+        cli, ["--stats", "--stats-format", "json", "rescale", str(static_image_path), "-p", "50"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.stderr.splitlines()[0])["input"] == str(static_image_path)
+
+
+def test_cli_stats_format_alone_reports_nothing(static_image_path: Path):
+    result = CliRunner().invoke(cli, ["--stats-format", "json", "rescale", str(static_image_path), "-p", "50"])
+
+    assert result.exit_code == 0, result.output
+    assert not result.stderr
+
+
+def test_cli_stats_for_batch_and_failures(tmp_path: Path, image_file_factory):
+    image_file_factory("a.jpg")
+    image_file_factory("b.jpg")
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+
+    arguments = ["batch", "rescale", str(tmp_path), "-o", str(tmp_path / "out"), "-p", "50", "-j", "1"]
+    result = CliRunner().invoke(cli, ["--stats", "--stats-format", "json", *arguments])
+
+    lines = [line for line in result.stderr.splitlines() if line.startswith("{")]
+    records = {Path(record["input"]).name: record for record in map(json.loads, lines)}
+    assert result.exit_code != 0
+    assert set(records) == {"a.jpg", "b.jpg", "broken.png"}
+    assert records["a.jpg"]["output"] == str(tmp_path / "out" / "a.jpg")
+    assert records["broken.png"]["error"]
@@ -0,0 +1,173 @@
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from pixr import batch
+from pixr.__main__ import cli
+from pixr.command.core import Command
+from pixr.sync import MANIFEST_NAME, sync
+
+
+def _make_tree(root: Path) -> None:
+    (root / "nested").mkdir(parents=True)
+    Image.new("RGB", (100, 80), color="red").save(root / "a.png")
+    Image.new("RGB", (60, 40), color="blue").save(root / "nested" / "b.jpg")
+    (root / "notes.txt").write_text("not an image")
+
+
+def _template(source: Path, spec: str = "rescale:50") -> Command:
+    return Command.from_cli("pipeline", {"verbose": False, "pipeline": spec, "file_path": str(source)})
+
+
+def _sync(source: Path, destination: Path, spec: str = "rescale:50"):
+    return sync(_template(source, spec), source, destination, jobs=1)
+
+
+@pytest.fixture
+def processed(monkeypatch) -> list[str]:
+    """The input paths processed by a run."""
+    paths = []
+    process_file = batch.process_file
+
+    def recording(command):
+        paths.append(Path(command.options.file_path).name)
+        return process_file(command)
+
+    monkeypatch.setattr(batch, "process_file", recording)
+    return paths
+
+
+def test_sync_mirrors_tree_and_records_manifest(tmp_path: Path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    _make_tree(src)
+
+    summary = _sync(src, dst)
+
+    assert summary.processed == 2 and not summary.failed
+    with Image.open(dst / "nested" / "b.jpg") as img:
+        assert img.size == (30, 20)
+    with sqlite3.connect(dst / MANIFEST_NAME) as db:
+        rows = db.execute("SELECT dir, name, size, output FROM files ORDER BY dir").fetchall()
+    assert rows == [
+        ("", "a.png", (src / "a.png").stat().st_size, "a.png"),
+        ("nested", "b.jpg", (src / "nested" / "b.jpg").stat().st_size, "nested/b.jpg"),
+    ]
+
+
+def test_sync_only_processes_changed_files(tmp_path: Path, processed: list[str]):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    _make_tree(src)
+    _sync(src, dst)
+    processed.clear()
+
+    summary = _sync(src, dst)
+    assert processed == [] and summary.unchanged == 2
+
+    Image.new("RGB", (100, 80), color="green").save(src / "a.png")
+    summary = _sync(src, dst)
+    assert processed == ["a.png"] and summary.unchanged == 1
+    with Image.open(dst / "a.png") as img:
+        assert img.getpixel((0, 0)) == (0, 128, 0)
+
+
+def test_sync_restamps_touched_files_without_processing(tmp_path: Path, processed: list[str]):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    _make_tree(src)
+    _sync(src, dst)
+    processed.clear()
+
+    os.utime(src / "a.png", ns=(0, 1_000_000_000))
+    summary = _sync(src, dst)
+    assert processed == [] and summary.touched == 1
+
+    summary = _sync(src, dst)
+    assert summary.touched == 0 and summary.unchanged == 2
+
+
+def test_sync_removes_outputs_of_deleted_sources(tmp_path: Path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    _make_tree(src)
+    _sync(src, dst)
+
+    (src / "nested" / "b.jpg").unlink()
+    (src / "nested").rmdir()
+    summary = _sync(src, dst)
+
+    assert summary.deleted == 1
+    assert not (dst / "nested").exists()
+    assert (dst / "a.png").exists()
+
+
+def test_sync_reprocesses_when_options_change(tmp_path: Path, processed: list[str]):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    _make_tree(src)
+    _sync(src, dst)
+    processed.clear()
+
+    summary = _sync(src, dst, "rescale:50 | convert:webp")
+
+    assert sorted(processed) == ["a.png", "b.jpg"] and summary.processed == 2
+    assert sorted(p.name for p in dst.rglob("*") if p.is_file() and p.name != MANIFEST_NAME) == ["a.webp", "b.webp"]
+
+
+def test_sync_resumes_after_failures(tmp_path: Path, processed: list[str], monkeypatch):
+    """Files processed before an interruption are kept; the next run only does the rest."""
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    _make_tree(src)
+    process_file = batch.process_file
+
+    def failing(command):
+        if command.options.file_path.endswith("b.jpg"):
+            raise KeyboardInterrupt
+        return process_file(command)
+
+    monkeypatch.setattr(batch, "process_file", failing)
+    with pytest.raises(KeyboardInterrupt):
+        _sync(src, dst)
+    monkeypatch.setattr(batch, "process_file", process_file)
+    processed.clear()
+
+    summary = _sync(src, dst)
+
+    assert processed == ["b.jpg"] and summary.unchanged == 1
+    assert (dst / "nested" / "b.jpg").exists()
+
+
+def test_sync_reports_output_collisions(tmp_path: Path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    Image.new("RGB", (20, 20), color="red").save(src / "a.png")
+    Image.new("RGB", (20, 20), color="blue").save(src / "a.jpg")
+
+    summary = _sync(src, dst, "convert:webp")
+
+    assert summary.processed == 1
+    assert [Path(result.input_path).name for result in summary.failed] == ["a.png"]
+
+
+def test_sync_skips_destination_inside_source(tmp_path: Path):
+    src = tmp_path / "src"
+    _make_tree(src)
+
+    _sync(src, src / "out")
+    summary = _sync(src, src / "out")
+
+    assert summary.unchanged == 2 and not summary.failed
+    assert not (src / "out" / "out").exists()
+
+
+def test_sync_cli(tmp_path: Path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    _make_tree(src)
+
+    result = CliRunner().invoke(cli, ["sync", str(src), str(dst), "--op", "convert:webp", "-j", "1"])
+    assert result.exit_code == 0, result.output
+    assert "2 processed, 0 unchanged" in result.output
+
+    result = CliRunner().invoke(cli, ["sync", str(src), str(dst), "--op", "convert:webp", "-j", "1"])
+    assert "0 processed, 2 unchanged" in result.output
+    assert (dst / "nested" / "b.webp").exists()
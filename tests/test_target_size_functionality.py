@@ -2,6 +2,7 @@ from pathlib import Path
 
 import pytest
 from click.testing import CliRunner
+from PIL import Image
 
 from pixr.__main__ import cli
 
@@ -80,3 +81,33 @@ def test_target_size_unsupported_format(cli_runner, image_file_factory):
 
     assert result.exit_code != 0
     assert "Input file format 'TIFF' is not supported" in result.output
+
+
+def test_target_size_proxy_probe_mode(cli_runner, image_file_factory):
+    """
+    Test that proxy probing still produces an output within the target.
+    """
+    input_file: Path = image_file_factory("test_proxy.jpg", size=(2400, 1800), color="blue")
+    output_file = input_file.with_name("test_proxy_targeted.jpg")
+
+    result = cli_runner.invoke(cli, ["target-size", str(input_file), "--max-size", "40KB", "--probe", "proxy"])
+
+    assert result.exit_code == 0, result.output
+    assert "Target size achieved" in result.output
+    assert output_file.stat().st_size <= 40 * 1024
+
+
+def test_target_size_png(cli_runner, tmp_path):
+    """
+    Test that PNG inputs are quantized until they fit the target.
+    """
+    input_file = tmp_path / "screen.png"
+    Image.effect_noise((300, 300), 50).convert("RGB").save(input_file)
+    output_file = input_file.with_name("screen_targeted.png")
+
+    result = cli_runner.invoke(cli, ["target-size", str(input_file), "--max-size", "100KB"])
+
+    assert result.exit_code == 0, result.output
+    assert "Target size achieved" in result.output
+    assert "colors" in result.output
+    assert output_file.stat().st_size <= 100 * 1024
@@ -0,0 +1,144 @@
+import io
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from pixr.__main__ import cli
+from pixr.batch import FileResult
+from pixr.command.core import Command
+from pixr.watch import Debouncer, InotifyWatcher, PollingWatcher, Watch
+
+linux_only = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+
+
+def _save(path: Path, color: str = "red") -> None:
+    Image.new("RGB", (100, 80), color=color).save(path)
+
+
+def _wait_for(condition, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_debouncer_waits_for_files_to_settle(tmp_path: Path):
+    written, closed = tmp_path / "written.png", tmp_path / "closed.png"
+    _save(written)
+    _save(closed)
+    debouncer = Debouncer(settle=1.0)
+
+    debouncer.touch(written, now=0.0)
+    debouncer.touch(closed, now=0.0, closed=True)
+    assert debouncer.ready(now=0.5) == [closed]
+    assert debouncer.timeout(now=0.5, default=5.0) == 0.0
+
+    debouncer.pop(closed)
+    _save(written, "blue")  # rewritten without an event reaching the debouncer
+    os.utime(written, ns=(0, 1))
+    assert debouncer.ready(now=1.0) == []
+    assert debouncer.ready(now=2.0) == [written]
+
+    written.unlink()
+    assert debouncer.ready(now=3.0) == [] and len(debouncer) == 0
+
+
+@linux_only
+def test_inotify_watcher_reports_finished_images(tmp_path: Path):
+    watcher = InotifyWatcher(tmp_path, recursive=True)
+    try:
+        _save(tmp_path / "a.png")
+        (tmp_path / "notes.txt").write_text("not an image")
+        _save(tmp_path / ".upload.png")
+        (tmp_path / "nested").mkdir()
+        time.sleep(0.05)
+        changes = watcher.read(1.0)
+        _save(tmp_path / "nested" / "b.png")
+        changes += watcher.read(1.0)
+    finally:
+        watcher.close()
+
+    assert (tmp_path / "a.png", True) in changes
+    assert (tmp_path / "nested" / "b.png", True) in changes
+    assert {path.name for path, _ in changes} == {"a.png", "b.png"}
+
+
+def test_polling_watcher_reports_new_and_changed_images(tmp_path: Path):
+    _save(tmp_path / "old.png")
+    watcher = PollingWatcher(tmp_path, interval=0.01)
+
+    _save(tmp_path / "new.png")
+    os.utime(tmp_path / "old.png", ns=(0, 1))
+    time.sleep(0.02)
+
+    assert sorted(path.name for path, _ in watcher.read(1.0)) == ["new.png", "old.png"]
+    assert watcher.read(1.0) == []
+
+
+@pytest.mark.parametrize("poll", [None, 0.05], ids=["inotify", "polling"])
+def test_watch_processes_landing_images(tmp_path: Path, poll):
+    if poll is None and not sys.platform.startswith("linux"):
+        pytest.skip("inotify is Linux-only")
+    src, out = tmp_path / "uploads", tmp_path / "out"
+    src.mkdir()
+    _save(src / "existing.png")
+    template = Command.from_cli("pipeline", {"verbose": False, "pipeline": "convert:webp", "file_path": str(src)})
+    events = io.StringIO()
+    watch = Watch(template, src, out, workers=1, existing=True, settle=0.05, poll=poll, events=events)
+    stop, watching = threading.Event(), threading.Event()
+    thread = threading.Thread(target=watch.run, args=(stop, watching))
+    thread.start()
+    try:
+        watching.wait(10)
+        # Written under a hidden name and renamed into place, like most uploaders do
+        _save(src / ".incoming.png", "blue")
+        os.replace(src / ".incoming.png", src / "landed.png")
+        _wait_for(lambda: (out / "landed.webp").exists() and (out / "existing.webp").exists())
+        _wait_for(lambda: events.getvalue().count('"processed"') == 2)
+    finally:
+        stop.set()
+        thread.join(10)
+
+    records = [json.loads(line) for line in events.getvalue().splitlines()]
+    processed = [record for record in records if record["event"] == "processed"]
+    assert sorted(Path(record["output"]).name for record in processed) == ["existing.webp", "landed.webp"]
+    assert all(record["latency"] >= record["seconds"] for record in processed)
+    with Image.open(out / "landed.webp") as img:
+        assert img.getpixel((0, 0))[2] > 200
+
+
+def test_watch_reports_pipelines_that_wrote_nothing_as_failed(tmp_path: Path):
+    src, out = tmp_path / "uploads", tmp_path / "out"
+    src.mkdir()
+    _save(src / "photo.png")
+    template = Command.from_cli(
+        "pipeline", {"verbose": False, "pipeline": "convert:webp | target-size:1KB", "file_path": str(src)}
+    )
+    events = io.StringIO()
+    watch = Watch(template, src, out, events=events)
+    command = watch._command(src / "photo.png")
+    watch._in_flight[src / "photo.png"] = None
+    # What the runner reports when the pipeline gave up without a result to write
+    result = FileResult(str(src / "photo.png"), True, "❌ Could not meet target of 1KB.", 0.1)
+    watch._done.put((src / "photo.png", command, 0.0, result, 1.0))
+
+    watch._report()
+
+    [record] = [json.loads(line) for line in events.getvalue().splitlines()]
+    assert record["event"] == "failed" and record["output"] is None
+    assert "Could not meet target" in record["message"]
+    assert not watch._in_flight
+
+
+def test_watch_rejects_watched_directory_as_output(tmp_path: Path):
+    result = CliRunner().invoke(cli, ["watch", str(tmp_path), "-o", str(tmp_path), "--op", "convert:webp"])
+
+    assert result.exit_code != 0
+    assert "must differ from the watched directory" in result.output
@@ -0,0 +1,78 @@
+import io
+
+import pytest
+from PIL import Image, ImageDraw, ImageFilter
+
+from pixr.strategies import webp
+from pixr.strategies.webp import WebPStrategy
+
+
+@pytest.fixture(scope="module")
+def photo() -> Image.Image:
+    bands = [Image.effect_noise((200, 150), 40).filter(ImageFilter.GaussianBlur(1.2)) for _ in range(3)]
+    return Image.merge("RGB", bands).resize((800, 600))
+
+
+def _size(img: Image.Image, **save_kwargs) -> int:
+    buffer = io.BytesIO()
+    img.save(buffer, "WEBP", **save_kwargs)
+    return buffer.tell()
+
+
+@pytest.mark.parametrize("fraction", [0.3, 0.7])
+def test_webp_strategy_meets_target_with_final_high_effort_encode(photo: Image.Image, fraction: float):
+    low, high = _size(photo, quality=50, method=6), _size(photo, quality=95, method=6)
+    target = int(low + (high - low) * fraction)
+
+    result = WebPStrategy(photo, target, wild_mode=False).optimize()
+
+    data = result["best_result_data"]
+    assert len(data) <= target
+    assert not result["quality_floor_hit"]
+    assert len(data) == _size(photo, quality=result["best_params"]["quality"], method=webp.FINAL_METHOD)
+
+
+def test_webp_strategy_falls_back_to_fast_probe_when_final_misses(photo: Image.Image, monkeypatch):
+    """If the full-effort encode overshoots, the fast-effort result (which fits) is returned."""
+    target = _size(photo, quality=70, method=webp.PROBE_METHOD) + 1
+    monkeypatch.setattr(webp, "FINAL_METHOD", webp.PROBE_METHOD)
+    monkeypatch.setattr(webp, "SAFETY_MARGIN", 0.0)
+    original_encode = WebPStrategy._encode
+    monkeypatch.setattr(
+        WebPStrategy, "_encode", lambda self, img, q, **kw: bytes(original_encode(self, img, q, **kw)) * 2
+    )
+
+    result = WebPStrategy(photo, target, wild_mode=False).optimize()
+
+    assert len(result["best_result_data"]) <= target
+
+
+def test_webp_strategy_uses_lossless_for_few_colors():
+    img = Image.new("RGB", (400, 300), "white")
+    draw = ImageDraw.Draw(img)
+    for i in range(10):
+        draw.rectangle((i * 40, 0, i * 40 + 20, 300), fill=(25 * i, 0, 255 - 25 * i))
+
+    result = WebPStrategy(img, 50 * 1024, wild_mode=False).optimize()
+
+    assert result["best_params"]["lossless"]
+    with Image.open(io.BytesIO(result["best_result_data"])) as out:
+        assert out.convert("RGB").tobytes() == img.tobytes()
+
+
+def test_webp_strategy_reports_floor_hit(photo: Image.Image):
+    result = WebPStrategy(photo, 500, wild_mode=False).optimize()
+
+    assert result["quality_floor_hit"]
+    assert result["best_params"]["quality"] == 50
+
+
+def test_webp_strategy_clears_floor_hit_when_final_encode_fits(photo: Image.Image):
+    """Fast probes miss the margin-reduced target at the floor, but the full-effort encode fits."""
+    target = _size(photo, quality=50, method=webp.FINAL_METHOD)
+    assert _size(photo, quality=50, method=webp.PROBE_METHOD) > target * (1 - webp.SAFETY_MARGIN)
+
+    result = WebPStrategy(photo, target, wild_mode=False).optimize()
+
+    assert len(result["best_result_data"]) <= target
+    assert not result["quality_floor_hit"]